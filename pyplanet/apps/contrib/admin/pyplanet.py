@@ -1,7 +1,17 @@
 """
 Player Admin methods and functions.
 """
+import json
+import logging
+import os
+
+from pyplanet.apps.contrib.admin.views.stats import UIStatsListView
+from pyplanet.conf import settings
 from pyplanet.contrib.command import Command
+from pyplanet.core.events.stats import SignalStats
+from pyplanet.core.ui.stats import UIStats
+
+logger = logging.getLogger(__name__)
 
 
 class PyPlanetAdmin:
@@ -15,10 +25,103 @@ class PyPlanetAdmin:
 
 	async def on_start(self):
 		await self.instance.permission_manager.register('reboot', 'Reboot PyPlanet pool instance', app=self.app, min_level=3)
+		await self.instance.permission_manager.register(
+			'signal_stats', 'Show and manage the signal receiver statistics', app=self.app, min_level=3
+		)
+		await self.instance.permission_manager.register(
+			'ui_stats', 'Show and manage the UI bandwidth and render cost statistics', app=self.app, min_level=3
+		)
 
 		await self.instance.command_manager.register(
 			Command(command='reboot', target=self.reboot_pool, perms='admin:reboot', admin=True, description='Reboots PyPlanet.'),
+			Command(command='signalstats', target=self.signal_stats, perms='admin:signal_stats', admin=True,
+					description='Shows the slowest signal receivers (or on/off/reset the statistics).')
+				.add_param(name='action', required=False),
+			Command(command='uistats', target=self.ui_stats, perms='admin:ui_stats', admin=True,
+					description='Shows the most expensive manialinks (or on/off/reset/dump the statistics).')
+				.add_param(name='action', required=False),
 		)
 
 	async def reboot_pool(self, player, data, **kwargs):
 		exit(50)
+
+	async def signal_stats(self, player, data, **kwargs):
+		action = (data.action or '').lower()
+		if action in ('on', 'off', 'reset'):
+			if action == 'on':
+				SignalStats.enable()
+			elif action == 'off':
+				SignalStats.disable()
+			else:
+				SignalStats.reset()
+			message = '$ff0Signal statistics are $fff{}$ff0.'.format('reset' if action == 'reset' else action)
+			await self.instance.chat(message, player)
+			return
+
+		count = int(action) if action.isdigit() else 5
+		top = SignalStats.get_top(count)
+		if not top:
+			message = '$i$f00No signal statistics recorded{}.'.format(
+				'' if SignalStats.enabled else ', enable with $fff//signalstats on'
+			)
+			await self.instance.chat(message, player)
+			return
+
+		lines = ['$ff0Slowest signal receivers (total time):']
+		for nr, stats in enumerate(top, start=1):
+			lines.append('$fff{}. $ff0{} $fff{}$ff0: {}x, avg {:.1f}ms, max {:.1f}ms, {} slow, {} errors'.format(
+				nr, stats.signal, stats.receiver, stats.count, stats.average * 1000, stats.max * 1000, stats.slow,
+				stats.exceptions,
+			))
+		await self.instance.gbx.multicall(*[self.instance.chat(line, player) for line in lines])
+
+	async def ui_stats(self, player, data, **kwargs):
+		action = (data.action or '').lower()
+		if action in ('on', 'off', 'reset'):
+			if action == 'on':
+				UIStats.enable()
+			elif action == 'off':
+				UIStats.disable()
+			else:
+				UIStats.reset()
+			message = '$ff0UI statistics are $fff{}$ff0.'.format('reset' if action == 'reset' else action)
+			await self.instance.chat(message, player)
+			return
+
+		if not UIStats.manialinks:
+			message = '$i$f00No UI statistics recorded{}.'.format(
+				'' if UIStats.enabled else ', enable with $fff//uistats on'
+			)
+			await self.instance.chat(message, player)
+			return
+
+		if action == 'dump':
+			path = self.dump_ui_stats()
+			if path:
+				message = '$ff0UI statistics are written to $fff{}$ff0.'.format(path)
+			else:
+				message = '$i$f00Can\'t write the UI statistics, check the TMP_PATH setting and the log!'
+			await self.instance.chat(message, player)
+			return
+
+		view = UIStatsListView(self.app)
+		await view.display(player=player)
+
+	def dump_ui_stats(self):
+		"""
+		Write the UI statistics as JSON to the ``ui_stats.json`` file in the ``TMP_PATH``.
+
+		:return: Path of the file or None when it can't be written.
+		"""
+		if not settings.TMP_PATH:
+			return None
+
+		path = os.path.join(settings.TMP_PATH, 'ui_stats.json')
+		try:
+			os.makedirs(settings.TMP_PATH, exist_ok=True)
+			with open(path, 'w') as file:
+				json.dump(UIStats.dump(), file, indent=2)
+		except OSError as e:
+			logger.warning('Can\'t write the UI statistics to {}: {}'.format(path, str(e)))
+			return None
+		return path
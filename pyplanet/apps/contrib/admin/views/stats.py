@@ -0,0 +1,95 @@
+"""
+Statistics Views.
+"""
+
+from pyplanet.core.ui.stats import UIStats
+from pyplanet.views.generics import ManualListView
+
+
+class UIStatsListView(ManualListView):
+	title = 'UI bandwidth and render cost'
+	icon_style = 'Icons128x128_1'
+	icon_substyle = 'Statistics'
+
+	def __init__(self, app):
+		"""
+		:param app: App config instance.
+		:type app: pyplanet.apps.contrib.admin.Admin
+		"""
+		super().__init__()
+		self.manager = app.context.ui
+		self.app = app
+		self.fields = [
+			{
+				'name': 'Manialink',
+				'index': 'id',
+				'sorting': True,
+				'searching': True,
+				'width': 70,
+				'type': 'label'
+			},
+			{
+				'name': 'App',
+				'index': 'app',
+				'sorting': True,
+				'searching': True,
+				'width': 30,
+				'type': 'label'
+			},
+			{
+				'name': 'KB send',
+				'index': 'kilobytes',
+				'sorting': True,
+				'searching': False,
+				'width': 25,
+				'type': 'label'
+			},
+			{
+				'name': 'Sends/min',
+				'index': 'sends_per_minute',
+				'sorting': True,
+				'searching': False,
+				'width': 25,
+				'type': 'label'
+			},
+			{
+				'name': 'Players',
+				'index': 'logins_average',
+				'sorting': True,
+				'searching': False,
+				'width': 20,
+				'type': 'label'
+			},
+			{
+				'name': 'Render (ms)',
+				'index': 'render_time',
+				'sorting': True,
+				'searching': False,
+				'width': 25,
+				'type': 'label'
+			},
+			{
+				'name': 'Avg render (ms)',
+				'index': 'render_average',
+				'sorting': True,
+				'searching': False,
+				'width': 30,
+				'type': 'label'
+			},
+		]
+
+		# Most expensive (bandwidth) first.
+		self.sort_field = self.fields[2]
+		self.sort_order = 0
+
+	async def get_data(self):
+		elapsed = UIStats.elapsed
+		return [dict(
+			id=stats.id,
+			app=stats.app_label,
+			kilobytes=round(stats.bytes / 1024, 1),
+			sends_per_minute=round(stats.get_sends_per_minute(elapsed), 1),
+			logins_average=round(stats.logins_average, 1),
+			render_time=round(stats.render_time * 1000, 1),
+			render_average=round(stats.render_average * 1000, 2),
+		) for stats in UIStats.get_top()]
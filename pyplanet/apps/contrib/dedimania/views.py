@@ -2,12 +2,12 @@ import math
 
 from pyplanet.utils.style import style_strip
 from pyplanet.utils.times import format_time
-from pyplanet.views.generics.widget import TimesWidgetView
+from pyplanet.views.generics.widget import DynamicTimesWidgetView
 from pyplanet.views.generics.list import ManualListView
 from pyplanet.utils import times
 
 
-class DedimaniaRecordsWidget(TimesWidgetView):
+class DedimaniaRecordsWidget(DynamicTimesWidgetView):
 	widget_x = -160
 	widget_y = 70.5
 	z_index = 30
@@ -24,6 +24,8 @@ class LocalRecords(AppConfig):
 		self.lock = asyncio.Lock()
 
 		self.current_records = []
+		# Incremented on every change of the current records, the widget rebuilds its index when it changes.
+		self.records_version = 0
 		self.widget = None
 
 		self.setting_chat_announce = Setting(
@@ -159,6 +161,7 @@ class LocalRecords(AppConfig):
 				.order_by(LocalRecord.score.asc())
 		)
 		self.current_records = list(record_list)
+		self.records_version += 1
 
 	async def show_records_list(self, player, data = None, **kwargs):
 		"""
@@ -241,6 +244,7 @@ class LocalRecords(AppConfig):
 
 			# (Re)sort the record list.
 			self.current_records.sort(key=lambda x: x.score)
+			self.records_version += 1
 			new_index = self.current_records.index(current_record) + 1
 
 			if new_index == 1:
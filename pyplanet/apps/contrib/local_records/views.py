@@ -3,12 +3,12 @@ import math
 from pyplanet.utils.style import style_strip
 from pyplanet.utils.times import format_time
 from pyplanet.views.generics import ask_confirmation
-from pyplanet.views.generics.widget import TimesWidgetView
+from pyplanet.views.generics.widget import DynamicTimesWidgetView
 from pyplanet.views.generics.list import ManualListView
 from pyplanet.utils import times
 
 
-class LocalRecordsWidget(TimesWidgetView):
+class LocalRecordsWidget(DynamicTimesWidgetView):
 	widget_x = 125
 	widget_y = 56.5
 	z_index = 30
@@ -24,80 +24,105 @@ class LocalRecordsWidget(TimesWidgetView):
 		self.action = self.action_recordlist
 		self.record_amount = 15
 
+		self._records_key = None
+		self._records_rows = list()
+		self._records_ranks = dict()
+
+	def get_records_index(self, record_limit):
+		"""
+		Get the display rows of the current records and the rank per player id. Both are only rebuild when the records of
+		the app have changed, so the per player windows don't have to search the records or fetch the players.
+
+		:param record_limit: Record limit setting value (0 for no limit).
+		:return: Tuple with the list of (nickname, formatted score) rows and the dictionary with rank per player id.
+		"""
+		key = (self.app.records_version, record_limit)
+		if key != self._records_key:
+			if record_limit > 0:
+				current_records = self.app.current_records[:record_limit]
+			else:
+				current_records = self.app.current_records
+
+			self._records_rows = [
+				(record.player.nickname, times.format_time(int(record.score))) for record in current_records
+			]
+			self._records_ranks = {record.player_id: rank for rank, record in enumerate(current_records, start=1)}
+			self._records_key = key
+		return self._records_rows, self._records_ranks
+
+	def get_window(self, player_index, total):
+		"""
+		Get the start of the records shown below the top entries for a player.
+
+		:param player_index: Rank of the player record, total + 1 if the player has no record.
+		:param total: Number of (limited) records.
+		:return: Start index (zero based) of the records below the top entries.
+		"""
+		records_to_fill = (self.record_amount - self.top_entries)
+
+		if player_index > total:
+			# No personal record, get the last records
+			start_point = (total - records_to_fill)
+		elif player_index <= self.top_entries:
+			# Player record is in top X, get following records (top entries + 1 onwards)
+			start_point = self.top_entries
+		else:
+			# Player record is not in top X, get records around player record
+			# Same amount above the record as below, except when not possible (favors above)
+			start_point = ((player_index - math.ceil((records_to_fill - 1) / 2)) - 1)
+			end_point = ((player_index + math.floor((records_to_fill - 1) / 2)) - 1)
+
+			# If end of current slice is outside the list, add more records above
+			if end_point > total:
+				start_point = (start_point - (end_point - total))
+
+		# If start of current slice is in the top entries, add more records below
+		return max(start_point, self.top_entries)
+
+	def get_window_times(self, rows, player_index):
+		"""
+		Get the times to display for a player, the top entries followed by the window around the player record.
+
+		:param rows: Display rows, see :meth:`get_records_index`.
+		:param player_index: Rank of the player record, number of rows + 1 if the player has no record.
+		:return: List of times.
+		"""
+		start_point = self.get_window(player_index, len(rows))
+		end_point = start_point + self.record_amount - self.top_entries
+		window = list(enumerate(rows[:self.top_entries], start=1))
+		window += list(enumerate(rows[start_point:end_point], start=start_point + 1))
+
+		list_records = list()
+		for index, (nickname, score) in window:
+			list_record = dict()
+			list_record['index'] = index
+			list_record['color'] = '$fff'
+			if index <= self.top_entries:
+				list_record['color'] = '$ff0'
+			if index == player_index:
+				list_record['color'] = '$0f3'
+			list_record['nickname'] = nickname
+			list_record['score'] = score
+			list_records.append(list_record)
+		return list_records
+
 	async def get_player_data(self):
 		data = await super().get_player_data()
 		if self.app.instance.performance_mode:
 			return data
 
 		record_limit = await self.app.setting_record_limit.get_value()
-		if record_limit > 0:
-			current_records = self.app.current_records[:record_limit]
-		else:
-			current_records = self.app.current_records
+		rows, ranks = self.get_records_index(record_limit)
+
+		# Players with the same rank (mostly the players without a record) share the same window.
+		windows = dict()
 		widget_times = dict()
 
 		for player in self.app.instance.player_manager.online:
-			list_records = list()
-
-			player_record = [x for x in current_records if x.player_id == player.get_id()]
-			player_index = (len(current_records) + 1)
-			if len(player_record) > 0:
-				# Set player index if there is a record
-				player_index = (current_records.index(player_record[0]) + 1)
-
-			records = list(current_records[:self.top_entries])
-			custom_start_index = None
-			if player_index > len(current_records):
-				# No personal record, get the last records
-				records_start = (len(current_records) - self.record_amount + self.top_entries)
-				# If start of current slice is in the top entries, add more records below
-				if records_start < self.top_entries:
-					records_start = self.top_entries
-
-				records += list(current_records[records_start:])
-				custom_start_index = (records_start + 1)
-			else:
-				if player_index <= self.top_entries:
-					# Player record is in top X, get following records (top entries + 1 onwards)
-					records += current_records[self.top_entries:self.record_amount]
-					custom_start_index = (self.top_entries + 1)
-				else:
-					# Player record is not in top X, get records around player record
-					# Same amount above the record as below, except when not possible (favors above)
-					records_to_fill = (self.record_amount - self.top_entries)
-					start_point = ((player_index - math.ceil((records_to_fill - 1) / 2)) - 1)
-					end_point = ((player_index + math.floor((records_to_fill - 1) / 2)) - 1)
-
-					# If end of current slice is outside the list, add more records above
-					if end_point > len(current_records):
-						end_difference = (end_point - len(current_records))
-						start_point = (start_point - end_difference)
-					# If start of current slice is in the top entries, add more records below
-					if start_point < self.top_entries:
-						start_point = self.top_entries
-
-					records += current_records[start_point:(start_point + records_to_fill)]
-					custom_start_index = (start_point + 1)
-
-			index = 1
-			for record in records:
-				record_player = await record.get_related('player')
-				list_record = dict()
-				list_record['index'] = index
-				list_record['color'] = '$fff'
-				if index <= self.top_entries:
-					list_record['color'] = '$ff0'
-				if index == player_index:
-					list_record['color'] = '$0f3'
-				list_record['nickname'] = record_player.nickname
-				list_record['score'] = times.format_time(int(record.score))
-				if index == self.top_entries:
-					index = custom_start_index
-				else:
-					index += 1
-				list_records.append(list_record)
-
-			widget_times[player.login] = {'times': list_records}
+			player_index = ranks.get(player.get_id(), len(rows) + 1)
+			if player_index not in windows:
+				windows[player_index] = {'times': self.get_window_times(rows, player_index)}
+			widget_times[player.login] = windows[player_index]
 
 		data.update(widget_times)
 
@@ -111,27 +136,19 @@ class LocalRecordsWidget(TimesWidgetView):
 			'top_entries': self.top_entries
 		})
 
-		record_limit = await self.app.setting_record_limit.get_value()
-		if record_limit > 0:
-			current_records = self.app.current_records[:record_limit]
-		else:
-			current_records = self.app.current_records
-
 		if self.app.instance.performance_mode:
-			list_records = list()
-			records = list(current_records[:self.record_amount])
+			record_limit = await self.app.setting_record_limit.get_value()
+			rows, _ = self.get_records_index(record_limit)
 
-			index = 1
-			for record in records:
-				record_player = await record.get_related('player')
+			list_records = list()
+			for index, (nickname, score) in enumerate(rows[:self.record_amount], start=1):
 				list_record = dict()
 				list_record['index'] = index
 				list_record['color'] = '$fff'
 				if index <= self.top_entries:
 					list_record['color'] = '$ff0'
-				list_record['nickname'] = record_player.nickname
-				list_record['score'] = times.format_time(int(record.score))
-				index += 1
+				list_record['nickname'] = nickname
+				list_record['score'] = score
 				list_records.append(list_record)
 
 			context.update({
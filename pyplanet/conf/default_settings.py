@@ -132,6 +132,24 @@ LOGGING_REPORTING = 3
 # Enable usage analytics. On by default. (Will be turned off when DEBUG is true!).
 ANALYTICS = True
 
+# Record the timings, calls and exceptions of every signal receiver (both raw callbacks and app signals). Off by default
+# as it adds a small overhead to every receiver call. Can be toggled at runtime with the //signalstats admin command.
+SIGNAL_STATS = False
+
+# Log a warning when a signal receiver takes longer than the threshold (in seconds). Only used when the stats are enabled.
+SIGNAL_SLOW_THRESHOLD = 0.5
+
+# Record the render time, send bytes and number of sends per manialink. Off by default. Can be toggled, shown and dumped
+# at runtime with the //uistats admin command.
+UI_STATS = False
+
+# Cache the compiled templates (bytecode) in the 'templates' folder of the TMP_PATH. Skips compiling all the templates
+# again after restarting PyPlanet.
+TEMPLATE_BYTECODE_CACHE = True
+
+# Minify the templates (remove the comments, indentation and whitespace of the XML and ManiaScript) before compiling.
+TEMPLATE_MINIFY = True
+
 
 ##########################################
 ################# APPS ###################
@@ -130,7 +130,25 @@ class MapManager(CoreContrib):
 			self._is_extended = False
 			self._original_ta = None
 
-	async def update_list(self, full_update=False, detach_fks=True):
+	async def resync(self):
+		"""
+		Resync the map list and the current and next map after a reconnect with the dedicated server.
+		"""
+		await self.update_list(remove_missing=True)
+
+		current_info, next_info = await asyncio.gather(
+			self._instance.gbx('GetCurrentMapInfo'),
+			self._instance.gbx('GetNextMapInfo'),
+		)
+		if not self._current_map or self._current_map.uid != current_info['UId']:
+			await self.handle_map_change(current_info)
+		if not self._next_map or self._next_map.uid != next_info['UId']:
+			try:
+				self._next_map = await self.get_map(next_info['UId'])
+			except MapNotFound:
+				pass
+
+	async def update_list(self, full_update=False, detach_fks=True, remove_missing=False):
 		raw_list = await self._instance.gbx('GetMapList', -1, 0)
 		updated = list()
 
@@ -205,6 +223,11 @@ class MapManager(CoreContrib):
 						)
 						self._maps.add(map_instance)
 						updated.append(map_instance)
+
+				# Remove the maps that aren't in the list anymore.
+				if remove_missing:
+					uids = set(details['UId'] for details in raw_list)
+					self._maps = set(m for m in self._maps if m.uid in uids)
 		return updated
 
 	async def get_map(self, uid=None):
@@ -92,6 +92,27 @@ class PlayerManager(CoreContrib):
 
 		self._instance.signals.listen('maniaplanet:loading_map_end', self.map_loaded)
 
+	async def resync(self):
+		"""
+		Resync the online players after a reconnect with the dedicated server. Players that joined or left while the
+		connection was lost are handled as if the dedicated sent the connect or disconnect callback, so the apps will be
+		informed as well.
+		"""
+		player_list = await self._instance.gbx('GetPlayerList', -1, 0)
+		players = {player['Login']: player for player in player_list}
+
+		disconnect = self._instance.signals.get_callback('ManiaPlanet.PlayerDisconnect')
+		for login in self._online_logins - set(players.keys()):
+			await disconnect.send_robust([login, 'Connection lost'])
+
+		connect = self._instance.signals.get_callback('ManiaPlanet.PlayerConnect')
+		for login, player in players.items():
+			if login not in self._online_logins:
+				await connect.send_robust([login, bool(player['SpectatorStatus'] % 10)])
+
+		# Recount the players and spectators.
+		await self.map_loaded()
+
 	async def map_loaded(self, *args, **kwargs):
 		"""
 		Reindex the current number of players and spectators.
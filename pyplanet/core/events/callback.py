@@ -5,6 +5,23 @@ from pyplanet.apps.core.maniaplanet.models import Player
 from pyplanet.core.events import Signal, SignalManager
 
 
+class CallbackSource(Signal):
+	"""
+	The raw signal of a callback. It only has listeners when the callback (destination) signal has listeners, or when
+	another receiver than the glue is registered directly to the raw signal.
+	"""
+	def __init__(self, callback, **kwargs):
+		super().__init__(**kwargs)
+		self.callback = callback
+
+	def has_listeners(self):
+		glue = self.callback.glue
+		for _, receiver in self._live_receivers():
+			if receiver != glue:
+				return True
+		return self.callback.has_listeners()
+
+
 class Callback(Signal):
 	"""
 	A callback signal is an double signal. Once for the GBX Callback itself (the Gbx callback named). And the destination
@@ -28,7 +45,7 @@ class Callback(Signal):
 		super().__init__(code=code, namespace=namespace, process_target=target)
 
 		# Initiate raw signal, the raw gbx/script callback.
-		self.raw_signal = Signal(code=call, namespace='raw')
+		self.raw_signal = CallbackSource(self, code=call, namespace='raw')
 		self.raw_signal.register(self.glue, weak=False)
 
 		SignalManager.register_signal(self.raw_signal, app=None, callback=True)
@@ -7,6 +7,7 @@ import weakref
 import logging
 import asyncio
 
+from pyplanet.core.events.stats import SignalStats
 from pyplanet.core.exceptions import SignalException, SignalGlueStop
 from pyplanet.utils.log import handle_exception
 
@@ -18,11 +19,161 @@ def _make_id(target):
 
 
 NONE_ID = _make_id(None)
-NO_RECEIVERS = object()
+
+
+def _get_login(kwargs):
+	player = kwargs.get('player', None)
+	if player is not None and not isinstance(player, str):
+		return getattr(player, 'login', None)
+	return kwargs.get('login', player)
+
+
+def _get_map_uid(kwargs):
+	map = kwargs.get('map', None)
+	if map is not None and not isinstance(map, str):
+		return getattr(map, 'uid', None)
+	return kwargs.get('map_uid', map)
+
+
+def _get_action(kwargs):
+	return kwargs.get('action', None)
+
+
+#: Key extractors of the declarative conditions, extracting the key from the keyword arguments send to the receivers.
+CONDITION_KEYS = dict(
+	login=_get_login,
+	map_uid=_get_map_uid,
+	action=_get_action,
+)
+
+
+def _parse_conditions(conditions):
+	"""
+	Parse the conditions given to :meth:`Signal.register` into a tuple of key checks (key extractor, set of values) and a
+	predicate (or None). The first key check is used to index the receiver.
+	"""
+	if not conditions:
+		return None
+	if callable(conditions):
+		return (), conditions
+	if not isinstance(conditions, dict):
+		raise SignalException('Signal conditions should be a dictionary or callable, got {}!'.format(type(conditions)))
+
+	conditions = dict(conditions)
+	checks = list()
+	predicate = conditions.pop('predicate', None)
+	prefix = conditions.pop('action_prefix', None)
+
+	if 'key' in conditions:
+		extractor = conditions.pop('key')
+		if not callable(extractor):
+			raise SignalException('Signal condition key should be a callable that extracts the key from the kwargs!')
+		if 'values' not in conditions:
+			raise SignalException('Signal condition key requires the set of values to match!')
+		checks.append((extractor, conditions.pop('values')))
+
+	for name, value in conditions.items():
+		if name not in CONDITION_KEYS:
+			raise SignalException('Signal condition \'{}\' is unknown!'.format(name))
+		checks.append((CONDITION_KEYS[name], value))
+
+	checks = tuple(
+		(extractor, frozenset(values) if isinstance(values, (list, tuple, set, frozenset)) else frozenset([values]))
+		for extractor, values in checks
+	)
+
+	if prefix is not None:
+		prefixes = tuple(prefix) if isinstance(prefix, (list, tuple, set, frozenset)) else (prefix,)
+		action_predicate = lambda kw: isinstance(kw.get('action', None), str) and kw['action'].startswith(prefixes)
+		if predicate:
+			user_predicate = predicate
+			predicate = lambda kw: action_predicate(kw) and user_predicate(kw)
+		else:
+			predicate = action_predicate
+
+	if not checks and not predicate:
+		return None
+	return checks, predicate
+
+
+def _matches(checks, predicate, kwargs):
+	try:
+		for extractor, values in checks:
+			if extractor(kwargs) not in values:
+				return False
+		return not predicate or predicate(kwargs)
+	except Exception as e:
+		logger.debug('Signal condition failed to evaluate, skipping receiver: {}'.format(e))
+		return False
 
 logger = logging.getLogger(__name__)
 
 
+class _Coalescer:
+	"""
+	Collects the events of a coalesced receiver, and delivers the collected events once the window has passed. The events
+	are merged per key (latest event wins), or reduced with the given reducer.
+	"""
+
+	def __init__(self, signal, lookup_key, receiver, window, key=None, reducer=None):
+		self.signal = signal
+		self.lookup_key = lookup_key
+		self.receiver = receiver
+		self.window = window
+		self.key = key
+		self.reducer = reducer
+
+		self.pending = dict()
+		self.handle = None
+
+	def push(self, **kwargs):
+		try:
+			key = self.key(kwargs) if self.key else None
+		except Exception as e:
+			logger.debug('Signal coalesce key failed to evaluate, using the default key: {}'.format(e))
+			key = None
+
+		if self.reducer:
+			kwargs = self.reducer(self.pending.get(key, None), kwargs)
+		self.pending[key] = kwargs
+
+		if self.handle is None:
+			self.handle = asyncio.get_event_loop().call_later(self.window, self.flush)
+
+	def flush(self):
+		self.handle = None
+		pending, self.pending = self.pending, dict()
+		if pending:
+			asyncio.ensure_future(self.deliver(list(pending.values())))
+
+	def close(self):
+		if self.handle:
+			self.handle.cancel()
+			self.handle = None
+		self.pending = dict()
+
+	async def deliver(self, events):
+		receiver = self.receiver
+		if isinstance(receiver, weakref.ReferenceType):
+			receiver = receiver()
+			if receiver is None:
+				return
+
+		args = []
+		slf = self.signal.self_refs.get(self.lookup_key, None)
+		if isinstance(slf, weakref.ReferenceType):
+			slf = slf()
+		if slf:
+			args = [slf]
+
+		is_coroutine = asyncio.iscoroutinefunction(receiver)
+		for kwargs in events:
+			coro = self.signal.execute_receiver(receiver, args, kwargs, ignore_exceptions=True, is_coroutine=is_coroutine)
+			if SignalStats.enabled:
+				coro = SignalStats.measure(self.signal, receiver, coro)
+			await coro
+
+
 class Signal:
 	"""
 	A signal is a destination tho distribute to where multiple listeners get the message. (event distribution).
@@ -38,6 +189,8 @@ class Signal:
 
 		self.receivers = list()
 		self.self_refs = dict()
+		self.conditions = dict()
+		self.coalescers = dict()
 		self.lock = threading.Lock()
 
 		if code:
@@ -50,8 +203,12 @@ class Signal:
 		else:
 			self.namespace = self.Meta.namespace
 
+		# Immutable snapshot of the receivers, only rebuild when the receivers are changed. The use_caching argument is
+		# kept for backwards compatibility, the snapshot is always used.
 		self.use_caching = use_caching
-		self.sender_receivers_cache = weakref.WeakKeyDictionary() if use_caching else {}
+		self.version = 0
+		self._snapshot = None
+		self._routing = None
 		self._dead_receivers = False
 
 	class Meta:
@@ -83,7 +240,10 @@ class Signal:
 
 		:return:
 		"""
-		return bool(self._live_receivers())
+		for _, receiver, weak, _, _ in self._get_snapshot():
+			if not weak or receiver() is not None:
+				return True
+		return False
 
 	def set_self(self, receiver, slf):  # pragma: no cover
 		"""
@@ -101,10 +261,11 @@ class Signal:
 					ref = weakref.ref
 					slf = ref(slf)
 					self.self_refs[lookup_key] = slf
+					self._invalidate()
 					return
 			raise Exception('Receiver is not yet known! You registered too early!')
 
-	def register(self, receiver, weak=True, dispatch_uid=None):
+	def register(self, receiver, weak=True, dispatch_uid=None, conditions=None, coalesce=None, key=None, reducer=None):
 		"""
 		Connect receiver to sender for signal.
 
@@ -120,11 +281,35 @@ class Signal:
 
 		:param dispatch_uid: An identifier used to uniquely identify a particular instance of
 			a receiver. This will usually be a string, though it may be anything hashable.
+
+		:param conditions: Optional declarative filters, the receiver is only called when all conditions match the data
+			that is send to the receivers. Give a dictionary with any of the following keys:
+
+			* ``login``: Login or list of logins (matches the ``player`` or ``login`` argument).
+			* ``map_uid``: Map UID or list of UIDs (matches the ``map`` or ``map_uid`` argument).
+			* ``action``: Exact action or list of actions (matches the ``action`` argument).
+			* ``action_prefix``: Prefix or list of prefixes of the ``action`` argument.
+			* ``key`` and ``values``: Callable that extracts the key from the keyword arguments and the values to match.
+			* ``predicate``: Callable that gets the keyword arguments and returns a boolean.
+
+			The receivers are indexed by the first key, non-matching receivers are not called at all.
+
+		:param coalesce: Optional window in seconds. The events that arrive within the window are merged and delivered
+			once the window has passed, instead of calling the receiver for every event. The receiver is called once per
+			key with the (keyword arguments of the) latest event of that key. Exceptions of coalesced receivers are logged.
+		:param key: Callable that gets the keyword arguments and returns the key to merge the events with. When not given,
+			all events in the window are merged into the latest event. Only used when coalescing.
+		:param reducer: Callable that gets the previous (reduced) keyword arguments of the key, or None for the first event
+			in the window, and the new keyword arguments, and returns the reduced keyword arguments. Only used when
+			coalescing.
 		"""
 		if dispatch_uid:
 			lookup_key = dispatch_uid
 		else:
 			lookup_key = _make_id(receiver)
+		parsed_conditions = _parse_conditions(conditions)
+		if (key or reducer) and not coalesce:
+			raise SignalException('Signal receiver key and reducer can only be used in combination with coalesce!')
 
 		if weak:
 			ref = weakref.ref
@@ -144,7 +329,15 @@ class Signal:
 					break
 			else:
 				self.receivers.append((lookup_key, receiver))
-			self.sender_receivers_cache.clear()
+				self.conditions.pop(lookup_key, None)
+				if parsed_conditions:
+					self.conditions[lookup_key] = parsed_conditions
+				# Registering the receiver again replaces the coalescer, drop the pending events of the previous one.
+				if lookup_key in self.coalescers:
+					self.coalescers.pop(lookup_key).close()
+				if coalesce:
+					self.coalescers[lookup_key] = _Coalescer(self, lookup_key, receiver, coalesce, key=key, reducer=reducer)
+			self._invalidate()
 
 	def unregister(self, receiver=None, dispatch_uid=None):
 		"""
@@ -170,15 +363,20 @@ class Signal:
 					del self.receivers[index]
 					if rec_key in self.self_refs:
 						del self.self_refs[rec_key]
+					self.conditions.pop(rec_key, None)
+					if rec_key in self.coalescers:
+						self.coalescers.pop(rec_key).close()
 					break
-			self.sender_receivers_cache.clear()
+			self._invalidate()
 
 		return disconnected
 
 	@staticmethod
-	async def execute_receiver(receiver, args, kwargs, ignore_exceptions=False):
+	async def execute_receiver(receiver, args, kwargs, ignore_exceptions=False, is_coroutine=None):
 		try:
-			if asyncio.iscoroutinefunction(receiver):
+			if is_coroutine is None:
+				is_coroutine = asyncio.iscoroutinefunction(receiver)
+			if is_coroutine:
 				if len(args) > 0:
 					return receiver, await receiver(*args, **kwargs)
 				return receiver, await receiver(**kwargs)
@@ -224,21 +422,36 @@ class Signal:
 		else:
 			kwargs = dict(**source, signal=self)
 
-		if not self.receivers:
+		snapshot = self._snapshot
+		if snapshot is None:
+			snapshot = self._get_snapshot()
+		if not snapshot:
 			return []
+		if self._routing:
+			snapshot = self._route(kwargs)
 
 		# Prepare the responses from the calls.
 		responses = []
 		gather_list = []
-		for key, receiver in self._live_receivers():
-			# Dereference the weak reference.
-			slf = self.self_refs.get(key, None)
-			if slf and isinstance(slf, weakref.ReferenceType):
-				slf = slf()
-			args = [slf] if slf else []
+		for _, receiver, weak, slf, is_coroutine in snapshot:
+			# Dereference the weak references.
+			if weak:
+				receiver = receiver()
+				if receiver is None:
+					continue
+			args = []
+			if slf is not None:
+				if isinstance(slf, weakref.ReferenceType):
+					slf = slf()
+				if slf:
+					args = [slf]
 
 			# Execute the receiver.
-			coro = self.execute_receiver(receiver, args, kwargs, ignore_exceptions=catch_exceptions)
+			coro = self.execute_receiver(
+				receiver, args, kwargs, ignore_exceptions=catch_exceptions, is_coroutine=is_coroutine
+			)
+			if SignalStats.enabled:
+				coro = SignalStats.measure(self, receiver, coro)
 			if gather:
 				gather_list.append(coro)
 			else:
@@ -246,6 +459,9 @@ class Signal:
 
 		# If gather, wait on the asyncio.gather operation and return the responses from there.
 		if gather:
+			# No need to schedule a task for a single receiver.
+			if len(gather_list) == 1:
+				return [await gather_list[0]]
 			return await asyncio.gather(*gather_list)
 
 		# Done, respond with all the results
@@ -275,51 +491,121 @@ class Signal:
 				new_receivers.append(rec)
 			self.receivers = new_receivers
 
+			# Clean up the options of the removed receivers, the keys could be reused by new receivers.
+			removed = (set(self.conditions) | set(self.coalescers)) - set(key for key, _ in new_receivers)
+			for key in removed:
+				self.conditions.pop(key, None)
+				if key in self.coalescers:
+					self.coalescers.pop(key).close()
+
+	def _invalidate(self):
+		self._snapshot = None
+		self._routing = None
+		self.version += 1
+
+	def _get_snapshot(self):
+		"""
+		Get the immutable snapshot of the receivers. The snapshot is a tuple with for every receiver a tuple of the key,
+		the receiver (or the weak reference to it), a boolean if it's a weak reference, the (weak reference to the) self
+		instance or None and a boolean if the receiver is a coroutine function.
+
+		The snapshot is only rebuild after registering, unregistering or when a weak referenced receiver is finalized.
+		Receivers with conditions are indexed in the routing table that is build together with the snapshot.
+		"""
+		snapshot = self._snapshot
+		if snapshot is not None:
+			return snapshot
+
+		with self.lock:
+			self._clear_dead_receivers()
+			entries = []
+			unfiltered = []
+			indexes = dict()
+			predicated = []
+			for key, receiver in self.receivers:
+				weak = isinstance(receiver, weakref.ReferenceType)
+				target = receiver() if weak else receiver
+				if target is None:
+					continue
+
+				if key in self.coalescers:
+					# Coalesced receivers are called by the coalescer after the window, collect the events only.
+					entry = (key, self.coalescers[key].push, False, None, False)
+				else:
+					entry = (key, receiver, weak, self.self_refs.get(key, None), asyncio.iscoroutinefunction(target))
+				position = len(entries)
+				entries.append(entry)
+
+				conditions = self.conditions.get(key, None)
+				if not conditions:
+					unfiltered.append((position, entry))
+					continue
+
+				checks, predicate = conditions
+				if not checks:
+					predicated.append((position, entry, checks, predicate))
+					continue
+
+				# Index the receiver by the values of the first key, the other checks are done when the key matches.
+				(extractor, values), checks = checks[0], checks[1:]
+				table = indexes.setdefault(extractor, dict())
+				for value in values:
+					table.setdefault(value, list()).append((position, entry, checks, predicate))
+
+			if len(unfiltered) != len(entries):
+				self._routing = (
+					tuple(unfiltered), tuple(e for _, e in unfiltered), tuple(indexes.items()), tuple(predicated)
+				)
+			snapshot = self._snapshot = tuple(entries)
+		return snapshot
+
+	def _route(self, kwargs):
+		"""
+		Get the receivers of the snapshot that should receive the given keyword arguments. Receivers without conditions
+		are always included, the receivers with conditions are looked up in the routing index by their key.
+
+		:param kwargs: The keyword arguments that will be send to the receivers.
+		:return: Tuple of snapshot entries, in the order of registration.
+		"""
+		unfiltered, unfiltered_entries, indexes, predicated = self._routing
+
+		matched = []
+		for extractor, table in indexes:
+			try:
+				candidates = table.get(extractor(kwargs), None)
+			except Exception:
+				# Unhashable or missing keys won't match any of the receivers.
+				continue
+			if candidates:
+				matched.extend(
+					(position, entry) for position, entry, checks, predicate in candidates
+					if (not checks and not predicate) or _matches(checks, predicate, kwargs)
+				)
+		for position, entry, checks, predicate in predicated:
+			if _matches(checks, predicate, kwargs):
+				matched.append((position, entry))
+
+		if not matched:
+			return unfiltered_entries
+		return tuple(entry for _, entry in sorted(unfiltered + tuple(matched), key=lambda item: item[0]))
+
 	def _live_receivers(self):
 		"""
 		Filter sequence of receivers to get resolved, live receivers.
 		This checks for weak references and resolves them, then returning only
 		live receivers.
 		"""
-		# We don't use the sender. Set it to none.
-		sender = None
-
-		receivers = None
-		if self.use_caching and not self._dead_receivers:
-			receivers = self.sender_receivers_cache.get(sender)
-			# We could end up here with NO_RECEIVERS even if we do check this case in
-			# .send() prior to calling _live_receivers() due to concurrent .send() call.
-			if receivers is NO_RECEIVERS:
-				return []
-
-		if receivers is None:
-			with self.lock:
-				self._clear_dead_receivers()
-				receivers = []
-				for receiverkey, receiver in self.receivers:
-					receivers.append((receiverkey, receiver))
-				if self.use_caching:
-					if not receivers:
-						self.sender_receivers_cache[sender] = NO_RECEIVERS
-					else:
-						# Note, we must cache the weakref versions.
-						self.sender_receivers_cache[sender] = receivers
-		non_weak_receivers = []
-
-		for receiver in receivers:
-			key = receiver[0]
-			receiver = receiver[1]
-
-			if isinstance(receiver, weakref.ReferenceType):
-				# Dereference the weak reference.
+		receivers = []
+		for key, receiver, weak, _, _ in self._get_snapshot():
+			if weak:
 				receiver = receiver()
-				if receiver is not None:
-					non_weak_receivers.append((key, receiver))
-			else:
-				non_weak_receivers.append((key, receiver))
-		return non_weak_receivers
+				if receiver is None:
+					continue
+			receivers.append((key, receiver))
+		return receivers
 
 	def _remove_receiver(self):
 		# The list must be marked as dead. And will be cleaned in the next registry or call.
 		# We can't directly remove because GC is always running when lock is preserved.
 		self._dead_receivers = True
+		self._invalidate()
@@ -11,6 +11,7 @@ import logging
 import sys
 
 from pyplanet.core.events import Signal
+from pyplanet.core.exceptions import SignalException
 
 
 class _SignalManager:
@@ -78,12 +79,20 @@ class _SignalManager:
 
 		:param signal: Signal instance or string: "namespace:code"
 		:param target: Target method to call.
-		:param conditions: Reserved for future purposes.
+		:param conditions: Optional declarative filters, only call the target when the conditions match.
+			Example: ``dict(login='player')``, ``dict(map_uid=[...])`` or ``dict(key=lambda kw: ..., values={...})``.
+			See :meth:`pyplanet.core.events.dispatcher.Signal.register` for all options.
+		:param kwargs: Optional receiver options, such as ``coalesce=<seconds>`` with ``key=`` or ``reducer=`` to deliver
+			high-frequency events merged per window. See :meth:`pyplanet.core.events.dispatcher.Signal.register`.
 		"""
+		if conditions:
+			kwargs['conditions'] = conditions
 		try:
 			if not isinstance(signal, Signal):
 				signal = self.get_signal(signal)
 			signal.register(target, **kwargs)
+		except SignalException:
+			raise
 		except:
 			if signal not in self.reserved:
 				self.reserved[signal] = list()
@@ -123,7 +132,7 @@ class _SignalManager:
 			for func, kwargs in recs:
 				try:
 					signal = self.get_signal(sig_name)
-					signal.connect(func, **kwargs)
+					signal.register(func, **kwargs)
 				except Exception as e:
 					logging.warning('Signal not found: {}, {}'.format(
 						sig_name, e
@@ -213,7 +222,11 @@ class AppSignalManager:
 
 		:param signal: Signal instance or string: "namespace:code"
 		:param target: Target method to call.
-		:param conditions: Reserved for future purposes.
+		:param conditions: Optional declarative filters, only call the target when the conditions match.
+			Example: ``dict(login='player')``, ``dict(map_uid=[...])`` or ``dict(key=lambda kw: ..., values={...})``.
+			See :meth:`pyplanet.core.events.dispatcher.Signal.register` for all options.
+		:param kwargs: Optional receiver options, such as ``coalesce=<seconds>`` with ``key=`` or ``reducer=`` to deliver
+			high-frequency events merged per window. See :meth:`pyplanet.core.events.dispatcher.Signal.register`.
 		"""
 		self.manager.listen(signal, target, conditions, **kwargs)
 		self.listeners.append((signal, target))
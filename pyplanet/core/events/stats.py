@@ -0,0 +1,150 @@
+"""
+Optional instrumentation of the signal receivers. When enabled, the duration, number of calls and exceptions are recorded
+for every (signal, receiver) pair, this covers both the raw GBX callbacks and the app-level signals.
+
+The instrumentation is disabled by default. Enable it with the ``SIGNAL_STATS`` setting or at runtime with the
+``//signalstats on`` admin command.
+"""
+import bisect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiverStats:
+	"""
+	Statistics of a single receiver of a signal.
+	"""
+
+	#: Upper bounds (in seconds) of the histogram buckets, the last bucket contains all slower calls.
+	BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+
+	def __init__(self, signal, receiver):
+		self.signal = signal
+		self.receiver = receiver
+
+		self.count = 0
+		self.total = 0
+		self.max = 0
+		self.exceptions = 0
+		self.slow = 0
+		self.histogram = [0] * (len(self.BUCKETS) + 1)
+
+	@property
+	def average(self):
+		return self.total / self.count if self.count else 0
+
+	def add(self, duration, exception=False, slow=False):
+		self.count += 1
+		self.total += duration
+		if duration > self.max:
+			self.max = duration
+		if exception:
+			self.exceptions += 1
+		if slow:
+			self.slow += 1
+		self.histogram[bisect.bisect_left(self.BUCKETS, duration)] += 1
+
+
+class _SignalStats:
+	"""
+	Signal receiver statistics.
+
+	.. note::
+
+		Access this via ``pyplanet.core.events.stats.SignalStats``.
+
+	"""
+
+	def __init__(self):
+		self.enabled = False
+		self.slow_threshold = None
+		self.started_at = None
+		self.receivers = dict()
+
+	def configure(self, enabled=False, slow_threshold=None):
+		"""
+		Configure the statistics.
+
+		:param enabled: Enable the instrumentation.
+		:param slow_threshold: Log a warning when a receiver takes longer than the threshold (in seconds), None to disable.
+		"""
+		self.slow_threshold = slow_threshold
+		if enabled:
+			self.enable()
+		else:
+			self.disable()
+
+	def enable(self):
+		if not self.enabled:
+			self.started_at = time.time()
+		self.enabled = True
+
+	def disable(self):
+		self.enabled = False
+
+	def reset(self):
+		self.receivers = dict()
+		self.started_at = time.time() if self.enabled else None
+
+	async def measure(self, signal, receiver, coro):
+		"""
+		Await the execution of the receiver and record the duration.
+
+		:param signal: Signal instance.
+		:param receiver: Receiver function.
+		:param coro: Coroutine of the receiver execution (:meth:`pyplanet.core.events.dispatcher.Signal.execute_receiver`).
+		:return: Result of the coroutine.
+		"""
+		started_at = time.perf_counter()
+		try:
+			result = await coro
+		except Exception:
+			self.record(signal, receiver, time.perf_counter() - started_at, exception=True)
+			raise
+		self.record(
+			signal, receiver, time.perf_counter() - started_at,
+			exception=isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], Exception)
+		)
+		return result
+
+	def record(self, signal, receiver, duration, exception=False):
+		"""
+		Record a single execution of a receiver.
+
+		:param signal: Signal instance.
+		:param receiver: Receiver function.
+		:param duration: Duration in seconds.
+		:param exception: Did the receiver raise an exception.
+		"""
+		signal_name = '{}:{}'.format(signal.namespace, signal.code)
+		receiver_name = '{}.{}'.format(
+			getattr(receiver, '__module__', None), getattr(receiver, '__qualname__', repr(receiver))
+		)
+
+		key = (signal_name, receiver_name)
+		stats = self.receivers.get(key, None)
+		if stats is None:
+			stats = self.receivers[key] = ReceiverStats(signal_name, receiver_name)
+
+		slow = self.slow_threshold is not None and duration > self.slow_threshold
+		stats.add(duration, exception=exception, slow=slow)
+		if slow:
+			logger.warning('Slow signal receiver {} for {} took {:.1f}ms!'.format(
+				receiver_name, signal_name, duration * 1000
+			))
+
+	def get_top(self, count=10, order_by='total'):
+		"""
+		Get the top receivers.
+
+		:param count: Number of receivers.
+		:param order_by: Attribute to order by: 'total', 'average', 'max', 'count' or 'exceptions'.
+		:return: List of receiver statistics.
+		:rtype: list of pyplanet.core.events.stats.ReceiverStats
+		"""
+		return sorted(self.receivers.values(), key=lambda stats: getattr(stats, order_by), reverse=True)[:count]
+
+
+SignalStats = _SignalStats()
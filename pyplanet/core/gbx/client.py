@@ -2,8 +2,13 @@ import asyncio
 import logging
 import re
 
+from xmlrpc.client import Fault
+
+from pyplanet.core.exceptions import TransportException
 from pyplanet.core.gbx.query import Query, ScriptQuery
+from pyplanet.core.gbx.transport import GbxTransport
 from pyplanet.utils.functional import empty
+from pyplanet.utils.log import handle_exception
 from .remote import GbxRemote
 
 logger = logging.getLogger(__name__)
@@ -23,7 +28,17 @@ class GbxClient(GbxRemote):
 	MINIMUM_DEDICATED_VERSION = ['2018', '02', '09',
 								 '16', '00']
 
-	def __init__(self, *args, script_api_version=empty, **kwargs):
+	def __init__(self, *args, script_api_version=empty, coalesce=False, coalesce_window=0, **kwargs):
+		"""
+		Initiate the GbxClient.
+
+		:param script_api_version: Script API version to use, defaults to the latest supported version.
+		:param coalesce: Coalesce queries that are awaited close to each other into multicalls.
+		:param coalesce_window: Window in microseconds to collect the queries in. 0 to collect the queries awaited in the
+								same loop iteration.
+		:type coalesce: bool
+		:type coalesce_window: int
+		"""
 		super().__init__(*args, **kwargs)
 
 		self.script_api_version = self.SUPPORTED_SCRIPT_API_VERSIONS[len(self.SUPPORTED_SCRIPT_API_VERSIONS)-1]
@@ -33,6 +48,24 @@ class GbxClient(GbxRemote):
 		self.game = self.instance.game
 		self.refresh_task = None
 
+		# Size of the frame header and the multicall request around the calls.
+		self.multicall_overhead = 8 + len(self.codec.MULTICALL_HEAD) + len(self.codec.MULTICALL_TAIL)
+
+		self.coalesce = bool(coalesce)
+		self.coalesce_window = int(coalesce_window or 0)
+		self.coalesce_queue = list()
+		self.coalesce_handle = None
+		self.coalesce_stats = dict(queries=0, batches=0, round_trips=0)
+
+	@classmethod
+	def create_from_settings(cls, instance, conf, **kwargs):
+		return super().create_from_settings(
+			instance, conf,
+			coalesce=conf.get('COALESCE', False),
+			coalesce_window=conf.get('COALESCE_WINDOW', 0),
+			**kwargs
+		)
+
 	def __call__(self, *args, **kwargs):
 		if len(args) <= 0:
 			return
@@ -80,9 +113,77 @@ class GbxClient(GbxRemote):
 		# if len(queries) == 1 and isinstance(queries[0], collections.Iterable):
 		# 	queries = queries[0]
 
+		results = list()
+		async for chunk in self.multicall_iter(*queries):
+			results += chunk
+		return results
+
+	async def multicall_iter(self, *queries):
+		"""
+		Run the queries given async in one or more multicall(s) and yield the results of every multicall as soon as it's
+		received. All the multicalls are sent directly (pipelined), the results are yielded in the order of the queries.
+
+		.. code-block:: python
+
+			async for results in self.instance.gbx.multicall_iter(*queries):
+				...
+
+		:param queries: Queries to execute in multicall.
+		:return: Async generator with the list of results per multicall.
+		"""
+		tasks = [
+			self.event_loop.create_task(self.execute_multicall(stack)) for stack in self.split_multicalls(queries)
+		]
+		try:
+			for task in tasks:
+				yield self.unwrap_multicall(await task)
+		finally:
+			for task in tasks:
+				if not task.done():
+					task.cancel()
+
+	async def execute_multicall(self, stack, timeout=45.0):
+		"""
+		Execute the prepared queries in a single multicall, the prepared data of the queries is reused.
+
+		:param stack: List with prepared queries (see :meth:`split_multicalls`).
+		:param timeout: Timeout of the multicall.
+		:return: Raw multicall result.
+		"""
+		return await self.execute_raw(
+			self.codec.dumps_multicall([query.packet for query in stack]), timeout=timeout,
+			priority=GbxTransport.get_multicall_priority(query.method for query in stack),
+		)
+
+	@staticmethod
+	def unwrap_multicall(res):
+		"""
+		Unwrap the raw multicall result into the list of results.
+
+		:param res: Raw multicall result.
+		:return: List with results.
+		"""
+		results = list()
+		if isinstance(res, list) and len(res) > 0 and isinstance(res[0], list):
+			# When we have a list inside our list, we will unwrap that to our root results. This is mostly the case,
+			# except when we got error messages!
+			for row in res:
+				results += row
+		else:
+			results += res
+		return results
+
+	def split_multicalls(self, queries, prepare=True):
+		"""
+		Prepare the queries and split them into stacks that each fit into a single multicall request.
+
+		:param queries: Queries to split.
+		:param prepare: Prepare the queries, disable when the queries are prepared already.
+		:return: List with lists of queries (stacks).
+		"""
 		# We will try to put the maximum possible calls into one multicall, for this we need to calculate the lengths
 		# so we can stay under the maximum allowed package size.
-		current_length = 0
+		current_length = self.multicall_overhead
 
 		# Current stack holds the current multicall,
 		# will be rotated once the multicall reaches the maximum request size.
@@ -97,44 +198,137 @@ class GbxClient(GbxRemote):
 			if not isinstance(query, Query):
 				continue
 
-			query.prepare()
-			if current_length + (query.length + 8) < self.MAX_REQUEST_SIZE:
-				current_stack.append(query)
-				current_length += (query.length + 8)
-			else:
+			if prepare:
+				query.prepare()
+			if current_length + query.length > self.MAX_REQUEST_SIZE and len(current_stack) > 0:
 				multicalls.append(current_stack)
-				current_length = 0
+				current_length = self.multicall_overhead
 				current_stack = list()
 
+			current_stack.append(query)
+			current_length += query.length
+
 		# Append the last stack.
 		if len(current_stack) > 0:
 			multicalls.append(current_stack)
 
-		# Create multicall queries.
-		calls = list()
-		for mc in multicalls:
-			calls.append(
-				self.execute('system.multicall', [{'methodName': c.method, 'params': c.args} for c in mc])
-			)
+		return multicalls
 
-		multi_results = await asyncio.gather(*calls)
-		results = list()
-		for res in multi_results:
-			if isinstance(res, list) and len(res) > 0 and isinstance(res[0], list):
-				# When we have a list inside our list, we will unwrap that to our root results. This is mostly the case,
-				# except when we got error messages!
-				for row in res:
-					results += row
+	async def coalesce_query(self, query):
+		"""
+		Add query to the coalescing queue. The queue is flushed at the next loop iteration or after the coalesce window.
+
+		:param query: Query instance.
+		:type query: pyplanet.core.gbx.query.Query
+		:return: Result of the query.
+		"""
+		future = self.event_loop.create_future()
+		self.coalesce_queue.append((query, future))
+
+		if not self.coalesce_handle:
+			if self.coalesce_window > 0:
+				self.coalesce_handle = self.event_loop.call_later(self.coalesce_window / 1000000, self.flush_coalesced)
 			else:
-				results += res
+				self.coalesce_handle = self.event_loop.call_soon(self.flush_coalesced)
 
-		return results
+		return await future
+
+	def flush_coalesced(self):
+		"""
+		Flush the coalescing queue, send the collected queries into multicall(s).
+		"""
+		self.coalesce_handle = None
+		batch, self.coalesce_queue = self.coalesce_queue, list()
+		if batch:
+			self.event_loop.create_task(self.execute_coalesced(batch))
+
+	@property
+	def coalesce_ratio(self):
+		"""
+		Get the batching ratio achieved by coalescing (queries per round trip).
+
+		:return: Ratio as float.
+		"""
+		if not self.coalesce_stats['round_trips']:
+			return 0.0
+		return self.coalesce_stats['queries'] / self.coalesce_stats['round_trips']
 
-	async def connect(self):
-		await super().connect()
+	async def execute_coalesced(self, batch):
+		"""
+		Execute the batch of coalesced queries and resolve the futures of the callers.
+
+		:param batch: List with tuples of query and future.
+		"""
+		self.coalesce_stats['queries'] += len(batch)
+		self.coalesce_stats['batches'] += 1
+
+		# Single query doesn't need the multicall overhead.
+		if len(batch) == 1:
+			query, future = batch[0]
+			self.coalesce_stats['round_trips'] += 1
+			try:
+				result = await self.execute(query.method, *query.args, timeout=query.timeout)
+				if not future.done():
+					future.set_result(result)
+			except Exception as e:
+				if not future.done():
+					future.set_exception(e)
+			return
+
+		futures = dict()
+		queries = list()
+		for query, future in batch:
+			futures[id(query)] = future
+			try:
+				query.prepare()
+				queries.append(query)
+			except TransportException as e:
+				future.set_exception(e)
+
+		async def execute_stack(stack):
+			timeout = max(query.timeout for query in stack)
+			try:
+				results = await self.execute_multicall(stack, timeout=timeout)
+			except Exception as e:
+				results = [e] * len(stack)
+
+			for query, result in zip(stack, results):
+				future = futures[id(query)]
+				if future.done():
+					continue
+				if isinstance(result, Exception):
+					future.set_exception(result)
+				elif isinstance(result, dict) and 'faultCode' in result:
+					future.set_exception(Fault(result['faultCode'], result.get('faultString', '')))
+				elif isinstance(result, list) and len(result) == 1:
+					future.set_result(result[0])
+				else:
+					future.set_result(result)
+
+			# Fail the queries that got no result, the dedicated returned less results than queries.
+			for query in stack:
+				future = futures[id(query)]
+				if not future.done():
+					future.set_exception(TransportException('No result received for the query in the multicall.'))
+
+		stacks = self.split_multicalls(queries, prepare=False)
+		self.coalesce_stats['round_trips'] += len(stacks)
+		await asyncio.gather(*[execute_stack(stack) for stack in stacks])
+
+	async def connect(self, max_retries=10):
+		await super().connect(max_retries=max_retries)
 		await self.initialize()
 		await self.instance.storage.initialize()
 
+	async def reconnect(self):
+		await super().reconnect()
+
+		# Bring the state of the core components in sync with the dedicated server again.
+		try:
+			await self.instance.resync()
+		except Exception as e:
+			handle_exception(exception=e, module_name=__name__, func_name='reconnect')
+
 	async def initialize(self):
 		"""
 		The initialize method will gather information about the server that is only fetched once and saved and used
@@ -187,6 +381,8 @@ class GbxClient(GbxRemote):
 		await self('SendHideManialinkPage')
 
 		# Schedule refresh every minute!
+		if self.refresh_task:
+			self.refresh_task.cancel()
 		self.refresh_task = asyncio.ensure_future(self.__refresh_info_call())
 
 	async def __refresh_info_call(self):
@@ -0,0 +1,337 @@
+"""
+XML-RPC codecs used by the GbxRemote to marshal requests and unmarshal responses/callbacks.
+
+The stdlib codec wraps ``xmlrpc.client.dumps/loads`` and is always available. The fast codec is a drop-in replacement
+that is tuned for the GBX hot path: the decoder lets expat build the element tree in C (ElementTree) and converts it
+into Python values in one pass, the encoder caches the static XML skeleton per method name.
+"""
+import base64
+import importlib
+import json
+import logging
+
+from datetime import datetime
+from xml.etree import ElementTree
+from xml.parsers.expat import ExpatError
+from xmlrpc.client import dumps, loads, Fault, ResponseError, MAXINT, MININT
+
+logger = logging.getLogger(__name__)
+
+
+class BaseCodec:
+	"""
+	Base codec. Implement both methods to create your own XML-RPC codec for the GbxRemote.
+	"""
+	name = None
+
+	MULTICALL_HEAD = (
+		b'<?xml version="1.0"?><methodCall><methodName>system.multicall</methodName>'
+		b'<params><param><value><array><data>'
+	)
+	MULTICALL_TAIL = b'</data></array></value></param></params></methodCall>'
+
+	def dumps(self, method, params):
+		"""
+		Marshal a method call.
+
+		:param method: Method name.
+		:param params: Tuple with the parameters.
+		:return: Encoded request body.
+		:rtype: bytes
+		"""
+		raise NotImplementedError()
+
+	def loads(self, body):
+		"""
+		Unmarshal a method response or method call (callback).
+
+		:param body: Raw body bytes.
+		:return: Tuple with the params tuple and the method name (None for responses).
+		:raises xmlrpc.client.Fault: When the body contains a fault.
+		:raises xml.parsers.expat.ExpatError: When the body isn't valid XML.
+		"""
+		raise NotImplementedError()
+
+	def dumps_call(self, method, params):
+		"""
+		Marshal a method call as entry of a multicall (the ``methodName`` and ``params`` struct value).
+
+		:param method: Method name.
+		:param params: Tuple with the parameters.
+		:return: Encoded struct value.
+		:rtype: bytes
+		"""
+		body = self.dumps('system.multicall', ([dict(methodName=method, params=list(params))],))
+		start = body.index(b'<struct>')
+		end = body.rindex(b'</struct>') + len(b'</struct>')
+		return b'<value>' + body[start:end] + b'</value>'
+
+	def dumps_multicall(self, calls):
+		"""
+		Join the marshalled calls (see :meth:`dumps_call`) into a system.multicall request.
+
+		:param calls: List with the encoded calls.
+		:return: Encoded request body.
+		:rtype: bytes
+		"""
+		return self.MULTICALL_HEAD + b''.join(calls) + self.MULTICALL_TAIL
+
+
+class StdlibCodec(BaseCodec):
+	"""
+	Codec based on the ``xmlrpc.client`` module of the standard library.
+	"""
+	name = 'stdlib'
+
+	def dumps(self, method, params):
+		return dumps(params, methodname=method, allow_none=True).encode()
+
+	def loads(self, body):
+		return loads(body, use_builtin_types=True)
+
+
+def _escape(value):
+	if '&' in value:
+		value = value.replace('&', '&amp;')
+	if '<' in value:
+		value = value.replace('<', '&lt;')
+	if '>' in value:
+		value = value.replace('>', '&gt;')
+	return value
+
+
+def _encode_none(value, write):
+	write('<value><nil/></value>')
+
+
+def _encode_bool(value, write):
+	write('<value><boolean>1</boolean></value>' if value else '<value><boolean>0</boolean></value>')
+
+
+def _encode_int(value, write):
+	if value > MAXINT or value < MININT:
+		raise OverflowError('int exceeds XML-RPC limits')
+	write('<value><int>{:d}</int></value>'.format(value))
+
+
+def _encode_float(value, write):
+	write('<value><double>{!r}</double></value>'.format(value))
+
+
+def _encode_str(value, write):
+	write('<value><string>')
+	write(_escape(value))
+	write('</string></value>')
+
+
+def _encode_bytes(value, write):
+	write('<value><base64>')
+	write(base64.encodebytes(value).decode('ascii'))
+	write('</base64></value>')
+
+
+def _encode_datetime(value, write):
+	write('<value><dateTime.iso8601>')
+	write(value.strftime('%Y%m%dT%H:%M:%S'))
+	write('</dateTime.iso8601></value>')
+
+
+def _encode_list(value, write):
+	write('<value><array><data>')
+	for item in value:
+		_encode_value(item, write)
+	write('</data></array></value>')
+
+
+def _encode_dict(value, write):
+	write('<value><struct>')
+	for key, item in value.items():
+		if not isinstance(key, str):
+			raise TypeError('dictionary key must be string')
+		write('<member><name>')
+		write(_escape(key))
+		write('</name>')
+		_encode_value(item, write)
+		write('</member>')
+	write('</struct></value>')
+
+
+_ENCODERS = {
+	type(None): _encode_none,
+	bool: _encode_bool,
+	int: _encode_int,
+	float: _encode_float,
+	str: _encode_str,
+	bytes: _encode_bytes,
+	bytearray: _encode_bytes,
+	datetime: _encode_datetime,
+	list: _encode_list,
+	tuple: _encode_list,
+	dict: _encode_dict,
+}
+
+
+def _encode_value(value, write):
+	try:
+		encoder = _ENCODERS[type(value)]
+	except KeyError:
+		# Subclasses (IntEnum, OrderedDict, etc) are resolved by their base type.
+		for base in type(value).__mro__[1:]:
+			if base in _ENCODERS:
+				encoder = _ENCODERS[base]
+				break
+		else:
+			raise TypeError('cannot marshal {} objects'.format(type(value)))
+	encoder(value, write)
+
+
+def _decode_datetime(data):
+	return datetime.strptime(data, '%Y%m%dT%H:%M:%S')
+
+
+def _decode_boolean(data):
+	if data == '0':
+		return False
+	elif data == '1':
+		return True
+	raise TypeError('bad boolean value')
+
+
+def _decode_base64(data):
+	return base64.decodebytes(data.encode('ascii'))
+
+
+_SCALAR_DECODERS = {
+	'int': int,
+	'i4': int,
+	'i8': int,
+	'i1': int,
+	'i2': int,
+	'biginteger': int,
+	'double': float,
+	'float': float,
+	'boolean': _decode_boolean,
+	'base64': _decode_base64,
+	'dateTime.iso8601': _decode_datetime,
+}
+
+
+def _decode_value(element):
+	if not len(element):
+		# A value without a type element is a string.
+		return element.text or ''
+
+	child = element[0]
+	tag = child.tag
+	if tag == 'string':
+		return child.text or ''
+	elif tag == 'struct':
+		return {member[0].text or '': _decode_value(member[1]) for member in child}
+	elif tag == 'array':
+		return [_decode_value(item) for item in child[0]] if len(child) else []
+	elif tag == 'nil':
+		return None
+
+	try:
+		return _SCALAR_DECODERS[tag](child.text)
+	except KeyError:
+		raise ResponseError('unknown tag {!r}'.format(tag))
+
+
+class FastCodec(BaseCodec):
+	"""
+	Codec optimized for the GBX traffic. The output and results are compatible with the stdlib codec (with
+	``allow_none`` and ``use_builtin_types`` enabled).
+	"""
+	name = 'fast'
+
+	def __init__(self):
+		self._templates = dict()
+
+	def dumps(self, method, params):
+		try:
+			head = self._templates[method]
+		except KeyError:
+			head = self._templates[method] = (
+				'<?xml version="1.0"?><methodCall><methodName>{}</methodName><params>'.format(_escape(method))
+			)
+
+		parts = [head]
+		write = parts.append
+		for param in params:
+			write('<param>')
+			_encode_value(param, write)
+			write('</param>')
+		write('</params></methodCall>')
+		return ''.join(parts).encode()
+
+	def dumps_call(self, method, params):
+		parts = ['<value><struct><member><name>methodName</name><value><string>', _escape(method),
+				 '</string></value></member><member><name>params</name><value><array><data>']
+		write = parts.append
+		for param in params:
+			_encode_value(param, write)
+		write('</data></array></value></member></struct></value>')
+		return ''.join(parts).encode()
+
+	def loads(self, body):
+		try:
+			root = ElementTree.fromstring(body)
+		except ElementTree.ParseError as e:
+			raise ExpatError(str(e)) from e
+
+		method = None
+		params = None
+		for element in root:
+			if element.tag == 'params':
+				params = tuple(_decode_value(param[0]) for param in element)
+			elif element.tag == 'methodName':
+				method = element.text or ''
+			elif element.tag == 'fault':
+				raise Fault(**_decode_value(element[0]))
+
+		if params is None:
+			if method is None:
+				raise ResponseError()
+			params = tuple()
+		return params, method
+
+
+CODECS = {
+	StdlibCodec.name: StdlibCodec,
+	FastCodec.name: FastCodec,
+}
+
+
+def get_codec(name=None):
+	"""
+	Get codec instance by name or by class path.
+
+	:param name: Name of the codec ('fast' or 'stdlib') or full path to a codec class. None for the default.
+	:return: Codec instance.
+	:rtype: pyplanet.core.gbx.codec.BaseCodec
+	"""
+	if not name:
+		name = FastCodec.name
+	if name in CODECS:
+		return CODECS[name]()
+
+	module_path, _, cls_name = name.rpartition('.')
+	return getattr(importlib.import_module(module_path), cls_name)()
+
+
+def get_json_decoder(name=None):
+	"""
+	Get the JSON decode function used for the script callback payloads.
+
+	:param name: 'json' (default), 'orjson' or 'auto' to use orjson when it's installed.
+	:return: Function that decodes a JSON string.
+	"""
+	if name in ('orjson', 'auto'):
+		try:
+			import orjson
+			return orjson.loads
+		except ImportError:
+			if name == 'orjson':
+				logger.warning('The orjson JSON backend is selected but not installed, falling back to the json module!')
+	return json.loads
@@ -0,0 +1,152 @@
+"""
+The callback pipeline executes the GBX callbacks with a bounded pool of workers. Callbacks are queued per key (mostly the
+player login), the callbacks of a single key are executed in order, callbacks of different keys run in parallel.
+"""
+import asyncio
+import logging
+
+from collections import deque
+
+from pyplanet.utils.log import handle_exception
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackPipeline:
+	"""
+	Bounded callback dispatcher with per key ordered queues.
+
+	When the total amount of queued callbacks reaches the high-water mark, the low-value callbacks are handled by their
+	policy:
+
+	- ``drop``: The new callback is dropped.
+	- ``merge``: The new callback replaces the last queued callback with the same name and key (latest state wins).
+
+	All other callbacks are always queued.
+	"""
+	POLICY_DROP = 'drop'
+	POLICY_MERGE = 'merge'
+
+	DEFAULT_POLICIES = {
+		'ManiaPlanet.PlayerInfoChanged': POLICY_MERGE,
+		'Trackmania.Event.Stunt': POLICY_DROP,
+		'Shootmania.Event.OnShoot': POLICY_DROP,
+		'Shootmania.Event.OnShotDeny': POLICY_DROP,
+	}
+
+	def __init__(self, handler, workers=32, high_water_mark=5000, policies=None, loop=None):
+		"""
+		Initiate the pipeline.
+
+		:param handler: Coroutine function to execute for every item, item will be unpacked as arguments.
+		:param workers: Number of worker coroutines.
+		:param high_water_mark: Total queue depth from which the policies are applied.
+		:param policies: Dictionary with callback name and policy. None for the default policies.
+		:param loop: Event loop.
+		"""
+		self.handler = handler
+		self.workers = int(workers)
+		self.high_water_mark = int(high_water_mark) if high_water_mark else None
+		self.policies = self.DEFAULT_POLICIES.copy() if policies is None else dict(policies)
+		self.loop = loop or asyncio.get_event_loop()
+
+		self.queues = dict()
+		self.ready = None
+		self.tasks = list()
+
+		self.depth = 0
+		self.stats = dict(queued=0, processed=0, dropped=0, merged=0, max_depth=0, active=0)
+
+	def start(self):
+		"""
+		Start the worker coroutines.
+		"""
+		if self.tasks:
+			return
+		self.ready = asyncio.Queue()
+		self.tasks = [self.loop.create_task(self.worker()) for _ in range(self.workers)]
+
+	def stop(self):
+		"""
+		Stop the workers and clear the queues.
+		"""
+		for task in self.tasks:
+			task.cancel()
+		self.tasks = list()
+		self.queues.clear()
+		self.depth = 0
+
+	def put(self, key, name, item):
+		"""
+		Queue the item for the given key.
+
+		:param key: Ordering key, mostly the player login. None for global callbacks.
+		:param name: Callback name, used to find the policy.
+		:param item: Tuple with the arguments for the handler.
+		:return: Boolean if the item has been queued or merged (False when dropped).
+		"""
+		queue = self.queues.get(key)
+
+		if self.high_water_mark and self.depth >= self.high_water_mark and name in self.policies:
+			policy = self.policies[name]
+			if policy == self.POLICY_MERGE and queue:
+				for idx in range(len(queue) - 1, -1, -1):
+					if queue[idx][0] == name:
+						queue[idx] = (name, item)
+						self.stats['merged'] += 1
+						return True
+			elif policy == self.POLICY_DROP:
+				self.stats['dropped'] += 1
+				return False
+
+		self.depth += 1
+		self.stats['queued'] += 1
+		if self.depth > self.stats['max_depth']:
+			self.stats['max_depth'] = self.depth
+
+		if queue is None:
+			# The key isn't active or scheduled yet, schedule it to be picked up by a worker.
+			self.queues[key] = deque([(name, item)])
+			self.ready.put_nowait(key)
+		else:
+			queue.append((name, item))
+		return True
+
+	async def worker(self):
+		while True:
+			key = await self.ready.get()
+			queue = self.queues.get(key)
+			if not queue:
+				continue
+
+			_, item = queue.popleft()
+			self.depth -= 1
+			self.stats['active'] += 1
+			try:
+				await self.handler(*item)
+			except asyncio.CancelledError:
+				raise
+			except Exception as e:
+				handle_exception(exception=e, module_name=__name__, func_name='worker')
+			finally:
+				self.stats['active'] -= 1
+				self.stats['processed'] += 1
+
+			# Reschedule the key at the end to stay fair with the other keys.
+			if queue:
+				self.ready.put_nowait(key)
+			elif self.queues.get(key) is queue:
+				del self.queues[key]
+
+	def get_metrics(self):
+		"""
+		Get the queue metrics of the pipeline.
+
+		:return: Dictionary with the current depth, number of keys and the counters.
+		"""
+		return dict(
+			depth=self.depth,
+			keys=len(self.queues),
+			workers=len(self.tasks),
+			**self.stats
+		)
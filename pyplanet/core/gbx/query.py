@@ -1,7 +1,6 @@
 import asyncio
 import json
 import uuid
-from xmlrpc.client import dumps
 
 from pyplanet.core.exceptions import TransportException
 
@@ -35,6 +34,8 @@ class Query:
 		:return: Future with results.
 		:rtype: Future<any>
 		"""
+		if getattr(self._client, 'coalesce', False) and not self.method.startswith('system.'):
+			return await self._client.coalesce_query(self)
 		return await self._client.execute(self.method, *self.args, timeout=self.timeout)
 
 	def __await__(self):
@@ -45,12 +46,13 @@ class Query:
 
 	def prepare(self):
 		"""
-		Prepare the query, marshall the payload, create binary data and calculate length (size).
+		Prepare the query, marshall the payload as multicall entry, create binary data and calculate length (size).
+		The prepared data is reused when the query is executed in a multicall.
 		"""
-		self.packet = dumps(self.args, methodname=self.method, allow_none=True).encode()
+		self.packet = self._client.codec.dumps_call(self.method, self.args)
 		self.length = len(self.packet)
 
-		if (self.length + 8) > self._client.MAX_REQUEST_SIZE:
+		if (self.length + self._client.multicall_overhead) > self._client.MAX_REQUEST_SIZE:
 			raise TransportException('The prepared query is larger than the maximum request size, we will not send this query!')
 
 	async def __aenter__(self):
@@ -110,8 +112,13 @@ class ScriptQuery(Query):
 			self._client.script_handlers[self.response_id] = future = asyncio.Future()
 
 		# Execute the call itself and register the callback script handler.
-		gbx_res = await self._client.execute(self.method, *self.args)
-
-		if self.response_id:
-			return await asyncio.wait_for(future, self.timeout)  # Timeout after 15 seconds!
-		return gbx_res
+		try:
+			gbx_res = await self._client.execute(self.method, *self.args)
+
+			if self.response_id:
+				return await asyncio.wait_for(future, self.timeout)  # Timeout after 15 seconds!
+			return gbx_res
+		finally:
+			# Clean up the script handler when it's timed out or failed.
+			if self.response_id:
+				self._client.script_handlers.pop(self.response_id, None)
@@ -0,0 +1,82 @@
+"""
+The recorder writes the raw GBX frames (requests and responses/callbacks) with their timestamp to a compact binary file.
+The recordings can be replayed with the fake dedicated server (see ``tests/benchmarks/fake_dedicated.py``).
+
+File layout: the ``PYPLGBX1`` magic followed by the frames. Every frame starts with a ``<dBLL`` header (timestamp,
+direction, body size and handle) followed by the raw XML-RPC body.
+"""
+import logging
+import struct
+import time
+
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+Frame = namedtuple('Frame', ['timestamp', 'direction', 'handle', 'body'])
+
+
+class GbxRecorder:
+	"""
+	Recorder of the raw GBX frames.
+	"""
+	MAGIC = b'PYPLGBX1'
+	HEADER = struct.Struct('<dBLL')
+
+	RECEIVED = 0
+	SENT = 1
+
+	def __init__(self, path):
+		"""
+		Open the recording file, frames are appended when the file already exists.
+
+		:param path: Path of the recording file.
+		:type path: str
+		"""
+		self.path = path
+		self.frames = 0
+		self.handle = open(path, 'ab')
+		if self.handle.tell() == 0:
+			self.handle.write(self.MAGIC)
+		logger.info('Recording GBX frames to {}'.format(path))
+
+	def write(self, direction, handle_nr, body):
+		"""
+		Write frame to the recording.
+
+		:param direction: Direction of the frame, ``RECEIVED`` or ``SENT``.
+		:param handle_nr: Handler ID of the frame.
+		:param body: Raw body bytes.
+		"""
+		if not self.handle:
+			return
+		self.handle.write(self.HEADER.pack(time.time(), direction, len(body), handle_nr))
+		self.handle.write(body)
+		self.frames += 1
+
+	def close(self):
+		if self.handle:
+			self.handle.close()
+			self.handle = None
+
+	@classmethod
+	def read(cls, path):
+		"""
+		Read the frames of a recording.
+
+		:param path: Path of the recording file.
+		:return: Generator with the frames.
+		:rtype: collections.Iterable[pyplanet.core.gbx.recorder.Frame]
+		"""
+		with open(path, 'rb') as handle:
+			if handle.read(len(cls.MAGIC)) != cls.MAGIC:
+				raise ValueError('File {} is not a GBX recording!'.format(path))
+			while True:
+				header = handle.read(cls.HEADER.size)
+				if len(header) < cls.HEADER.size:
+					return
+				timestamp, direction, size, handle_nr = cls.HEADER.unpack(header)
+				body = handle.read(size)
+				if len(body) < size:
+					return
+				yield Frame(timestamp, direction, handle_nr, body)
@@ -2,19 +2,62 @@
 GBXRemote 2 client for python 3.5+ part of PyPlanet.
 """
 import asyncio
-import json
 import logging
+import re
 import struct
 
-from xmlrpc.client import dumps, loads, Fault
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from xmlrpc.client import Fault
 from xml.parsers.expat import ExpatError
 
 from pyplanet.core.exceptions import TransportException
+from pyplanet.core.gbx.codec import get_codec, get_json_decoder
+from pyplanet.core.gbx.pipeline import CallbackPipeline
+from pyplanet.core.gbx.recorder import GbxRecorder
+from pyplanet.core.gbx.transport import GbxTransport
 from pyplanet.core.events.manager import SignalManager
 from pyplanet.utils.log import handle_exception
 
 logger = logging.getLogger(__name__)
 
+SCRIPT_LOGIN_PATTERN = re.compile(r'"login"\s*:\s*"([^"]*)"')
+SCRIPT_RESPONSE_ID_PATTERN = re.compile(r'"responseid"\s*:\s*"[^"]')
+
+
+def has_response_id(raw):
+	"""
+	Check if the raw (undecoded) script callback payload contains a (non-empty) response id.
+
+	:param raw: Raw JSON string or list with JSON strings.
+	:return: Boolean
+	"""
+	if isinstance(raw, str):
+		return SCRIPT_RESPONSE_ID_PATTERN.search(raw) is not None
+	if isinstance(raw, list):
+		return any(isinstance(part, str) and SCRIPT_RESPONSE_ID_PATTERN.search(part) is not None for part in raw)
+	return False
+
+
+def decode_body(codec, body):
+	"""
+	Decode a frame body into the method, data and fault. This is a module function so it can be executed in the decode
+	pool. Faults are returned as a tuple as the Fault exception itself can't be pickled (process pool).
+
+	:param codec: Codec instance.
+	:param body: Raw body bytes.
+	:return: Tuple with method, data and fault (code, string) tuple or None.
+	"""
+	data = method = fault = None
+	try:
+		data, method = codec.loads(body)
+	except Fault as e:
+		fault = (e.faultCode, e.faultString)
+
+	if data and len(data) == 1:
+		data = data[0]
+	return method, data, fault
+
 
 class GbxRemote:
 	"""
@@ -23,7 +66,19 @@ class GbxRemote:
 	MAX_REQUEST_SIZE  = 2000000  # 2MB
 	MAX_RESPONSE_SIZE = 4000000  # 4MB
 
-	def __init__(self, host, port, event_pool=None, user=None, password=None, api_version='2013-04-16', instance=None):
+	CALLBACK_HANDLE_MASK = 0x80000000
+	DECODE_POOLS = {
+		'thread': ThreadPoolExecutor,
+		'process': ProcessPoolExecutor,
+	}
+
+	def __init__(
+		self, host, port, event_pool=None, user=None, password=None, api_version='2013-04-16', instance=None, codec=None,
+		decode_threshold=None, decode_pool_size=2, decode_pool='thread',
+		callback_workers=32, callback_high_water_mark=5000, callback_policies=None, json_backend=None,
+		transport_options=None, reconnect=False, reconnect_max_delay=30, reconnect_timeout=300,
+		record=None,
+	):
 		"""
 		Initiate the GbxRemote client.
 
@@ -35,6 +90,19 @@ class GbxRemote:
 		:param api_version: API Version to use. In most cases you won't override the default because version changes
 							should be abstracted by the other core components.
 		:param instance: Instance of the app.
+		:param codec: XML-RPC codec name ('fast' or 'stdlib'), class path or codec instance. None for the default.
+		:param decode_threshold: Bodies of this size (bytes) or larger are decoded in the decode pool. None to disable.
+		:param decode_pool_size: Number of workers in the decode pool.
+		:param decode_pool: Type of the decode pool, 'thread' or 'process'.
+		:param callback_workers: Number of workers executing the callbacks. 0 to start a task for every callback.
+		:param callback_high_water_mark: Queued callbacks from which the drop/merge policies are applied.
+		:param callback_policies: Dictionary with callback name and policy ('drop' or 'merge'). None for defaults.
+		:param json_backend: JSON backend for the script callbacks: 'json' (default), 'orjson' or 'auto'.
+		:param transport_options: Keyword arguments for the transport (in-flight window, buffers and socket options).
+		:param reconnect: Reconnect within the process when the connection is lost instead of exiting the process.
+		:param reconnect_max_delay: Maximum delay in seconds between the reconnect attempts (exponential backoff).
+		:param reconnect_timeout: Give up reconnecting after x seconds and exit the process. None to retry forever.
+		:param record: Path of the file to record the raw frames to (see :class:`pyplanet.core.gbx.recorder.GbxRecorder`).
 		:type host: str
 		:type port: str int
 		:type event_pool: asyncio.BaseEventPool
@@ -42,6 +110,19 @@ class GbxRemote:
 		:type password: str
 		:type api_version: str
 		:type instance: pyplanet.core.instance.Instance
+		:type codec: str, pyplanet.core.gbx.codec.BaseCodec
+		:type decode_threshold: int
+		:type decode_pool_size: int
+		:type decode_pool: str
+		:type callback_workers: int
+		:type callback_high_water_mark: int
+		:type callback_policies: dict
+		:type json_backend: str
+		:type transport_options: dict
+		:type reconnect: bool
+		:type reconnect_max_delay: int
+		:type reconnect_timeout: int
+		:type record: str
 		"""
 		self.host = host
 		self.port = port
@@ -49,6 +130,8 @@ class GbxRemote:
 		self.password = password
 		self.api_version = api_version
 		self.instance = instance
+		self.codec = codec if hasattr(codec, 'loads') else get_codec(codec)
+		self.json_loads = get_json_decoder(json_backend)
 
 		self.dedicated_version = None
 		self.dedicated_build = None
@@ -61,24 +144,69 @@ class GbxRemote:
 
 		self.script_handlers = dict()
 
+		self.decode_threshold = int(decode_threshold) if decode_threshold else None
+		self.decode_pool_size = int(decode_pool_size)
+		self.decode_pool_cls = self.DECODE_POOLS[decode_pool]
+		self.decode_pool = None
+		self.decode_lanes = dict()
+
+		self.callback_pipeline = None
+		if callback_workers:
+			self.callback_pipeline = CallbackPipeline(
+				self.handle_payload, workers=callback_workers, high_water_mark=callback_high_water_mark,
+				policies=callback_policies, loop=self.event_loop,
+			)
+
+		self.transport_options = transport_options or dict()
+		self.transport = None
+
+		self.reconnect_enabled = bool(reconnect)
+		self.reconnect_max_delay = reconnect_max_delay
+		self.reconnect_timeout = reconnect_timeout
+		self.reconnect_task = None
+
+		self.record_path = record
+		self.recorder = None
+
 		self.reader = None
 		self.writer = None
 		self.loop_task = None
 
 	@classmethod
-	def create_from_settings(cls, instance, conf):
+	def create_from_settings(cls, instance, conf, **kwargs):
 		"""
 		Create an instance from configuration given for the specific pool.
 
 		:param instance: Instance of the app.
 		:param conf: Settings for pool.
+		:param kwargs: Extra arguments for the subclass.
 		:type conf: dict
 		:return: Instance of XML-RPC GbxClient.
 		:rtype: pyplanet.core.gbx.client.GbxClient
 		"""
 		return cls(
 			instance=instance,
-			host=conf['HOST'], port=conf['PORT'], user=conf['USER'], password=conf['PASSWORD']
+			host=conf['HOST'], port=conf['PORT'], user=conf['USER'], password=conf['PASSWORD'],
+			codec=conf.get('CODEC', None),
+			decode_threshold=conf.get('DECODE_THRESHOLD', None),
+			decode_pool_size=conf.get('DECODE_POOL_SIZE', 2),
+			decode_pool=conf.get('DECODE_POOL', 'thread'),
+			callback_workers=conf.get('CALLBACK_WORKERS', 32),
+			callback_high_water_mark=conf.get('CALLBACK_HIGH_WATER_MARK', 5000),
+			callback_policies=conf.get('CALLBACK_POLICIES', None),
+			json_backend=conf.get('JSON_BACKEND', None),
+			transport_options=dict(
+				max_in_flight=conf.get('MAX_IN_FLIGHT', 64),
+				write_buffer_high=conf.get('WRITE_BUFFER_HIGH', None),
+				tcp_nodelay=conf.get('TCP_NODELAY', True),
+				send_buffer=conf.get('SOCKET_SEND_BUFFER', None),
+				receive_buffer=conf.get('SOCKET_RECEIVE_BUFFER', None),
+			),
+			reconnect=conf.get('RECONNECT', False),
+			reconnect_max_delay=conf.get('RECONNECT_MAX_DELAY', 30),
+			reconnect_timeout=conf.get('RECONNECT_TIMEOUT', 300),
+			record=conf.get('RECORD', None),
+			**kwargs
 		)
 
 	def get_next_handler(self):
@@ -90,16 +218,17 @@ class GbxRemote:
 			self.handler_nr += 1
 		return handler
 
-	async def connect(self):
+	async def connect(self, max_retries=10):
 		"""
 		Make connection to the server. This will first check the protocol version and after successful connection
 		also authenticate, set the API version and enable callbacks.
+
+		:param max_retries: Number of retries to open the connection.
 		"""
 		logger.debug('Trying to connect to the dedicated server...')
 
 		# Create socket (+ retry few times if not successful.
 		retries = 0
-		max_retries = 10
 		while True:
 			try:
 				self.reader, self.writer = await asyncio.open_connection(
@@ -125,8 +254,17 @@ class GbxRemote:
 			raise TransportException('Server is not a valid GBXRemote 2 server.')
 		logger.debug('Dedicated connection established!')
 
+		if self.record_path and not self.recorder:
+			self.recorder = GbxRecorder(self.record_path)
+
+		# Start the transport that writes our requests.
+		self.transport = GbxTransport(self.writer, loop=self.event_loop, **self.transport_options)
+		self.transport.start()
+
 		# From now we need to start listening.
 		self.loop_task = self.event_loop.create_task(self.listen())
+		if self.callback_pipeline:
+			self.callback_pipeline.start()
 
 		# Startup tasks.
 		await self.execute('Authenticate', self.user, self.password)
@@ -169,16 +307,30 @@ class GbxRemote:
 		"""
 		Stop the task of listening, destroy connections, reader and writer.
 		"""
+		if self.reconnect_task:
+			self.reconnect_task.cancel()
+			self.reconnect_task = None
 		if self.loop_task:
 			self.loop_task.cancel()
-			del self.loop_task
+			self.loop_task = None
+		if self.transport:
+			self.transport.stop()
+			self.transport = None
 		if self.reader:
 			del self.reader
 		if self.writer:
 			self.writer.close()
 			del self.writer
-
-	async def execute(self, method, *args, timeout=45.0):
+		if self.callback_pipeline:
+			self.callback_pipeline.stop()
+		if self.decode_pool:
+			self.decode_pool.shutdown(wait=False)
+			self.decode_pool = None
+		if self.recorder:
+			self.recorder.close()
+			self.recorder = None
+
+	async def execute(self, method, *args, timeout=45.0, priority=None):
 		"""
 		Query the dedicated server and return the results. This method is a coroutine and should be awaited on.
 		The result you get will be a tuple with data inside (the response payload).
@@ -186,24 +338,49 @@ class GbxRemote:
 		:param method: Server method.
 		:param args: Arguments.
 		:param timeout: Wait for x seconds until future is returned. Default is 45 seconds.
+		:param priority: Priority lane of the transport, None to determinate by the method.
 		:type method: str
 		:type args: any
 		:return: Tuple with response data (after awaiting).
 		:rtype: Future<tuple>
 		"""
-		request_bytes = dumps(args, methodname=method, allow_none=True).encode()
+		if priority is None:
+			priority = GbxTransport.get_priority(method, args)
+		return await self.execute_raw(self.codec.dumps(method, args), timeout=timeout, priority=priority)
+
+	async def execute_raw(self, request_bytes, timeout=45.0, priority=GbxTransport.PRIORITY_NORMAL):
+		"""
+		Send an already marshalled request and return the results.
+
+		:param request_bytes: Encoded request body.
+		:param timeout: Wait for x seconds until future is returned. Default is 45 seconds.
+		:param priority: Priority lane of the transport.
+		:type request_bytes: bytes
+		:return: Response data (after awaiting).
+		"""
+		transport = self.transport
+		if not transport:
+			raise TransportException('Not connected to the dedicated server.')
+
 		length_bytes = len(request_bytes).to_bytes(4, byteorder='little')
 		handler = self.get_next_handler()
 
 		handler_bytes = handler.to_bytes(4, byteorder='little')
+		if self.recorder:
+			self.recorder.write(GbxRecorder.SENT, handler, request_bytes)
 
 		# Create new future to be returned.
 		self.handlers[handler] = future = asyncio.Future()
 
 		# Send to server.
-		self.writer.write(length_bytes + handler_bytes + request_bytes)
+		transport.send(handler, length_bytes + handler_bytes + request_bytes, future, priority)
 
-		return await asyncio.wait_for(future, timeout)
+		try:
+			return await asyncio.wait_for(future, timeout)
+		finally:
+			# Clean up when timed out or cancelled, and free the slot in the in-flight window.
+			self.handlers.pop(handler, None)
+			transport.complete(handler)
 
 	async def listen(self):
 		"""
@@ -214,22 +391,41 @@ class GbxRemote:
 				head = await self.reader.readexactly(8)
 				size, handle = struct.unpack_from('<LL', head)
 				body = await self.reader.readexactly(size)
-				data = method = fault = None
+				if self.recorder:
+					self.recorder.write(GbxRecorder.RECEIVED, handle, body)
+
+				# Large bodies are decoded in the pool to keep the loop free for the other frames.
+				if self.decode_threshold and size >= self.decode_threshold:
+					if not self.decode_pool:
+						self.decode_pool = self.decode_pool_cls(max_workers=self.decode_pool_size)
+					self.dispatch_ordered(
+						handle, self.event_loop.run_in_executor(self.decode_pool, decode_body, self.codec, body), body
+					)
+					continue
 
 				try:
-					data, method = loads(body, use_builtin_types=True)
-				except Fault as e:
-					fault = e
+					payload = decode_body(self.codec, body)
 				except ExpatError as e:
 					# See #121 for this solution.
 					handle_exception(exception=e, module_name=__name__, func_name='listen', extra_data={'body': body})
 					continue
 
-				if data and len(data) == 1:
-					data = data[0]
+				# Keep the order when a frame of the same lane is still decoding in the pool.
+				if self.decode_lanes and self.get_lane(handle) in self.decode_lanes:
+					future = self.event_loop.create_future()
+					future.set_result(payload)
+					self.dispatch_ordered(handle, future, body)
+					continue
+
+				self.dispatch_payload(handle, *payload)
+		except (ConnectionResetError, asyncio.IncompleteReadError) as e:
+			if self.reconnect_enabled:
+				# Only a single reconnect loop, the connections it opens are closed by itself when they fail.
+				if self.reconnect_task is None or self.reconnect_task.done():
+					logger.critical('Connection with the dedicated server has been closed, reconnecting! {}'.format(str(e)))
+					self.reconnect_task = self.event_loop.create_task(self.reconnect())
+				return
 
-				self.event_loop.create_task(self.handle_payload(handle, method, data, fault))
-		except ConnectionResetError as e:
 			logger.critical(
 				'Connection with the dedicated server has been closed, we will now close down the subprocess! {}'.format(str(e))
 			)
@@ -240,6 +436,152 @@ class GbxRemote:
 			handle_exception(exception=e, module_name=__name__, func_name='listen')
 			raise
 
+	async def reconnect(self):
+		"""
+		Reconnect to the dedicated server after the connection has been lost. The pending requests are failed, the
+		connection is retried with an exponential backoff and finally the client is authenticated again and the callbacks
+		are enabled again (see :meth:`connect`). The process exits (to be restarted by the god process) when the
+		reconnect timeout has been reached.
+		"""
+		self.close_connection()
+
+		delay = 1
+		started_at = self.event_loop.time()
+		while True:
+			try:
+				await self.connect(max_retries=0)
+				break
+			except Exception as e:
+				self.close_connection()
+				if self.reconnect_timeout and self.event_loop.time() - started_at >= self.reconnect_timeout:
+					logger.critical('Couldn\'t reconnect to the dedicated server, we will now close down the subprocess!')
+					exit(10)
+
+				logger.warning('Couldn\'t reconnect to the dedicated server, retry in {} seconds. (Error: {})'.format(
+					delay, str(e)
+				))
+				await asyncio.sleep(delay)
+				delay = min(delay * 2, self.reconnect_max_delay)
+
+		logger.info('Reconnected to the dedicated server!')
+		self.reconnect_task = None
+
+	def close_connection(self):
+		"""
+		Close the (lost) connection, stop listening to it and fail all the requests that are waiting for a response. The
+		callback pipeline and the decode pool are kept as they are.
+		"""
+		if self.loop_task:
+			self.loop_task.cancel()
+			self.loop_task = None
+		if self.transport:
+			self.transport.stop()
+			self.transport = None
+		if self.writer:
+			self.writer.close()
+		self.reader = self.writer = None
+
+		for handlers in (self.handlers, self.script_handlers):
+			for future in handlers.values():
+				if not future.done():
+					future.set_exception(TransportException('Connection with the dedicated server has been lost.'))
+			handlers.clear()
+
+	def get_lane(self, handle_nr):
+		"""
+		Get the ordering lane of the handle number. Responses are ordered per handle, callbacks share one lane.
+
+		:param handle_nr: Handler ID
+		:return: Lane key.
+		"""
+		return handle_nr if handle_nr & self.CALLBACK_HANDLE_MASK else None
+
+	def dispatch_payload(self, handle_nr, method, data, fault):
+		"""
+		Schedule the handling of a decoded payload.
+
+		:param handle_nr: Handler ID
+		:param method: Method name
+		:param data: Parsed payload data.
+		:param fault: Fault code and string tuple or None.
+		"""
+		if fault is not None:
+			fault = Fault(*fault)
+
+		# Callbacks are executed by the pipeline, ordered per player.
+		if self.callback_pipeline and method and handle_nr not in self.handlers:
+			route = self.get_callback_route(method, data)
+			if route:
+				self.callback_pipeline.put(route[0], route[1], (handle_nr, method, data, fault))
+				return
+
+		self.event_loop.create_task(self.handle_payload(handle_nr, method, data, fault))
+
+	def get_callback_route(self, method, data):
+		"""
+		Get the pipeline key (player login or None for global callbacks) and the callback name for the policies.
+
+		:param method: Method name
+		:param data: Parsed payload data.
+		:return: Tuple with key and callback name, None to bypass the pipeline (script responses and manialink answers).
+		"""
+		if method == 'ManiaPlanet.ModeScriptCallbackArray' or method == 'ManiaPlanet.ModeScriptCallback':
+			try:
+				name, raw = data
+			except (TypeError, ValueError):
+				return None, method
+			if isinstance(raw, list):
+				raw = raw[0] if len(raw) > 0 else ''
+			if not isinstance(raw, str):
+				return None, name
+
+			# Responses to scripted queries are resolving futures that callbacks can wait on, never queue these.
+			if has_response_id(raw):
+				return None
+
+			# Payloads about multiple players (like the scores) are global.
+			logins = set(SCRIPT_LOGIN_PATTERN.findall(raw))
+			return logins.pop() if len(logins) == 1 else None, name
+
+		if method == 'ManiaPlanet.PlayerInfoChanged' and isinstance(data, dict):
+			return data.get('Login'), method
+		if method in ('ManiaPlanet.PlayerConnect', 'ManiaPlanet.PlayerDisconnect') and isinstance(data, (list, tuple)):
+			return data[0] if data else None, method
+		if method == 'ManiaPlanet.PlayerManialinkPageAnswer':
+			# Answers can resolve prompts (confirmations) that other callbacks of the same player are waiting on.
+			return None
+		if method == 'ManiaPlanet.PlayerChat' and isinstance(data, (list, tuple)):
+			return data[1] if len(data) > 1 else None, method
+		return None, method
+
+	def dispatch_ordered(self, handle_nr, future, body):
+		"""
+		Dispatch the payload after the decoding future is done and the previous frame of the lane is dispatched.
+
+		:param handle_nr: Handler ID
+		:param future: Future that results in the decoded payload.
+		:param body: Raw body (for error reporting).
+		"""
+		lane = self.get_lane(handle_nr)
+		task = self.event_loop.create_task(self._dispatch_after(self.decode_lanes.get(lane), handle_nr, future, body))
+		self.decode_lanes[lane] = task
+
+		def release(done_task):
+			if self.decode_lanes.get(lane) is done_task:
+				del self.decode_lanes[lane]
+		task.add_done_callback(release)
+
+	async def _dispatch_after(self, previous, handle_nr, future, body):
+		try:
+			payload = await future
+		except Exception as e:
+			handle_exception(exception=e, module_name=__name__, func_name='listen', extra_data={'body': body})
+			payload = None
+		if previous:
+			await asyncio.wait([previous])
+		if payload:
+			self.dispatch_payload(handle_nr, *payload)
+
 	async def handle_payload(self, handle_nr, method=None, data=None, fault=None):
 		"""
 		Handle a callback/response payload or fault.
@@ -269,11 +611,14 @@ class GbxRemote:
 	async def handle_response(self, handle_nr, method=None, data=None, fault=None):
 		logger.debug('GBX: Received response to handler {}, method: {}'.format(handle_nr, method))
 		handler = self.handlers.pop(handle_nr)
+		if self.transport:
+			self.transport.complete(handle_nr)
+		if handler.done():
+			return
 		if not fault:
 			handler.set_result(data)
 		else:
 			handler.set_exception(fault)
-		handler.done()
 
 	async def handle_callback(self, handle_nr, method, data):
 		logger.debug('GBX: Received callback: {}: {}'.format(method, data))
@@ -297,17 +642,25 @@ class GbxRemote:
 		except:
 			pass
 
+		# Skip decoding when nobody is listening, except for responses of scripted queries.
+		signal = None
+		if not has_response_id(raw):
+			signal = SignalManager.get_callback('Script.{}'.format(method))
+			if not signal or not signal.has_listeners():
+				return
+
 		# Try to parse JSON, mostly the case.
+		json_loads = self.json_loads
 		try:
 			if isinstance(raw, list):
 				payload = dict()
 				for idx, part in enumerate(raw):
 					try:
-						payload.update(json.loads(part))
+						payload.update(json_loads(part))
 					except:
 						payload['raw_{}'.format(idx)] = part
 			else:
-				payload = json.loads(raw)
+				payload = json_loads(raw)
 		except Exception as e:
 			payload = raw
 
@@ -329,6 +682,7 @@ class GbxRemote:
 		# If not, we should just throw it as an ordinary callback.
 		logger.debug('GBX: Received scripted callback: {}: {}'.format(method, payload))
 
-		signal = SignalManager.get_callback('Script.{}'.format(method))
+		if signal is None:
+			signal = SignalManager.get_callback('Script.{}'.format(method))
 		if signal:
 			await signal.send_robust(payload)
@@ -0,0 +1,180 @@
+"""
+The transport writes the requests to the dedicated server. It limits the amount of requests in flight, applies
+backpressure on the socket and sends the requests in order of their priority lane.
+"""
+import asyncio
+import logging
+import socket
+
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class GbxTransport:
+	"""
+	Request writer with an in-flight window and priority lanes.
+
+	Requests of a higher priority lane are always written before the requests of the lower lanes, so gameplay critical
+	calls (like ``ChooseNextMap``) are not queued behind bulk manialink pushes.
+	"""
+	PRIORITY_HIGH = 0
+	PRIORITY_NORMAL = 1
+	PRIORITY_BULK = 2
+
+	HIGH_PRIORITY_METHODS = {
+		'Authenticate', 'SetApiVersion', 'EnableCallbacks',
+		'ChooseNextMap', 'NextMap', 'RestartMap', 'JumpToMapIdent', 'JumpToMapIndex', 'SetNextMapIdent', 'SetNextMapIndex',
+		'Kick', 'Ban', 'BanAndBlackList', 'ForceSpectator', 'ForceSpectatorTarget', 'ForcePlayerTeam',
+		'ForceEndRound', 'SetModeScriptSettings',
+	}
+	BULK_METHODS = {
+		'SendDisplayManialinkPage', 'SendDisplayManialinkPageToLogin', 'SendDisplayManialinkPageToId',
+		'SendHideManialinkPage', 'SendHideManialinkPageToLogin', 'SendHideManialinkPageToId',
+	}
+
+	def __init__(self, writer, max_in_flight=64, write_buffer_high=None, tcp_nodelay=True, send_buffer=None,
+				 receive_buffer=None, loop=None):
+		"""
+		Initiate the transport.
+
+		:param writer: Stream writer of the connection.
+		:param max_in_flight: Maximum number of requests waiting for a response. 0 or None for no limit.
+		:param write_buffer_high: High-water mark of the write buffer in bytes, writing is paused (drained) above it.
+		:param tcp_nodelay: Disable Nagle's algorithm on the socket.
+		:param send_buffer: Socket send buffer size (SO_SNDBUF) in bytes. None to keep the system default.
+		:param receive_buffer: Socket receive buffer size (SO_RCVBUF) in bytes. None to keep the system default.
+		:param loop: Event loop.
+		:type writer: asyncio.StreamWriter
+		"""
+		self.writer = writer
+		self.max_in_flight = int(max_in_flight or 0)
+		self.loop = loop or asyncio.get_event_loop()
+
+		self.lanes = (deque(), deque(), deque())
+		self.in_flight = set()
+		self.write_task = None
+		self.stats = dict(written=0, bytes=0, drains=0, expired=0)
+
+		self._wakeup = asyncio.Event()
+		self._slot = asyncio.Event()
+
+		sock = writer.get_extra_info('socket')
+		if sock is not None:
+			try:
+				if tcp_nodelay:
+					sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+				if send_buffer:
+					sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, int(send_buffer))
+				if receive_buffer:
+					sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, int(receive_buffer))
+			except OSError as e:
+				logger.warning('Can\'t set the socket options of the dedicated connection: {}'.format(str(e)))
+		if write_buffer_high:
+			writer.transport.set_write_buffer_limits(high=int(write_buffer_high))
+
+	@classmethod
+	def get_priority(cls, method, args):
+		"""
+		Get the priority lane of a request.
+
+		:param method: Method name.
+		:param args: Arguments of the request.
+		:return: Priority lane number.
+		"""
+		if method in cls.HIGH_PRIORITY_METHODS:
+			return cls.PRIORITY_HIGH
+		if method in cls.BULK_METHODS:
+			return cls.PRIORITY_BULK
+		if method == 'system.multicall' and args and isinstance(args[0], list):
+			return cls.get_multicall_priority(call.get('methodName') for call in args[0] if isinstance(call, dict))
+		return cls.PRIORITY_NORMAL
+
+	@classmethod
+	def get_multicall_priority(cls, methods):
+		"""
+		Get the priority lane of a multicall request, bulk when all the calls are bulk calls.
+
+		:param methods: Method names of the calls.
+		:return: Priority lane number.
+		"""
+		methods = set(methods)
+		if methods and methods <= cls.BULK_METHODS:
+			return cls.PRIORITY_BULK
+		return cls.PRIORITY_NORMAL
+
+	def start(self):
+		self.write_task = self.loop.create_task(self.write_loop())
+
+	def stop(self):
+		if self.write_task:
+			self.write_task.cancel()
+			self.write_task = None
+		for lane in self.lanes:
+			lane.clear()
+		self.in_flight.clear()
+
+	def send(self, handle_nr, data, future, priority=PRIORITY_NORMAL):
+		"""
+		Queue request to be written.
+
+		:param handle_nr: Handler ID of the request.
+		:param data: Full frame bytes (header + body).
+		:param future: Future of the response, requests with a done future are not written anymore.
+		:param priority: Priority lane.
+		"""
+		self.lanes[priority].append((handle_nr, data, future))
+		self._wakeup.set()
+
+	def complete(self, handle_nr):
+		"""
+		Mark the request as done (response received or timed out), frees up a slot in the in-flight window.
+
+		:param handle_nr: Handler ID of the request.
+		"""
+		if handle_nr in self.in_flight:
+			self.in_flight.discard(handle_nr)
+			self._slot.set()
+
+	def get_metrics(self):
+		"""
+		Get the metrics of the transport.
+
+		:return: Dictionary with the queued requests per lane, in flight requests and the counters.
+		"""
+		return dict(
+			queued_high=len(self.lanes[self.PRIORITY_HIGH]),
+			queued_normal=len(self.lanes[self.PRIORITY_NORMAL]),
+			queued_bulk=len(self.lanes[self.PRIORITY_BULK]),
+			in_flight=len(self.in_flight),
+			**self.stats
+		)
+
+	async def write_loop(self):
+		while True:
+			lane = next((lane for lane in self.lanes if lane), None)
+			if lane is None:
+				self._wakeup.clear()
+				await self._wakeup.wait()
+				continue
+
+			if self.max_in_flight and len(self.in_flight) >= self.max_in_flight:
+				self._slot.clear()
+				await self._slot.wait()
+				continue
+
+			handle_nr, data, future = lane.popleft()
+			if future.done():
+				# Timed out or cancelled before we could send it.
+				self.stats['expired'] += 1
+				continue
+
+			self.in_flight.add(handle_nr)
+			self.writer.write(data)
+			self.stats['written'] += 1
+			self.stats['bytes'] += len(data)
+
+			# Wait for the socket buffer to be flushed when it's above the high-water mark.
+			if self.writer.transport.get_write_buffer_size() > 0:
+				self.stats['drains'] += 1
+				await self.writer.drain()
@@ -17,6 +17,8 @@ from pyplanet.apps import Apps
 from pyplanet.conf import settings
 from pyplanet.core import signals
 from pyplanet.core.events import SignalManager
+from pyplanet.core.events.stats import SignalStats
+from pyplanet.core.ui.stats import UIStats
 from pyplanet.core.db.database import Database
 from pyplanet.core.game import Game
 from pyplanet.core.gbx import GbxClient
@@ -86,6 +88,12 @@ class Instance:
 		self.mode_manager =				ModeManager(self)
 		self.chat_manager = self.chat = ChatManager(self)
 
+		# Signal receiver instrumentation.
+		SignalStats.configure(enabled=settings.SIGNAL_STATS, slow_threshold=settings.SIGNAL_SLOW_THRESHOLD)
+
+		# UI bandwidth and render cost accounting.
+		UIStats.configure(enabled=settings.UI_STATS)
+
 		# Populate apps.
 		self.apps.populate(settings.MANDATORY_APPS, in_order=True)
 		try:
@@ -190,6 +198,16 @@ class Instance:
 		await self.signals.finish_start()
 		await self.__fire_signal(signals.pyplanet_start_after)
 
+	async def resync(self):
+		"""
+		The resync coroutine is executed after the connection with the dedicated server has been restored (see the
+		``RECONNECT`` setting). It brings the maps, players and the displayed manialinks back in sync with the server.
+		"""
+		await self.map_manager.resync()
+		await self.player_manager.resync()
+		await self.ui_manager.replay()
+		await self.__fire_signal(signals.pyplanet_gbx_reconnected)
+
 	async def _stop(self):
 		"""
 		The stop coroutine is executed when the process exits with the SIGINT signal.
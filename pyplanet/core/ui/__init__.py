@@ -1,15 +1,33 @@
 import asyncio
 import logging
+import time
+import weakref
 
 from xmlrpc.client import Fault
 
 from pyplanet.apps.core.maniaplanet.models import Player
+from pyplanet.core.ui.components.manialink import ScriptLibrary
+from pyplanet.core.ui.scheduler import UpdateScheduler
+from pyplanet.core.ui.stats import UIStats
 from pyplanet.core.ui.ui_properties import UIProperties
 from pyplanet.utils.log import handle_exception
 
 logger = logging.getLogger(__name__)
 
 
+def _freeze(value):
+	"""
+	Convert the (player) data into a hashable value that can be compared with the data of other players.
+	"""
+	if isinstance(value, dict):
+		return dict, tuple((key, _freeze(item)) for key, item in value.items())
+	if isinstance(value, (list, tuple)):
+		return type(value), tuple(_freeze(item) for item in value)
+	if isinstance(value, (set, frozenset)):
+		return frozenset, frozenset(_freeze(item) for item in value)
+	return value
+
+
 class _BaseUIManager:
 	def __init__(self, instance):
 		"""
@@ -20,32 +38,16 @@ class _BaseUIManager:
 		"""
 		self.instance = instance
 		self.manialinks = dict()
-		self.send_queue = list()
-
-	async def on_start(self):
-		asyncio.ensure_future(self.send_loop())
 
-	async def send_loop(self):
-		while True:
-			await asyncio.sleep(0.25)
-			if len(self.send_queue) == 0:
-				continue
+		# Rate limited updates of the manialinks with a maximum refresh rate.
+		self.scheduler = UpdateScheduler(self)
 
-			# Copy send queue and clear the global one
-			queue = self.send_queue.copy()
-			self.send_queue.clear()
+		# Hashes of the manialink bodies the players have, per manialink id a dict with the login (or None for a global
+		# display) and the hash. Used to skip sending unchanged manialinks.
+		self.body_hashes = dict()
 
-			# Process and push out the queue.
-			try:
-				await self.instance.gbx.multicall(*queue)
-			except Fault as e:
-				if 'Login unknown' in str(e):
-					return
-				logger.exception(e)
-				handle_exception(exception=e, module_name=__name__, func_name='send_loop')
-			except Exception as e:
-				logger.exception(e)
-				handle_exception(exception=e, module_name=__name__, func_name='send_loop')
+	async def on_start(self):
+		pass
 
 	def get_manialink_by_id(self, identifier):
 		"""
@@ -60,34 +62,234 @@ class _BaseUIManager:
 			return self.manialinks[identifier]
 		return None
 
-	async def send(self, manialink, players=None, **kwargs):
+	def is_unchanged(self, manialink, body, login=None):
 		"""
-		Send manialink to player(s).
+		Check if the body is the same as the body that has been send before to the login (or globally). Registers the new
+		hash of the body when changed, or increases the saved bytes of the manialink when unchanged.
+
+		:param manialink: ManiaLink instance.
+		:param body: Full body of the manialink.
+		:param login: Login or None for a global display.
+		:return: Boolean, True when the body could be skipped.
+		"""
+		# Manialinks with a timeout or hidden on click disappear without us knowing, these are always send.
+		if manialink.timeout or manialink.hide_click:
+			return False
+
+		digest = hash((body, manialink.timeout, manialink.hide_click))
+		hashes = self.body_hashes.get(manialink.id)
+		if hashes is not None and hashes.get(login) == digest:
+			manialink.bytes_saved += len(body.encode())
+			return True
+
+		if login is None:
+			# The global display replaces the display of all players.
+			self.body_hashes[manialink.id] = {None: digest}
+		else:
+			if hashes is None:
+				hashes = self.body_hashes[manialink.id] = dict()
+			hashes.pop(None, None)
+			hashes[login] = digest
+		return False
+
+	async def render(self, manialink, player_login=None, player_data=None):
+		"""
+		Render the body of the manialink, the render time is recorded when the UI statistics are enabled.
+
+		:param manialink: ManiaLink instance.
+		:param player_login: Render for the player, None to render globally.
+		:param player_data: Player data to render with, None for the player data of the manialink.
+		:return: Body.
+		"""
+		if not UIStats.enabled:
+			return await manialink.render(player_login=player_login, player_data=player_data)
+
+		started_at = time.perf_counter()
+		body = await manialink.render(player_login=player_login, player_data=player_data)
+		UIStats.record_render(manialink, time.perf_counter() - started_at)
+		return body
+
+	def get_player_count(self):
+		"""
+		Get the number of players a global manialink is send to.
+		"""
+		player_manager = getattr(self.instance, 'player_manager', None)
+		return player_manager.count_all if player_manager is not None else 1
+
+	async def get_binding_queries(self, manialink, logins, player_data=None):
+		"""
+		Get the queries that update the bound values of a dynamic manialink, for the players that have a compatible
+		layout displayed. The layout version is increased for the other players, which get the full manialink.
+
+		:param manialink: Dynamic ManiaLink instance.
+		:param logins: List of logins with the same player data, or [None] for the global display.
+		:param player_data: Player data to get the values with, None for the player data of the manialink.
+		:type manialink: pyplanet.core.ui.components.manialink.DynamicManiaLink
+		:return: Tuple with the list of queries and the list of logins that need the full manialink.
+		"""
+		values = await manialink.get_bindings(player_login=logins[0], player_data=player_data)
+		payloads, remaining, unbound = manialink.get_binding_payloads(logins, values)
+
+		queries = list()
+		for payload, payload_logins in payloads.items():
+			body = manialink.get_binding_body(payload)
+			if payload_logins == [None]:
+				queries.append(self.instance.gbx('SendDisplayManialinkPage', body, 0, False))
+			else:
+				queries.append(self.instance.gbx('SendDisplayManialinkPageToLogin', ','.join(payload_logins), body, 0, False))
+			if UIStats.enabled:
+				UIStats.record_send(
+					manialink, body, self.get_player_count() if payload_logins == [None] else len(payload_logins)
+				)
+
+		if remaining:
+			# The displayed layout could be updated by payloads, the new layout is always send.
+			self.invalidate(manialink, remaining if remaining != [None] else None)
+			manialink.binding_version += 1
+			manialink.set_binding_base(remaining, values)
+
+		# Without bound values the layout is send as usual, so it's skipped when unchanged.
+		return queries, remaining + unbound
+
+	@staticmethod
+	def get_data_key(data, login):
+		"""
+		Get the key of the player data, players with equal keys get the same rendered manialink.
+
+		:param data: Player data dictionary.
+		:param login: Login of the player, used as unique key when the data can't be compared.
+		:return: Hashable key.
+		"""
+		try:
+			key = _freeze(data)
+			hash(key)
+			return key
+		except TypeError:
+			return login
+
+	def invalidate(self, manialink=None, logins=None):
+		"""
+		Invalidate the hashes of the send manialinks, so the next display will be send, even when unchanged.
+
+		:param manialink: ManiaLink instance, or None for all manialinks.
+		:param logins: Logins to invalidate, or None for all players (and the global display).
+		:type manialink: pyplanet.core.ui.components.manialink._ManiaLink
+		"""
+		if manialink is None:
+			identifiers = list(self.body_hashes.keys())
+			manialinks = list(self.manialinks.values())
+		else:
+			identifiers = [manialink.id]
+			manialinks = [manialink]
+
+		# Forget the displayed layouts of the dynamic manialinks.
+		for dynamic in manialinks:
+			if getattr(dynamic, 'data_binding', False):
+				dynamic.reset_bindings(logins)
+
+		for identifier in identifiers:
+			if logins is None:
+				self.body_hashes.pop(identifier, None)
+				continue
+			hashes = self.body_hashes.get(identifier)
+			if hashes is None:
+				continue
+			hashes.pop(None, None)
+			for login in logins:
+				hashes.pop(login, None)
+
+	async def send(self, manialink, players=None, force=False, **kwargs):
+		"""
+		Send manialink to player(s). The manialink is not send to the players that already have the exact same body
+		displayed, unless forced.
+
+		Manialinks with a maximum refresh rate are marked dirty and send (with the state at that moment) by the update
+		scheduler once they are due.
 
 		:param manialink: ManiaLink instance.
 		:param players: Player instances or logins to post to. None to globally send.
+		:param force: Force sending, even if the players already have the same body displayed.
 		:type manialink: pyplanet.core.ui.components.manialink._ManiaLink
 		"""
+		# Register to the manialink context.
+		if manialink.id not in self.manialinks:
+			self.manialinks[manialink.id] = manialink
+
+		if self.scheduler.get_refresh_rate(manialink):
+			logins = [p.login if isinstance(p, Player) else p for p in players] if isinstance(players, list) else None
+			self.scheduler.mark(manialink, logins, force=force)
+			return
+
+		queries = await self.get_queries(manialink, players, force=force)
+		if not queries:
+			return
+
+		# Execute calls, ignore login unknown (player just left).
+		try:
+			await self.execute(queries)
+		except Exception:
+			self.invalidate(manialink)
+			raise
+
+	async def execute(self, queries):
+		"""
+		Execute the queries in a multicall, ignores the login unknown errors (player just left).
+
+		:param queries: List of queries.
+		"""
+		try:
+			await self.instance.gbx.multicall(*queries)
+		except Fault as e:
+			if 'Login unknown' in str(e):
+				return
+			raise
+
+	async def get_queries(self, manialink, players=None, force=False, player_data=None):
+		"""
+		Render the manialink and get the queries to display it to the player(s).
+
+		:param manialink: ManiaLink instance.
+		:param players: Player instances or logins to post to. None to globally send.
+		:param force: Force sending, even if the players already have the same body displayed.
+		:param player_data: Player data to render with, None for the player data of the manialink.
+		:type manialink: pyplanet.core.ui.components.manialink._ManiaLink
+		:return: List of queries.
+		"""
+		if force:
+			self.invalidate(manialink)
+
+		if player_data is None:
+			is_global = await manialink.is_global()
+			player_data = manialink.player_data or dict()
+		else:
+			is_global = not player_data
+
 		queries = list()
 		if isinstance(players, list):
 			for_logins = [p.login if isinstance(p, Player) else p for p in players]
-		elif manialink.player_data:
-			for_logins = list(manialink.player_data.keys())
+		elif player_data:
+			for_logins = list(player_data.keys())
 		else:
 			for_logins = list()
 
-		# Register to the manialink context.
-		if manialink.id not in self.manialinks:
-			self.manialinks[manialink.id] = manialink
-
-		is_global = await manialink.is_global()
 		if not is_global:
+			# Group the players with the same data, the manialink is only rendered once per group.
+			groups = dict()
 			for login in for_logins:
-				if login not in manialink.player_data:
+				if login not in player_data:
 					continue
+				groups.setdefault(self.get_data_key(player_data[login], login), list()).append(login)
+
+			for logins in groups.values():
+				# Update the bound values of the players that have the layout displayed already.
+				if getattr(manialink, 'data_binding', False):
+					binding_queries, logins = await self.get_binding_queries(manialink, logins, player_data)
+					queries.extend(binding_queries)
+					if not logins:
+						continue
 
 				if await manialink.get_template() and not manialink.body:
-					body = await manialink.render(player_login=login)
+					body = await self.render(manialink, player_login=logins[0], player_data=player_data)
 				elif manialink.body:
 					body = manialink.body
 				else:
@@ -95,16 +297,29 @@ class _BaseUIManager:
 
 				# Add manialink tag to body.
 				body = '<manialink version="{}" id="{}">{}</manialink>'.format(manialink.version, manialink.id, body)
+				logins = [login for login in logins if not self.is_unchanged(manialink, body, login)]
+				if not logins:
+					continue
 
-				# Prepare query
+				# Prepare query, the dedicated accepts a comma separated list of logins.
 				queries.append(self.instance.gbx(
-					'SendDisplayManialinkPageToLogin', login, body, manialink.timeout, manialink.hide_click
+					'SendDisplayManialinkPageToLogin', ','.join(logins), body, manialink.timeout, manialink.hide_click
 				))
+				if UIStats.enabled:
+					UIStats.record_send(manialink, body, len(logins))
 
 		else:
+			# Update the bound values of the players that have the layout displayed already.
+			if getattr(manialink, 'data_binding', False):
+				binding_queries, remaining = await self.get_binding_queries(manialink, for_logins or [None])
+				queries.extend(binding_queries)
+				if not remaining:
+					return queries
+				for_logins = [login for login in remaining if login is not None]
+
 			# Render/body
 			if await manialink.get_template() and not manialink.body:
-				body = await manialink.render()
+				body = await self.render(manialink)
 			elif manialink.body:
 				body = manialink.body
 			else:
@@ -115,16 +330,25 @@ class _BaseUIManager:
 
 			# Add normal queries.
 			if for_logins and len(for_logins) > 0:
-				for login in for_logins:
-					# Prepare query
+				logins = [login for login in for_logins if not self.is_unchanged(manialink, body, login)]
+				if logins:
+					# Prepare query, the dedicated accepts a comma separated list of logins.
 					queries.append(self.instance.gbx(
-						'SendDisplayManialinkPageToLogin', login, body, manialink.timeout, manialink.hide_click
+						'SendDisplayManialinkPageToLogin', ','.join(logins), body, manialink.timeout, manialink.hide_click
 					))
-			else:
+					if UIStats.enabled:
+						UIStats.record_send(manialink, body, len(logins))
+			elif not self.is_unchanged(manialink, body):
 				# Prepare query
 				queries.append(self.instance.gbx(
 					'SendDisplayManialinkPage', body, manialink.timeout, manialink.hide_click
 				))
+				if UIStats.enabled:
+					UIStats.record_send(manialink, body, self.get_player_count())
+
+		# Nothing changed for the players.
+		if not queries:
+			return queries
 
 		# Hide ALT menus (shootmania).
 		if self.instance.game.game == 'sm' and manialink.disable_alt_menu:
@@ -139,18 +363,25 @@ class _BaseUIManager:
 					for login in for_logins
 				])
 
-		# It the manialink wants rate limitting with the relaxed updating feature (mostly used for widgets), add to send queue
-		if getattr(manialink, 'relaxed_updating', False):
-			self.send_queue.extend(queries)
-			return
+		return queries
 
-		# Execute calls, ignore login unknown (player just left).
-		try:
-			await self.instance.gbx.multicall(*queries)
-		except Fault as e:
-			if 'Login unknown' in str(e):
-				return
-			raise
+	async def replay(self):
+		"""
+		Send all the displayed manialinks again (after a reconnect with the dedicated server). Player specific manialinks
+		are only send to the players that are still online.
+		"""
+		online_logins = self.instance.player_manager.online_logins
+		for manialink in list(self.manialinks.values()):
+			try:
+				if manialink._is_global_shown:
+					await self.send(manialink, force=True)
+					continue
+
+				logins = [login for login, shown in manialink._is_player_shown.items() if shown and login in online_logins]
+				if logins:
+					await self.send(manialink, logins, force=True)
+			except Exception as e:
+				handle_exception(exception=e, module_name=__name__, func_name='replay')
 
 	async def hide(self, manialink, logins=None):
 		"""
@@ -160,12 +391,24 @@ class _BaseUIManager:
 		:param logins: Logins to post to. None to globally send.
 		:type manialink: pyplanet.core.ui.components.manialink._ManiaLink
 		"""
-		body = '<manialink id="{}"></manialink>'.format(manialink.id)
+		# Send the pending update first when it contains the players we are hiding for, drop it when hiding globally.
+		if self.scheduler.discard(manialink, logins or None):
+			await self.scheduler.flush([manialink.id])
+		self.invalidate(manialink, logins or None)
+		if UIStats.enabled:
+			UIStats.record_hide(manialink)
+
+		bodies = ['<manialink id="{}"></manialink>'.format(manialink.id)]
+		if getattr(manialink, 'data_binding', False):
+			# Remove the page with the last data-binding payload as well.
+			bodies.append('<manialink id="{}__binding"></manialink>'.format(manialink.id))
+
 		queries = list()
 		if logins and len(logins) > 0:
-			queries.append(
+			queries.extend([
 				self.instance.gbx('SendDisplayManialinkPageToLogin', ','.join(logins), body, 0, False)
-			)
+				for body in bodies
+			])
 
 			# Show alt menu again.
 			if self.instance.game.game == 'sm' and manialink.disable_alt_menu:
@@ -174,24 +417,21 @@ class _BaseUIManager:
 					for login in logins
 				])
 		else:
-			queries.append(self.instance.gbx('SendDisplayManialinkPage', body, 0, False))
+			queries.extend([self.instance.gbx('SendDisplayManialinkPage', body, 0, False) for body in bodies])
 			if self.instance.game.game == 'sm' and manialink.disable_alt_menu:
 				queries.extend([
 					self.instance.gbx('Maniaplanet.UI.SetAltScoresTableVisibility', player.login, 'true', encode_json=False, response_id=False)
 					for player in self.instance.player_manager.online
 				])
 
-		# It the manialink wants rate limitting with the relaxed updating feature (mostly used for widgets), add to send queue
-		if getattr(manialink, 'relaxed_updating', False):
-			self.send_queue.extend(queries)
-			return
-
 		# Execute queries.
 		await self.instance.gbx.multicall(*queries)
 
 	async def destroy(self, manialink, logins=None):
 		if manialink.id in self.manialinks:
 			del self.manialinks[manialink.id]
+		self.body_hashes.pop(manialink.id, None)
+		self.scheduler.forget(manialink)
 		return await self.hide(manialink, logins)
 
 
@@ -201,15 +441,60 @@ class GlobalUIManager(_BaseUIManager):
 		self.app_managers = dict()
 		self.properties = UIProperties(self.instance)
 
+		# Manialink id with a (weak) set of the manialinks displayed with that id.
+		self.routes = dict()
+
+		# Shared ManiaScript, send once to every player.
+		self.library = ScriptLibrary(self)
+
 	async def on_start(self):
 		await super().on_start()
 		await self.properties.on_start()
 
+		# Route the manialink answers to the manialinks.
+		self.instance.signals.listen('maniaplanet:manialink_answer', self.handle_answer)
+
+		# Forget the displayed manialinks of connecting and disconnecting players.
+		self.instance.signals.listen('maniaplanet:player_connect', self.handle_connect)
+		self.instance.signals.listen('maniaplanet:player_disconnect', self.handle_connection)
+
+		# Send the script library to the players.
+		await self.library.display()
+
 		# Start app ui managers.
 		await asyncio.gather(*[
 			m.on_start() for m in self.app_managers.values()
 		])
 
+	async def replay(self):
+		await super().replay()
+		for app_manager in self.app_managers.values():
+			await app_manager.replay()
+
+	def invalidate(self, manialink=None, logins=None):
+		super().invalidate(manialink, logins)
+		if manialink is None:
+			for app_manager in self.app_managers.values():
+				app_manager.invalidate(logins=logins)
+
+	async def handle_connection(self, player, **kwargs):
+		"""
+		Invalidate the send manialinks of the player that connects or disconnects. This also invalidates the global
+		displays, as the connecting player doesn't have them yet.
+
+		:param player: Player instance.
+		"""
+		self.invalidate(logins=[player.login])
+
+	async def handle_connect(self, player, **kwargs):
+		"""
+		Forget the send manialinks of the player that connects and send the script library to the player.
+
+		:param player: Player instance.
+		"""
+		await self.handle_connection(player)
+		await self.send(self.library, [player.login])
+
 	def get_manialink_by_id(self, identifier):
 		"""
 		Get Manialink instance by ManiaLink identifier. (From all apps ui managers as well).
@@ -228,6 +513,73 @@ class GlobalUIManager(_BaseUIManager):
 			if app_manialink is not None:
 				return app_manialink
 
+	def add_route(self, manialink):
+		"""
+		Route the actions of the manialink to the manialink. The manialink is weak referenced and will be removed from
+		the routes when it's garbage collected.
+
+		:param manialink: ManiaLink instance.
+		:type manialink: pyplanet.core.ui.components.manialink._ManiaLink
+		"""
+		if manialink.id not in self.routes:
+			self.routes[manialink.id] = weakref.WeakSet()
+		self.routes[manialink.id].add(manialink)
+
+	def remove_route(self, manialink):
+		"""
+		Remove the routing of the actions to the manialink.
+
+		:param manialink: ManiaLink instance.
+		:type manialink: pyplanet.core.ui.components.manialink._ManiaLink
+		"""
+		routes = self.routes.get(manialink.id)
+		if routes is not None:
+			routes.discard(manialink)
+			if not routes:
+				del self.routes[manialink.id]
+
+	def get_routes(self, action):
+		"""
+		Get the manialinks to route the action to. The actions are prefixed with the manialink id and two underscores. As
+		the manialink ids can contain underscores too, the prefixes are tried from the longest to the shortest.
+
+		:param action: Action string.
+		:return: List with ManiaLink instances.
+		"""
+		idx = len(action)
+		while idx > 0:
+			routes = self.routes.get(action[:idx])
+			if routes:
+				return list(routes)
+			idx = action.rfind('__', 0, idx)
+		return list()
+
+	async def handle_answer(self, player, action, values, **kwargs):
+		"""
+		Handle the manialink answer and route it to the manialink(s) with the id of the action. When multiple manialinks
+		with the same id exist, only the manialinks shown to the player are getting the answer.
+
+		:param player: Player instance.
+		:param action: Action string.
+		:param values: Values provided by the user client.
+		"""
+		manialinks = self.get_routes(action)
+		if not manialinks:
+			return
+
+		if len(manialinks) > 1 and player:
+			shown = [
+				manialink for manialink in manialinks
+				if manialink._is_global_shown or player.login in manialink._is_player_shown
+			]
+			manialinks = shown or manialinks
+
+		for manialink in manialinks:
+			try:
+				await manialink.handle(player, action, values, **kwargs)
+			except Exception as e:
+				handle_exception(exception=e, module_name=__name__, func_name='handle_answer')
+
 	def create_app_manager(self, app_config):
 		"""
 		Create app ui manager.
@@ -1,7 +1,8 @@
 
-from .manialink import StaticManiaLink, DynamicManiaLink
+from .manialink import StaticManiaLink, DynamicManiaLink, ScriptLibrary
 
 __all__ = [
 	'StaticManiaLink',
 	'DynamicManiaLink',
+	'ScriptLibrary',
 ]
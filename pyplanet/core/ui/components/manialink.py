@@ -1,20 +1,24 @@
 import asyncio
+import json
+import re
 import uuid
 import logging
 
 from asyncio import iscoroutinefunction
 
-from pyplanet.core.events import SignalManager
 from pyplanet.core.ui.exceptions import ManialinkMemoryLeakException
-from pyplanet.core.ui.template import Template
+from pyplanet.core.ui.template import Template, load_template
 
 logger = logging.getLogger(__name__)
 
 
 class _ManiaLink:
+	#: Maximum number of updates per second send to the players, None to send every update directly.
+	max_refresh_rate = None
+
 	def __init__(
 		self, manager=None, id=None, version='3', body=None, template=None, timeout=0, hide_click=False, data=None,
-		player_data=None, disable_alt_menu=False, throw_exceptions=False, relaxed_updating=False,
+		player_data=None, disable_alt_menu=False, throw_exceptions=False, relaxed_updating=False, max_refresh_rate=None,
 	):
 		"""
 		Create manialink (USE THE MANAGER CREATE, DONT INIT DIRECTLY!
@@ -31,6 +35,9 @@ class _ManiaLink:
 		a global manialink instead of per person.
 		:param throw_exceptions: Throw exceptions during handling and executing of action handlers.
 		:param relaxed_updating: Relaxed updating will rate limit the amount of updates send to clients.
+			Deprecated, use max_refresh_rate instead.
+		:param max_refresh_rate: Maximum number of updates per second, the latest state is send when the manialink is
+			updated more often. The interval is increased automatically with many players, lag or in performance mode.
 		:type manager: pyplanet.core.ui.AppUIManager
 		:type template: pyplanet.core.ui.template.Template
 		:type id: str
@@ -49,8 +56,11 @@ class _ManiaLink:
 		self.throw_exceptions = False
 		self.disable_alt_menu = bool(disable_alt_menu)
 		self.relaxed_updating = relaxed_updating
+		if max_refresh_rate is not None:
+			self.max_refresh_rate = max_refresh_rate
 
 		self.receivers = dict()
+		self.bytes_saved = 0  # Number of bytes not send because the players already had the same body.
 		self._is_global_shown = False
 		self._is_player_shown = dict()  # Holds per player login a boolean if the ml is shown.
 
@@ -98,7 +108,14 @@ class _ManiaLink:
 			payload_data.update(player_data.get(player_login, dict()))
 
 		# Render and save in content.
-		return await template.render(**payload_data)
+		body = await template.render(**payload_data)
+
+		if template.minified and logger.isEnabledFor(logging.DEBUG):
+			original = await template.render_original(**payload_data)
+			logger.debug('Manialink {} ({}) minified from {} to {} bytes.'.format(
+				self.id, template.file, len(original.encode()), len(body.encode())
+			))
+		return body
 
 	async def display(self, player_logins=None, **kwargs):
 		"""
@@ -106,6 +123,7 @@ class _ManiaLink:
 		the data given and stored!
 
 		:param player_logins: Only display to the list of player logins given.
+		:param force: Give ``force=True`` to send even when the players already have the exact same manialink displayed.
 		"""
 		if player_logins:
 			for login in player_logins:
@@ -114,8 +132,8 @@ class _ManiaLink:
 			self._is_global_shown = True
 
 		if not self.__register_listener:
-			# Register handle
-			SignalManager.listen('maniaplanet:manialink_answer', self.handle)
+			# Register the route of our actions.
+			self.manager.instance.ui_manager.add_route(self)
 			self.__register_listener = True
 
 		return await self.manager.send(self, player_logins, **kwargs)
@@ -198,7 +216,7 @@ class _ManiaLink:
 		Will also hide the Manialink for all users!
 		"""
 		try:
-			SignalManager.get_signal('maniaplanet:manialink_answer').unregister(self.handle)
+			self.manager.instance.ui_manager.remove_route(self)
 		except Exception as e:
 			logging.exception(e)
 		try:
@@ -218,7 +236,7 @@ class _ManiaLink:
 		be executed at the same time. Be aware with this one!
 		"""
 		try:
-			SignalManager.get_signal('maniaplanet:manialink_answer').unregister(self.handle)
+			self.manager.instance.ui_manager.remove_route(self)
 			asyncio.ensure_future(self.manager.destroy(self))
 		except Exception as e:
 			logging.exception(e)
@@ -243,11 +261,147 @@ class DynamicManiaLink(_ManiaLink):
 	The DynamicManiaLink is a special manialink with data-bindings and automatically updates via maniascript.
 	Please use the ``View`` classes instead!
 
-	.. warning ::
+	The layout (template and script) is only send when needed, updates of the bound values are send as a compact payload
+	that is applied to the displayed layout by ManiaScript. The bound values are the values of labels (by element id),
+	returned by :meth:`get_bindings`. The layout is send again when the set of bound elements changes.
+
+	The template script should include ``core.views/libs/DataBinding.Script.Txt`` in the main loop to apply the
+	payloads, the widget scripts already include it.
+	"""
+
+	data_binding = True
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.binding_version = 0
+
+		# Per login (None for global) a list with the version of the layout, the values of the layout, the keys changed
+		# since sending the layout and the last payload.
+		self.binding_states = dict()
+
+	@property
+	def binding_key(self):
+		return re.sub(r'\W', '_', self.id)
+
+	async def get_bindings(self, player_login=None, player_data=None):
+		"""
+		Get the bound values, override this method. Return a dictionary with the element id of a label as key and the
+		text as value. Should contain the same values as the rendered template.
+
+		:param player_login: Player login or None for the global values.
+		:param player_data: Player data to use, None for the player data of the manialink.
+		:return: Dictionary with the element ids and values.
+		"""
+		return dict()
+
+	async def render(self, *args, **kwargs):
+		self.data['_binding'] = dict(key=self.binding_key, version=self.binding_version)
+		return await super().render(*args, **kwargs)
+
+	def get_binding_payloads(self, logins, values):
+		"""
+		Get the payloads to update the players that have a compatible layout displayed. The payloads contain all values
+		that are changed since the layout has been send, so a missed payload doesn't matter.
+
+		:param logins: List of logins, or [None] for the global display.
+		:param values: The current bound values.
+		:return: Tuple with a dict of payload and list of logins, the list of logins that need a new layout and the list
+				 of logins that have a layout without bound values displayed.
+		"""
+		payloads = dict()
+		remaining = list()
+		unbound = list()
+		for login in logins:
+			state = self.binding_states.get(login) or self.binding_states.get(None)
+			if state is None or state[1].keys() != values.keys():
+				remaining.append(login)
+				continue
+
+			version, base, changed, last_payload = state
+			if login not in self.binding_states:
+				state = self.binding_states[login] = [version, base, set(changed), last_payload]
+			if not values:
+				unbound.append(login)
+				continue
+
+			changed = state[2]
+			changed.update(key for key, value in values.items() if base[key] != value)
+			if not changed:
+				continue
+
+			payload = dict((key, values[key]) for key in changed)
+			payload['_v'] = str(version)
+			payload = json.dumps(payload, sort_keys=True)
+			if payload == state[3]:
+				continue
+			state[3] = payload
+			payloads.setdefault(payload, list()).append(login)
+		return payloads, remaining, unbound
+
+	def set_binding_base(self, logins, values):
+		"""
+		Register the values of the (new) layout that is send to the logins.
+
+		:param logins: List of logins, or [None] for the global display.
+		:param values: The bound values of the layout.
+		"""
+		if logins == [None]:
+			self.binding_states.clear()
+		else:
+			self.binding_states.pop(None, None)
+		for login in logins:
+			self.binding_states[login] = [self.binding_version, values, set(), None]
+
+	def reset_bindings(self, logins=None):
+		"""
+		Forget the displayed layouts, the next update will send the layout again.
+
+		:param logins: Logins or None for all players.
+		"""
+		if logins is None:
+			self.binding_states.clear()
+			return
+		self.binding_states.pop(None, None)
+		for login in logins:
+			self.binding_states.pop(login, None)
 
-		This feature is not yet implemented.
+	def get_binding_body(self, payload):
+		"""
+		Get the manialink body that sets the payload on the client.
 
+		:param payload: Payload (json).
+		:return: Manialink body.
+		"""
+		return (
+			'<manialink version="{version}" id="{id}__binding"><script><!--\n'
+			'main() {{ declare Text PyPlanet_Binding_{key} for LocalUser; PyPlanet_Binding_{key} = """{payload}"""; }}\n'
+			'--></script></manialink>'
+		).format(version=self.version, id=self.id, key=self.binding_key, payload=self.escape_payload(payload))
+
+	@staticmethod
+	def escape_payload(payload):
+		"""
+		Escape the payload (flat json object) for a ManiaScript triple quoted string. The braces in the values are
+		escaped, as the string would interpolate ``{{{ ... }}}``, and so is the end of the XML comment around the script.
+
+		:param payload: Payload (json).
+		:return: Escaped payload.
+		"""
+		content = payload[1:-1].replace('{', '\\u007b').replace('}', '\\u007d').replace('-->', '--\\u003e')
+		return payload[0] + content + payload[-1]
+
+
+class ScriptLibrary(StaticManiaLink):
+	"""
+	The script library manialink is send once to every player (on connect). It contains the ManiaScript that would
+	otherwise be part of many manialinks, and shares its state with the other manialinks by ``LocalUser`` variables.
+	The manialinks only include the small client libs, like ``core.views/libs/Widgets.Script.Txt``.
 	"""
-	def __init__(self, id):
-		super().__init__(id)
-		raise NotImplementedError
+
+	template_name = 'core.views/libs/library.xml'
+
+	def __init__(self, manager):
+		super().__init__(manager=manager, id='pyplanet__library')
+
+	async def get_template(self):
+		return await load_template(self.template_name)
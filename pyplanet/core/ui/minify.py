@@ -0,0 +1,151 @@
+"""
+Minification of the manialink templates. The template sources are minified before compiling, so the static parts of the
+templates are only minified once and the rendered manialinks don't contain the indentation, comments and whitespace of
+the templates anymore.
+
+The Jinja2 tags and the ManiaScript strings are always kept as they are.
+"""
+import re
+
+from jinja2.ext import Extension
+
+#: Start and end of the Jinja2 tags, kept as they are.
+JINJA_TAGS = {'{{': '}}', '{%': '%}', '{#': '#}'}
+
+#: Version of the minification, increase when the output changes so the cached compiled templates aren't used anymore.
+MINIFY_VERSION = 1
+
+#: Template extensions (lower case) that contain ManiaScript.
+SCRIPT_EXTENSIONS = ('.txt', '.ms')
+
+_script_regex = re.compile(r'(<script[^>]*>)(.*?)(</script>)', re.DOTALL | re.IGNORECASE)
+_comment_regex = re.compile(r'<!--(.*?)-->', re.DOTALL)
+_raw_regex = re.compile(r'{%-?\s*raw\s*-?%}')
+_endraw_regex = re.compile(r'{%-?\s*endraw\s*-?%}')
+_newline_regex = re.compile(r'[ \t]*(?:\r?\n[ \t]*)+')
+_space_regex = re.compile(r'[ \t]+')
+
+
+def _find_end(source, position, token):
+	end = source.find(token, position)
+	return len(source) if end < 0 else end + len(token)
+
+
+def _compress_code(code):
+	code = _newline_regex.sub('\n', code)
+	return _space_regex.sub(' ', code)
+
+
+def minify_script(source):
+	"""
+	Minify ManiaScript source. Removes the comments, indentation and empty lines. The line breaks are kept as the
+	directives (``#Include``, ``#Const``) must be on their own line.
+
+	:param source: ManiaScript source, may contain Jinja2 tags.
+	:return: Minified source.
+	"""
+	output = list()
+	code = list()
+	position = 0
+	length = len(source)
+
+	def keep(end):
+		output.append(_compress_code(''.join(code)))
+		code.clear()
+		output.append(source[position:end])
+
+	while position < length:
+		char = source[position]
+		pair = source[position:position + 2]
+
+		if pair in JINJA_TAGS:
+			# Raw blocks are kept until the end of the block.
+			match = _raw_regex.match(source, position)
+			if match:
+				end_match = _endraw_regex.search(source, match.end())
+				end = end_match.end() if end_match else length
+			else:
+				end = _find_end(source, position + 2, JINJA_TAGS[pair])
+			keep(end)
+			position = end
+		elif source.startswith('"""', position):
+			end = _find_end(source, position + 3, '"""')
+			keep(end)
+			position = end
+		elif char == '"':
+			end = position + 1
+			while end < length and source[end] not in '"\n':
+				end += 2 if source[end] == '\\' else 1
+			end = min(end + 1, length)
+			keep(end)
+			position = end
+		elif pair == '//':
+			end = source.find('\n', position)
+			position = length if end < 0 else end
+		elif pair == '/*':
+			position = _find_end(source, position + 2, '*/')
+			code.append(' ')
+		else:
+			code.append(char)
+			position += 1
+
+	output.append(_compress_code(''.join(code)))
+	return ''.join(output).strip()
+
+
+def _minify_markup(source):
+	# Remove the comments, unless they contain template logic.
+	source = _comment_regex.sub(
+		lambda match: match.group(0) if any(tag in match.group(1) for tag in JINJA_TAGS) else '', source
+	)
+
+	# Remove the indentation and empty lines. Lines are only joined without a space between tags.
+	result = ''
+	for line in source.splitlines():
+		line = line.strip()
+		if not line:
+			continue
+		if result and not result.endswith('>') and not line.startswith('<'):
+			result += ' '
+		result += line
+	return result
+
+
+def minify_xml(source):
+	"""
+	Minify the manialink XML source. Removes the comments, indentation and whitespace between the elements and minifies
+	the embedded scripts.
+
+	:param source: XML source, may contain Jinja2 tags.
+	:return: Minified source.
+	"""
+	output = list()
+	position = 0
+	for match in _script_regex.finditer(source):
+		output.append(_minify_markup(source[position:match.start()]))
+		output.append(match.group(1) + minify_script(match.group(2)) + match.group(3))
+		position = match.end()
+	output.append(_minify_markup(source[position:]))
+	return ''.join(output)
+
+
+def minify_template(source, name=None):
+	"""
+	Minify the template source, based on the file extension of the template name.
+
+	:param source: Template source.
+	:param name: Template name.
+	:return: Minified source.
+	"""
+	if name and name.lower().endswith(SCRIPT_EXTENSIONS):
+		return minify_script(source)
+	return minify_xml(source)
+
+
+class MinifyExtension(Extension):
+	"""
+	Jinja2 extension that minifies the template sources before compiling.
+	"""
+
+	def preprocess(self, source, name, filename=None):
+		return minify_template(source, name)
@@ -0,0 +1,221 @@
+"""
+The update scheduler limits the number of updates of the manialinks that have a maximum refresh rate (mostly widgets).
+Instead of sending every update, the manialinks and players are marked dirty and the latest state is rendered and send
+once the manialink is due.
+"""
+import asyncio
+import logging
+
+from pyplanet.utils.log import handle_exception
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateScheduler:
+	"""
+	Scheduler of the rate limited manialink updates of an UI manager.
+
+	The flush interval of a manialink is based on the maximum refresh rate of the manialink and is increased when there
+	are many players, when the event loop is lagging and in performance mode.
+	"""
+
+	#: Refresh rate (per second) of the manialinks with the (deprecated) ``relaxed_updating`` flag.
+	RELAXED_REFRESH_RATE = 4
+
+	#: Maximum factor the interval will be multiplied with.
+	MAX_FACTOR = 8
+
+	def __init__(self, manager):
+		"""
+		:param manager: UI Manager instance.
+		:type manager: pyplanet.core.ui._BaseUIManager
+		"""
+		self.manager = manager
+
+		# Dirty manialinks, per manialink id a list with the manialink, the set of dirty logins (None for all), force and
+		# the snapshot of the player data of the dirty logins.
+		self.dirty = dict()
+		self.last_sent = dict()
+
+		# Average lag of the event loop (seconds) measured at the flushes.
+		self.lag = 0
+		self._handle = None
+		self._handle_at = None
+
+	@classmethod
+	def get_refresh_rate(cls, manialink):
+		"""
+		Get the maximum refresh rate (updates per second) of the manialink.
+
+		:param manialink: ManiaLink instance.
+		:return: Refresh rate or None for no limit.
+		"""
+		refresh_rate = getattr(manialink, 'max_refresh_rate', None)
+		if refresh_rate:
+			return refresh_rate
+		if getattr(manialink, 'relaxed_updating', False):
+			return cls.RELAXED_REFRESH_RATE
+		return None
+
+	def get_factor(self):
+		"""
+		Get the factor to multiply the intervals with, based on the number of players, the lag of the event loop and the
+		performance mode.
+		"""
+		factor = 1 + self.lag / 0.05
+		player_manager = getattr(self.manager.instance, 'player_manager', None)
+		if player_manager is not None:
+			factor += player_manager.count_all / 100
+			if player_manager.performance_mode:
+				factor *= 2
+		return min(factor, self.MAX_FACTOR)
+
+	def get_interval(self, manialink):
+		"""
+		Get the current minimal interval between two updates of the manialink.
+
+		:param manialink: ManiaLink instance.
+		:return: Interval in seconds, None when the manialink isn't rate limited.
+		"""
+		refresh_rate = self.get_refresh_rate(manialink)
+		if not refresh_rate:
+			return None
+		return self.get_factor() / refresh_rate
+
+	def mark(self, manialink, logins=None, force=False):
+		"""
+		Mark the manialink dirty for the logins, the latest state of the manialink will be send when it's due.
+
+		:param manialink: ManiaLink instance.
+		:param logins: Logins or None for all players (or the players in the player data).
+		:param force: Force sending even if the players already have the same body displayed.
+		"""
+		entry = self.dirty.get(manialink.id)
+		if entry is None:
+			entry = self.dirty[manialink.id] = [manialink, set(logins) if logins is not None else None, force, dict()]
+		else:
+			if entry[1] is not None:
+				if logins is None:
+					entry[1] = None
+				else:
+					entry[1].update(logins)
+			entry[0] = manialink
+			entry[2] = entry[2] or force
+
+		# Snapshot the player data of the marked players, as the player data can be replaced by a display for other
+		# players before the update is send.
+		player_data = manialink.player_data or dict()
+		if logins is None:
+			entry[3] = dict(player_data)
+		else:
+			entry[3].update((login, player_data[login]) for login in logins if login in player_data)
+		self.schedule()
+
+	def discard(self, manialink, logins=None):
+		"""
+		Discard the pending update of the manialink for the logins.
+
+		:param manialink: ManiaLink instance.
+		:param logins: Logins or None to discard the update completely.
+		:return: Boolean if the pending update still contains (all) the players and must be send before hiding.
+		"""
+		entry = self.dirty.get(manialink.id)
+		if entry is None:
+			return False
+		if logins is None:
+			del self.dirty[manialink.id]
+			return False
+		for login in logins:
+			entry[3].pop(login, None)
+		if entry[1] is None:
+			return True
+
+		entry[1].difference_update(logins)
+		if not entry[1]:
+			del self.dirty[manialink.id]
+		return False
+
+	def forget(self, manialink):
+		self.dirty.pop(manialink.id, None)
+		self.last_sent.pop(manialink.id, None)
+
+	def prune(self, now):
+		"""
+		Forget the send times that don't delay the next update anymore, or of manialinks that are gone.
+
+		:param now: Current loop time.
+		"""
+		for identifier, sent_at in list(self.last_sent.items()):
+			if identifier in self.dirty:
+				continue
+			manialink = self.manager.manialinks.get(identifier)
+			if manialink is None or sent_at + (self.get_interval(manialink) or 0) <= now:
+				del self.last_sent[identifier]
+
+	def get_due_at(self, identifier):
+		manialink = self.dirty[identifier][0]
+		last_sent = self.last_sent.get(identifier)
+		if last_sent is None:
+			return 0
+		return last_sent + (self.get_interval(manialink) or 0)
+
+	def schedule(self):
+		"""
+		Schedule the next flush at the moment the first dirty manialink is due.
+		"""
+		if not self.dirty:
+			return
+		loop = asyncio.get_event_loop()
+		due_at = max(min(self.get_due_at(identifier) for identifier in self.dirty), loop.time())
+		if self._handle is not None:
+			if self._handle_at <= due_at:
+				return
+			self._handle.cancel()
+
+		self._handle_at = due_at
+		self._handle = loop.call_at(due_at, self._wakeup)
+
+	def _wakeup(self):
+		now = asyncio.get_event_loop().time()
+		self.lag = self.lag * 0.8 + max(0, now - self._handle_at) * 0.2
+		self._handle = self._handle_at = None
+		asyncio.ensure_future(self.flush())
+
+	async def flush(self, identifiers=None):
+		"""
+		Render and send the dirty manialinks that are due (or the given manialinks) in a single multicall.
+
+		:param identifiers: Manialink identifiers to send, None to send all due manialinks.
+		"""
+		now = asyncio.get_event_loop().time()
+		if identifiers is None:
+			identifiers = [identifier for identifier in self.dirty if self.get_due_at(identifier) <= now]
+
+		entries = [self.dirty.pop(identifier) for identifier in identifiers if identifier in self.dirty]
+		queries = list()
+		for manialink, logins, force, snapshot in entries:
+			self.last_sent[manialink.id] = now
+
+			# Render the marked players whose data has been replaced meanwhile with their snapshot, the latest data is
+			# used for the other players. The player data of the manialink itself is left as it is.
+			player_data = None
+			if snapshot and manialink.player_data:
+				player_data = dict(snapshot)
+				player_data.update(manialink.player_data)
+			try:
+				queries.extend(await self.manager.get_queries(
+					manialink, list(logins) if logins is not None else None, force=force, player_data=player_data
+				))
+			except Exception as e:
+				handle_exception(exception=e, module_name=__name__, func_name='flush')
+
+		# Schedule the remaining and the meanwhile changed manialinks.
+		self.prune(now)
+		self.schedule()
+
+		if queries:
+			try:
+				await self.manager.execute(queries)
+			except Exception as e:
+				logger.exception(e)
+				handle_exception(exception=e, module_name=__name__, func_name='flush')
@@ -0,0 +1,169 @@
+"""
+Optional accounting of the bandwidth and render cost of the manialinks. When enabled, the render time, send bytes, number
+of target players and number of sends are recorded per manialink (and app).
+
+The accounting is disabled by default. Enable it with the ``UI_STATS`` setting or at runtime with the ``//uistats on``
+admin command.
+"""
+import time
+
+
+class ManialinkStats:
+	"""
+	Statistics of a single manialink.
+	"""
+
+	def __init__(self, identifier, app_label):
+		self.id = identifier
+		self.app_label = app_label
+
+		self.renders = 0
+		self.render_time = 0
+		self.render_max = 0
+		self.sends = 0
+		self.logins = 0
+		self.bytes = 0
+		self.body_bytes = 0
+		self.hides = 0
+
+	@property
+	def render_average(self):
+		return self.render_time / self.renders if self.renders else 0
+
+	@property
+	def logins_average(self):
+		return self.logins / self.sends if self.sends else 0
+
+	def get_sends_per_minute(self, elapsed):
+		"""
+		:param elapsed: Seconds since the statistics are recorded.
+		:return: Average number of sends per minute.
+		"""
+		return self.sends / (elapsed / 60) if elapsed > 0 else 0
+
+	def as_dict(self, elapsed):
+		return dict(
+			id=self.id, app=self.app_label, renders=self.renders, render_time=self.render_time,
+			render_average=self.render_average, render_max=self.render_max, sends=self.sends,
+			sends_per_minute=self.get_sends_per_minute(elapsed), logins=self.logins, logins_average=self.logins_average,
+			bytes=self.bytes, body_bytes=self.body_bytes, hides=self.hides,
+		)
+
+
+class _UIStats:
+	"""
+	UI bandwidth and render cost statistics.
+
+	.. note::
+
+		Access this via ``pyplanet.core.ui.stats.UIStats``.
+
+	"""
+
+	def __init__(self):
+		self.enabled = False
+		self.started_at = None
+		self.manialinks = dict()
+
+	def configure(self, enabled=False):
+		"""
+		Configure the statistics.
+
+		:param enabled: Enable the accounting.
+		"""
+		if enabled:
+			self.enable()
+		else:
+			self.disable()
+
+	def enable(self):
+		if not self.enabled:
+			self.started_at = time.time()
+		self.enabled = True
+
+	def disable(self):
+		self.enabled = False
+
+	def reset(self):
+		self.manialinks = dict()
+		self.started_at = time.time() if self.enabled else None
+
+	@property
+	def elapsed(self):
+		return time.time() - self.started_at if self.started_at else 0
+
+	def get_stats(self, manialink):
+		"""
+		Get the statistics of the manialink, keyed by the app label and manialink id.
+
+		:param manialink: ManiaLink instance.
+		:rtype: pyplanet.core.ui.stats.ManialinkStats
+		"""
+		app = getattr(manialink.manager, 'app', None)
+		app_label = getattr(app, 'label', None) or 'core'
+
+		key = (app_label, manialink.id)
+		stats = self.manialinks.get(key, None)
+		if stats is None:
+			stats = self.manialinks[key] = ManialinkStats(manialink.id, app_label)
+		return stats
+
+	def record_render(self, manialink, duration):
+		"""
+		Record a single render of the manialink.
+
+		:param manialink: ManiaLink instance.
+		:param duration: Duration in seconds.
+		"""
+		stats = self.get_stats(manialink)
+		stats.renders += 1
+		stats.render_time += duration
+		if duration > stats.render_max:
+			stats.render_max = duration
+
+	def record_send(self, manialink, body, logins):
+		"""
+		Record a send of the manialink (or an update of it).
+
+		:param manialink: ManiaLink instance.
+		:param body: Body that is send.
+		:param logins: Number of players the body is send to.
+		"""
+		stats = self.get_stats(manialink)
+		stats.body_bytes = len(body.encode())
+		stats.sends += 1
+		stats.logins += logins
+		stats.bytes += stats.body_bytes * logins
+
+	def record_hide(self, manialink):
+		"""
+		Record hiding the manialink.
+
+		:param manialink: ManiaLink instance.
+		"""
+		self.get_stats(manialink).hides += 1
+
+	def get_top(self, count=None, order_by='bytes'):
+		"""
+		Get the most expensive manialinks.
+
+		:param count: Number of manialinks, None for all.
+		:param order_by: Attribute to order by: 'bytes', 'render_time', 'sends' or 'logins'.
+		:return: List of manialink statistics.
+		:rtype: list of pyplanet.core.ui.stats.ManialinkStats
+		"""
+		top = sorted(self.manialinks.values(), key=lambda stats: getattr(stats, order_by), reverse=True)
+		return top[:count] if count else top
+
+	def dump(self):
+		"""
+		Get the statistics as a JSON serializable dictionary.
+		"""
+		elapsed = self.elapsed
+		return dict(
+			enabled=self.enabled, started_at=self.started_at, elapsed=elapsed,
+			manialinks=[stats.as_dict(elapsed) for stats in self.get_top()],
+		)
+
+
+UIStats = _UIStats()
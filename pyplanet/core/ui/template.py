@@ -1,28 +1,100 @@
-from jinja2 import Environment, select_autoescape
+import logging
+import os
+
+from jinja2 import Environment, FileSystemBytecodeCache, select_autoescape
 
 from pyplanet.conf import settings
 from pyplanet.core.ui.loader import PyPlanetLoader
+from pyplanet.core.ui.minify import MINIFY_VERSION, MinifyExtension
+
+logger = logging.getLogger(__name__)
 
 
 async def load_template(file):
-	return Template(file)
+	return EnvironmentManager.get_template(file)
 
 
 class _EnvironmentManager:
 	def __init__(self):
 		self._environment = None
+		self._original_environment = None
+
+		# Compiled templates by name. Only checked for changes when auto reloading (debug mode).
+		self.templates = dict()
 
 	@property
 	def environment(self):
 		if not self._environment:
+			minify = bool(settings.TEMPLATE_MINIFY)
 			self._environment = Environment(
 				enable_async=True,
 				loader=PyPlanetLoader.get_loader(),
 				autoescape=select_autoescape(['html', 'xml', 'Txt', 'txt', 'ml', 'ms', 'script.txt', 'Script.Txt']),
 				auto_reload=bool(settings.DEBUG),
+				bytecode_cache=self.get_bytecode_cache(minify),
+				extensions=[MinifyExtension] if minify else [],
 			)
 		return self._environment
 
+	@property
+	def original_environment(self):
+		"""
+		Environment without minification, only used to report the minified sizes in the debug logs.
+		"""
+		if not self._original_environment:
+			self._original_environment = Environment(
+				enable_async=True,
+				loader=self.environment.loader,
+				autoescape=self.environment.autoescape,
+				auto_reload=self.environment.auto_reload,
+			)
+		return self._original_environment
+
+	@staticmethod
+	def get_bytecode_cache(minify=False):
+		"""
+		Get the on-disk bytecode cache of the compiled templates, stored in the ``templates`` folder of the ``TMP_PATH``.
+		This will prevent compiling all templates again after restarting.
+
+		:param minify: Are the templates minified, the minified templates are cached in a separate folder per version of
+		               the minification.
+		:return: Bytecode cache or None when disabled or the folder can't be created.
+		"""
+		if not settings.TEMPLATE_BYTECODE_CACHE or not settings.TMP_PATH:
+			return None
+
+		path = os.path.join(
+			settings.TMP_PATH, 'templates', 'minified-{}'.format(MINIFY_VERSION) if minify else 'original'
+		)
+		try:
+			os.makedirs(path, exist_ok=True)
+		except OSError as e:
+			logger.warning('Can\'t create the template cache folder {}: {}'.format(path, str(e)))
+			return None
+		return FileSystemBytecodeCache(path)
+
+	def get_template(self, file):
+		"""
+		Get the template instance of the file, compiled templates are reused.
+
+		:param file: Template file name (with prefix).
+		:return: Template instance.
+		:rtype: pyplanet.core.ui.template.Template
+		"""
+		template = self.templates.get(file)
+		if template is not None and (not self.environment.auto_reload or template.template.is_up_to_date):
+			return template
+
+		template = self.templates[file] = Template(file)
+		return template
+
+	def clear(self):
+		"""
+		Clear the compiled templates.
+		"""
+		self.templates.clear()
+		self._original_environment = None
+
 EnvironmentManager = _EnvironmentManager()
 
 
@@ -46,6 +118,14 @@ class Template:
 		self.file = file
 		self.env = EnvironmentManager.environment
 		self.template = self.env.get_template(file)
+		self.minified = any(isinstance(extension, MinifyExtension) for extension in self.env.extensions.values())
 
 	async def render(self, **data):
 		return await self.template.render_async(**data)
+
+	async def render_original(self, **data):
+		"""
+		Render the template without minification, to compare the sizes.
+		"""
+		template = EnvironmentManager.original_environment.get_template(self.file)
+		return await template.render_async(**data)
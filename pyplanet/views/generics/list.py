@@ -1,6 +1,8 @@
 import math
+import operator
 import re
 import logging
+import time
 import pandas as pd
 import numpy as np
 
@@ -71,6 +73,16 @@ class ListView(TemplateView):
 	single_list = True
 	"""Change this to False to have multiple lists open at the same time."""
 
+	keyset_pagination = False
+	"""
+	Change this to True to use keyset (seek) pagination instead of offsets. The pages are looked up from the sort field
+	and primary key of the rows on the current page, so deep pages stay fast on large tables. Only used when the sort
+	field is not nullable.
+	"""
+
+	count_cache_ttl = 10
+	"""Seconds to cache the number of rows of the (filtered) query."""
+
 	def __init__(self, *args, **kwargs):
 		self.id = 'pyplanet.views.generics.list.ListView'
 		super().__init__(*args, **kwargs)
@@ -82,6 +94,12 @@ class ListView(TemplateView):
 		self.count = 0
 		self.objects = list()
 
+		# Cached counts per query and the keys of the current page (keyset pagination).
+		self._counts = dict()
+		self._keyset = None
+		self._keyset_signature = None
+		self._keyset_reverse = False
+
 		self.num_per_page = 20
 
 		self.provide_search = True
@@ -283,14 +301,139 @@ class ListView(TemplateView):
 				query = query.orwhere(getattr(self.model, field['index']).contains(self.search_text))
 		return query
 
+	def get_model_sort_field(self):
+		"""
+		Get the model field of the current sort field.
+
+		:return: Model field or None.
+		"""
+		if isinstance(self.sort_field, Field):
+			return self.sort_field
+		if self.sort_field and self.model is not None:
+			field = getattr(self.model, self.sort_field['index'], None)
+			if isinstance(field, Field):
+				return field
+		return None
+
 	async def apply_ordering(self, query):
+		sort_field = self.get_model_sort_field()
+		if sort_field is not None:
+			return query.order_by(sort_field.asc() if self.sort_order else sort_field.desc())
 		if not self.order:
 			return query
 		return query.order_by(self.order)
 
+	async def get_count(self, query):
+		"""
+		Get the number of rows of the query, cached for ``count_cache_ttl`` seconds.
+
+		:param query: Query (filtered).
+		:return: Number of rows.
+		"""
+		sql, params = query.sql()
+		key = (sql, repr(params))
+		now = time.time()
+
+		cached = self._counts.get(key)
+		if cached and now - cached[0] < self.count_cache_ttl:
+			return cached[1]
+
+		count = await self.model.objects.count(query)
+		self._counts = dict((k, v) for k, v in self._counts.items() if now - v[0] < self.count_cache_ttl)
+		self._counts[key] = (now, count)
+		return count
+
+	def get_keyset_fields(self):
+		"""
+		Get the fields to seek the pages by.
+
+		:return: Tuple with the sort field (or None), primary key and if the order is ascending. None when keyset
+			pagination can't be used for the current sorting.
+		"""
+		sort_field = self.get_model_sort_field()
+		if self.sort_field and (sort_field is None or sort_field.null):
+			return None
+		return sort_field, self.model._meta.primary_key, bool(self.sort_order) if sort_field is not None else True
+
+	@staticmethod
+	def get_keyset_condition(fields, key, forward, inclusive=False):
+		"""
+		Get the condition for the rows after (forward) or before the key.
+
+		:param fields: Keyset fields, see :meth:`get_keyset_fields`.
+		:param key: Tuple with the sort value and primary key of the row.
+		:param forward: Rows after the row in the order of the list, or before the row.
+		:param inclusive: Include the row itself.
+		:return: Query expression.
+		"""
+		sort_field, primary_key, ascending = fields
+		value, identifier = key
+		if forward == ascending:
+			compare, compare_key = operator.gt, operator.ge if inclusive else operator.gt
+		else:
+			compare, compare_key = operator.lt, operator.le if inclusive else operator.lt
+
+		if sort_field is None:
+			return compare_key(primary_key, identifier)
+		return compare(sort_field, value) | ((sort_field == value) & compare_key(primary_key, identifier))
+
+	@staticmethod
+	def get_keyset_ordering(fields, reverse=False):
+		sort_field, primary_key, ascending = fields
+		ascending = ascending != reverse
+		ordering = [sort_field, primary_key] if sort_field is not None else [primary_key]
+		return [field.asc() if ascending else field.desc() for field in ordering]
+
+	def get_keyset_query(self, query):
+		"""
+		Get the query for the current page with keyset pagination, seeks from the keys of the displayed page. The first
+		and last page are always found directly.
+
+		:param query: Query (filtered).
+		:return: Query or None when the keyset pagination can't be used.
+		"""
+		fields = self.get_keyset_fields()
+		if fields is None:
+			return None
+
+		ordered = query.order_by(*self.get_keyset_ordering(fields))
+		reversed_ordered = query.order_by(*self.get_keyset_ordering(fields, reverse=True))
+		self._keyset_signature = signature = ordered.sql()
+		state = self._keyset if self._keyset and self._keyset['signature'] == signature else None
+
+		if self.page <= 1:
+			return ordered.limit(self.num_per_page)
+		if self.page >= self.num_pages:
+			self._keyset_reverse = True
+			return reversed_ordered.limit(self.count - (self.num_pages - 1) * self.num_per_page)
+		if state is None:
+			return None
+
+		if self.page > state['page']:
+			query = ordered.where(self.get_keyset_condition(fields, state['last'], forward=True))
+			return query.offset((self.page - state['page'] - 1) * self.num_per_page).limit(self.num_per_page)
+		if self.page == state['page']:
+			query = ordered.where(self.get_keyset_condition(fields, state['first'], forward=True, inclusive=True))
+			return query.limit(self.num_per_page)
+
+		self._keyset_reverse = True
+		query = reversed_ordered.where(self.get_keyset_condition(fields, state['first'], forward=False))
+		return query.offset((state['page'] - self.page - 1) * self.num_per_page).limit(self.num_per_page)
+
+	def get_keyset(self, row):
+		sort_field, primary_key, _ = self.get_keyset_fields()
+		return getattr(row, sort_field.name) if sort_field is not None else None, getattr(row, primary_key.name)
+
 	async def apply_pagination(self, query):
 		# Get count before pagination.
-		self.count = await self.model.objects.count(query)
+		self.count = await self.get_count(query)
+
+		self._keyset_signature = None
+		self._keyset_reverse = False
+		if self.keyset_pagination:
+			keyset_query = self.get_keyset_query(query)
+			if keyset_query is not None:
+				return keyset_query
 		return query.paginate(self.page, self.num_per_page)
 
 	async def get_object_data(self):
@@ -299,6 +442,17 @@ class ListView(TemplateView):
 		query = await self.apply_ordering(query)
 		query = await self.apply_pagination(query)
 		self.objects = list(await self.model.execute(query))
+
+		# Remember the keys of the page to seek the next pages from.
+		if self._keyset_reverse:
+			self.objects.reverse()
+		if self._keyset_signature is not None and self.objects:
+			self._keyset = dict(
+				signature=self._keyset_signature, page=self.page,
+				first=self.get_keyset(self.objects[0]), last=self.get_keyset(self.objects[-1]),
+			)
+		else:
+			self._keyset = None
 		return {
 			'objects': self.objects,
 			'search': self.search_text,
@@ -420,11 +574,23 @@ class ListView(TemplateView):
 class ManualListView(ListView):
 	"""
 	The ManualListView will act as a ListView, but not based on a model or query.
+
+	The data frame of the data is cached, together with the search columns and the sort orders. The frame is build
+	again when :meth:`get_data` returns other data, or when the ``data_version`` is increased. Increase the
+	``data_version`` when you change the data (list) returned by :meth:`get_data` in place.
 	"""
 
 	def __init__(self, data=None, *args, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.objects_raw = data
+		self.data_version = 0
+
+		self._frame = None
+		self._frame_data = None
+		self._frame_length = None
+		self._frame_version = None
+		self._search_columns = dict()
+		self._sorted_frames = dict()
 
 	async def get_data(self):
 		"""
@@ -434,8 +600,52 @@ class ManualListView(ListView):
 			raise NotImplementedError
 		return self.objects_raw
 
+	async def get_frame(self):
+		"""
+		Get the (cached) data frame of the data.
+
+		:return: Data frame.
+		"""
+		data = await self.get_data()
+		if self._frame is not None and self._frame_version == self.data_version and isinstance(data, list):
+			if data is self._frame_data and len(data) == self._frame_length:
+				return self._frame
+			if data is not self._frame_data and data == self._frame_data:
+				self._frame_data = data
+				return self._frame
+
+		self._frame = pd.DataFrame(data)
+		self._frame_data = data
+		self._frame_length = len(data)
+		self._frame_version = self.data_version
+		self._search_columns.clear()
+		self._sorted_frames.clear()
+		return self._frame
+
+	def get_search_column(self, frame, field):
+		"""
+		Get the lowercase (and style stripped) text of the field to search in. Cached for the data frame.
+
+		:param frame: Data frame.
+		:param field: Field dictionary.
+		:return: Series with the text.
+		"""
+		strip_styles = bool(field.get('search_strip_styles', False))
+		key = (field['index'], strip_styles)
+		if frame is self._frame and key in self._search_columns:
+			return self._search_columns[key]
+
+		if strip_styles:
+			column = frame[field['index']].map(lambda x: style.style_strip(str(x).lower()) if x else '')
+		else:
+			column = frame[field['index']].map(lambda x: str(x).lower() if x else '')
+
+		if frame is self._frame:
+			self._search_columns[key] = column
+		return column
+
 	async def get_object_data(self):
-		frame = pd.DataFrame(await self.get_data())
+		frame = await self.get_frame()
 		frame = await self.apply_filter(frame)
 		frame = await self.apply_ordering(frame)
 		self.count = len(frame)
@@ -451,26 +661,29 @@ class ManualListView(ListView):
 	async def apply_filter(self, frame):
 		if not self.search_text:
 			return frame
+		search_text = self.search_text.lower()
 		query = list()
 		for field in await self.get_fields():
 			if 'searching' in field and field['searching']:
-				if 'search_strip_styles' in field and field['search_strip_styles']:
-					query.append(
-						frame[field['index']].apply(lambda x: self.search_text.lower() in style.style_strip(str(x).lower()) if x else False)
-					)
-				else:
-					query.append(
-						frame[field['index']].apply(lambda x: self.search_text.lower() in str(x).lower() if x else False)
-					)
+				query.append(self.get_search_column(frame, field).str.contains(search_text, regex=False).values)
 		if query:
 			query = np.logical_or.reduce(query)
 			return frame.loc[query]
 		return frame
 
 	async def apply_ordering(self, frame):
-		if self.sort_field:
-			return frame.sort_values(self.sort_field['index'], ascending=bool(self.sort_order))
-		return frame
+		if not self.sort_field:
+			return frame
+
+		# The sort orders of the complete data are cached, filtered data is sorted directly.
+		key = (self.sort_field['index'], bool(self.sort_order))
+		if frame is self._frame and key in self._sorted_frames:
+			return self._sorted_frames[key]
+
+		sorted_frame = frame.sort_values(self.sort_field['index'], ascending=bool(self.sort_order))
+		if frame is self._frame:
+			self._sorted_frames[key] = sorted_frame
+		return sorted_frame
 
 	async def apply_pagination(self, frame):
 		return frame[(self.page - 1) * self.num_per_page:self.page * self.num_per_page]
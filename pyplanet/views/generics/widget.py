@@ -3,6 +3,7 @@ import logging
 from asyncio import iscoroutinefunction
 
 from pyplanet.apps.core.maniaplanet.models import Player
+from pyplanet.core.ui.components.manialink import DynamicManiaLink
 from pyplanet.views.template import TemplateView
 
 logger = logging.getLogger(__name__)
@@ -17,12 +18,12 @@ class WidgetView(TemplateView):
 	action = None
 	z_index = None
 	distraction_hide = True
+	max_refresh_rate = 4
 
 	template_name = 'core.views/generics/widget.xml'
 
 	def __init__(self, *args, **kwargs):
 		super().__init__(*args, **kwargs)
-		self.relaxed_updating = True
 
 		# Setup the receivers.
 		self.subscribe('open_widget', self.open_widget)
@@ -115,3 +116,24 @@ class TimesWidgetView(WidgetView):
 		})
 
 		return context
+
+
+class DynamicTimesWidgetView(DynamicManiaLink, TimesWidgetView):
+	"""
+	Times widget that only sends the layout when the number of times changes. Changed times are send as data-binding
+	payload, see :class:`pyplanet.core.ui.components.manialink.DynamicManiaLink`.
+	"""
+
+	async def get_bindings(self, player_login=None, player_data=None):
+		context = await self.get_context_data()
+		if player_data is None:
+			player_data = self.player_data
+		if player_login and player_data and player_data.get(player_login):
+			context.update(player_data[player_login])
+
+		bindings = dict()
+		for index, time in enumerate(context.get('times') or list()):
+			bindings['bind_{}_index'.format(index)] = str(time['index'])
+			bindings['bind_{}_nickname'.format(index)] = str(time['nickname'])
+			bindings['bind_{}_score'.format(index)] = '{}{}'.format(time['color'], time['score'])
+		return bindings
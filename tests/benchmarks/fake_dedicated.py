@@ -0,0 +1,309 @@
+"""
+Fake GBXRemote 2 dedicated server for load testing PyPlanet without a real dedicated server.
+
+The server speaks the GBXRemote 2 handshake, answers the core methods used while connecting and initializing the
+GbxClient and streams callbacks. The callbacks are either synthetic (players driving waypoints) or replayed from a
+recording made with the ``RECORD`` setting (see :class:`pyplanet.core.gbx.recorder.GbxRecorder`).
+
+Usage: ``python -m tests.benchmarks.fake_dedicated [--port 5000] [--players 100] [--rate 2] [--speed 1] [--replay file]``
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+import struct
+import time
+
+from xmlrpc.client import dumps, loads, Fault
+
+from pyplanet.core.gbx.codec import FastCodec
+from pyplanet.core.gbx.recorder import GbxRecorder
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+PASSTHROUGH_METHODS = [
+	'Authenticate', 'SetApiVersion', 'EnableCallbacks', 'SetModeScriptSettings', 'TriggerModeScriptEvent',
+	'ChatSendServerMessage', 'ChatSendServerMessageToLogin', 'ChatSend', 'ChatSendToLogin', 'ChatEnableManualRouting',
+	'ChatForwardToLogin', 'SendDisplayManialinkPage', 'SendDisplayManialinkPageToLogin', 'SendHideManialinkPage',
+	'SendHideManialinkPageToLogin', 'Kick', 'Ban', 'UnBan', 'ForceSpectator', 'ForcePlayerTeam', 'SaveMatchSettings',
+	'LoadMatchSettings', 'ChooseNextMap', 'NextMap', 'RestartMap', 'SetNextMapIdent', 'SetTimeAttackLimit',
+	'LoadBlackList', 'SaveBlackList', 'LoadGuestList', 'SaveGuestList', 'AutoSaveReplays', 'SetServerOptions',
+]
+
+SCRIPT_RESPONSES = {
+	'XmlRpc.GetAllApiVersions': dict(latest='3.3.0', versions=['2.5.0', '3.0.0', '3.1.0', '3.2.0', '3.3.0']),
+	'XmlRpc.GetApiVersion': dict(version='3.3.0'),
+	'Trackmania.GetScores': dict(section='', useteams=False, winnerteam=-1, teams=[], players=[]),
+	'Maniaplanet.Pause.GetStatus': dict(active=False, available=False),
+	'Maniaplanet.WarmUp.GetStatus': dict(active=False, available=False),
+}
+
+
+class FakeDedicated:
+	"""
+	Fake dedicated server.
+	"""
+	SERVER_LOGIN = 'fake_server'
+
+	def __init__(self, host='127.0.0.1', port=0, players=0, rate=0, speed=1.0, replay=None, count=None, maps=25):
+		"""
+		Initiate the fake server.
+
+		:param host: Host to listen on.
+		:param port: Port to listen on, 0 for a random port.
+		:param players: Number of (synthetic) players on the server.
+		:param rate: Number of waypoints per second per player that will be streamed. 0 to disable.
+		:param speed: Speed-up factor of the (synthetic or replayed) callback stream.
+		:param replay: Path to the recording to replay the callbacks from, replaces the synthetic stream.
+		:param count: Stop streaming after x callbacks. None for no limit.
+		:param maps: Number of maps in the map list.
+		"""
+		self.host = host
+		self.port = port
+		self.rate = rate
+		self.speed = speed
+		self.replay = replay
+		self.count = count
+		self.codec = FastCodec()
+
+		self.players = ['player_{}'.format(nr) for nr in range(players)]
+		self.maps = [self.get_map_info(nr) for nr in range(maps)]
+
+		self.server = None
+		self.writers = set()
+		self.stream_tasks = set()
+		self.stats = dict(requests=0, callbacks=0, started_at=None, finished_at=None)
+		self.finished = asyncio.Event()
+
+		self.methods = {
+			'system.listMethods': lambda: sorted(set(PASSTHROUGH_METHODS) | set(self.methods.keys())),
+			'GetVersion': lambda: dict(
+				Name='ManiaPlanet', TitleId='TMStadium@nadeo', Version='3.3.0', Build='2019-10-23_20_00',
+				ApiVersion='2013-04-16'
+			),
+			'GetSystemInfo': lambda: dict(
+				PublishedIp='127.0.0.1', Port=2350, P2PPort=3450, TitleId='TMStadium@nadeo',
+				ServerLogin=self.SERVER_LOGIN, ServerPlayerId=0, ConnectionDownloadRate=102400,
+				ConnectionUploadRate=102400, IsServer=True, IsDedicated=True,
+			),
+			'GetGameMode': lambda: 0,
+			'GetModeScriptSettings': lambda: dict(S_UseScriptCallbacks=True, S_TimeLimit=300),
+			'GetModeScriptInfo': lambda: dict(Name='TimeAttack.Script.txt', CompatibleMapTypes='Race', Description=''),
+			'GetScriptName': lambda: dict(CurrentValue='TimeAttack.Script.txt', NextValue='TimeAttack.Script.txt'),
+			'GameDataDirectory': lambda: '/tmp/fake_dedicated/UserData/',
+			'GetMapsDirectory': lambda: '/tmp/fake_dedicated/UserData/Maps/',
+			'GetSkinsDirectory': lambda: '/tmp/fake_dedicated/UserData/Skins/',
+			'GetServerPassword': lambda: '',
+			'GetServerPasswordForSpectator': lambda: '',
+			'GetMaxPlayers': lambda: dict(CurrentValue=255, NextValue=255),
+			'GetMaxSpectators': lambda: dict(CurrentValue=32, NextValue=32),
+			'GetHideServer': lambda: 0,
+			'GetLadderServerLimits': lambda: dict(LadderServerLimitMin=0, LadderServerLimitMax=50000),
+			'GetServerName': lambda: 'Fake Dedicated',
+			'GetCurrentMapInfo': lambda: self.maps[0],
+			'GetNextMapInfo': lambda: self.maps[1 % len(self.maps)],
+			'GetMapList': lambda limit=-1, offset=0: self.maps[offset:] if limit < 0 else self.maps[offset:offset + limit],
+			'GetPlayerList': lambda limit=-1, offset=0, *args: [
+				self.get_player_info(login) for login in (self.players[offset:] if limit < 0 else self.players[offset:offset + limit])
+			],
+			'GetDetailedPlayerInfo': self.get_detailed_player_info,
+			'GetPlayerInfo': lambda login, *args: self.get_player_info(login),
+			'GetCurrentCallVote': lambda: dict(CallerLogin='', CmdName='', CmdParam=''),
+			'GetBanList': lambda *args: [],
+			'GetBlackList': lambda *args: [],
+			'GetGuestList': lambda *args: [],
+			'GetIgnoreList': lambda *args: [],
+		}
+
+	def get_map_info(self, nr):
+		return dict(
+			UId='FakeMap{:05d}'.format(nr), Name='Fake Map {}'.format(nr), FileName='Fake/Map{}.Map.Gbx'.format(nr),
+			Author='fake_author', Environnement='Stadium', Mood='Day', BronzeTime=60000, SilverTime=50000,
+			GoldTime=45000, AuthorTime=42000, CopperPrice=100, LapRace=False, NbLaps=0, NbCheckpoints=3,
+			MapType='TrackMania\\TM_Race', MapStyle='',
+		)
+
+	def get_player_info(self, login):
+		return dict(
+			Login=login, NickName='$fff{}'.format(login), PlayerId=self.get_player_id(login), TeamId=-1,
+			SpectatorStatus=0, LadderRanking=0, Flags=0, LadderScore=0.0,
+		)
+
+	def get_player_id(self, login):
+		return self.players.index(login) + 1 if login in self.players else 0
+
+	def get_detailed_player_info(self, login):
+		if login != self.SERVER_LOGIN and login not in self.players:
+			raise Fault(-1000, 'Login unknown.')
+		return dict(
+			Login=login, NickName='$fff{}'.format(login), PlayerId=self.get_player_id(login), TeamId=-1,
+			Path='World|Europe|Netherlands', Language='en', ClientVersion='', ClientTitleVersion='',
+			IPAddress='127.0.0.1:2350', DownloadRate=102400, UploadRate=102400, IsSpectator=False,
+			IsInOfficialMode=False, Avatar=dict(FileName='', Checksum=''), Skins=[], LadderStats=dict(),
+			HoursSinceZoneInscription=0, BroadcasterLogin='', Allies=[], ClubLink='',
+		)
+
+	def call(self, method, params):
+		"""
+		Execute the method and return the result, raises a Fault for unknown methods.
+		"""
+		if method == 'system.multicall':
+			results = list()
+			for call in params[0]:
+				try:
+					results.append([self.call(call['methodName'], call.get('params', list()))])
+				except Fault as e:
+					results.append(dict(faultCode=e.faultCode, faultString=e.faultString))
+			return results
+		if method in self.methods:
+			return self.methods[method](*params)
+		if method in PASSTHROUGH_METHODS or method.startswith('TriggerModeScriptEvent'):
+			return True
+		raise Fault(-1000, 'Unknown method {}'.format(method))
+
+	async def start(self):
+		self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+		self.port = self.server.sockets[0].getsockname()[1]
+		logger.info('Fake dedicated listening on {}:{}'.format(self.host, self.port))
+
+	async def stop(self):
+		for task in self.stream_tasks:
+			task.cancel()
+		if self.server:
+			self.server.close()
+			await self.server.wait_closed()
+
+	def drop_connections(self):
+		"""
+		Close the connections of the clients, like a restarting or crashing dedicated server.
+		"""
+		for task in self.stream_tasks:
+			task.cancel()
+		for writer in list(self.writers):
+			writer.close()
+
+	async def handle_connection(self, reader, writer):
+		writer.write(struct.pack('<L11s', 11, b'GBXRemote 2'))
+		self.writers.add(writer)
+		try:
+			while True:
+				size, handle = struct.unpack('<LL', await reader.readexactly(8))
+				params, method = loads(await reader.readexactly(size), use_builtin_types=True)
+				self.stats['requests'] += 1
+
+				try:
+					body = dumps((self.call(method, params),), methodresponse=True, allow_none=True).encode()
+				except Fault as e:
+					body = dumps(e, methodresponse=True, allow_none=True).encode()
+				writer.write(struct.pack('<LL', len(body), handle) + body)
+
+				if method == 'TriggerModeScriptEventArray':
+					self.answer_script(writer, *params)
+				elif method == 'EnableCallbacks' and params and params[0]:
+					task = asyncio.ensure_future(self.stream(writer))
+					self.stream_tasks.add(task)
+					task.add_done_callback(self.stream_tasks.discard)
+		except (asyncio.IncompleteReadError, ConnectionResetError):
+			pass
+		finally:
+			self.writers.discard(writer)
+			writer.close()
+
+	def answer_script(self, writer, method, args=None):
+		# The response id is added as last argument by the ScriptQuery.
+		if not args or not RESPONSE_ID_PATTERN.match(args[-1]):
+			return
+		payload = dict(SCRIPT_RESPONSES.get(method, dict()), responseid=args[-1])
+		self.write_callback(writer, 'ManiaPlanet.ModeScriptCallbackArray', (method, [json.dumps(payload)]))
+
+	def write_callback(self, writer, method, params, handle=0):
+		body = self.codec.dumps(method, params)
+		writer.write(struct.pack('<LL', len(body), handle) + body)
+		self.stats['callbacks'] += 1
+
+	def waypoint(self, login, checkpoint):
+		race_time = 10000 * (checkpoint % 4 + 1)
+		return json.dumps(dict(
+			time=int(time.time() * 1000), login=login, accountid='', racetime=race_time, laptime=race_time,
+			checkpointinrace=checkpoint % 4, checkpointinlap=checkpoint % 4, isendrace=checkpoint % 4 == 3,
+			isendlap=checkpoint % 4 == 3, isinfinitelaps=False, isindependentlaps=False, curracecheckpoints=[],
+			curlapcheckpoints=[], blockid='#{}'.format(checkpoint), speed=512.3, distance=1234.5,
+		))
+
+	async def stream(self, writer):
+		self.stats['started_at'] = time.time()
+		try:
+			if self.replay:
+				await self.stream_replay(writer)
+			elif self.players and self.rate:
+				await self.stream_synthetic(writer)
+		finally:
+			self.stats['finished_at'] = time.time()
+			self.finished.set()
+
+	async def stream_synthetic(self, writer):
+		interval = 1 / (self.rate * self.speed)
+		checkpoint = 0
+		next_tick = time.monotonic()
+		while self.count is None or self.stats['callbacks'] < self.count:
+			for login in self.players:
+				self.write_callback(
+					writer, 'ManiaPlanet.ModeScriptCallbackArray',
+					('Trackmania.Event.WayPoint', [self.waypoint(login, checkpoint)])
+				)
+			checkpoint += 1
+			await writer.drain()
+
+			next_tick += interval
+			await asyncio.sleep(max(0, next_tick - time.monotonic()))
+
+	async def stream_replay(self, writer):
+		previous = None
+		for frame in GbxRecorder.read(self.replay):
+			# Only replay the callbacks we received from the dedicated server.
+			if frame.direction != GbxRecorder.RECEIVED or frame.handle & 0x80000000:
+				continue
+			if self.count is not None and self.stats['callbacks'] >= self.count:
+				break
+
+			if previous is not None and frame.timestamp > previous:
+				await writer.drain()
+				await asyncio.sleep((frame.timestamp - previous) / self.speed)
+			previous = frame.timestamp
+
+			writer.write(struct.pack('<LL', len(frame.body), frame.handle) + frame.body)
+			self.stats['callbacks'] += 1
+		await writer.drain()
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Fake GBXRemote 2 dedicated server.')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=5000)
+	parser.add_argument('--players', type=int, default=100, help='Number of synthetic players.')
+	parser.add_argument('--rate', type=float, default=2, help='Waypoints per second per player.')
+	parser.add_argument('--speed', type=float, default=1, help='Speed-up factor of the callback stream.')
+	parser.add_argument('--replay', default=None, help='Recording to replay instead of the synthetic stream.')
+	parser.add_argument('--count', type=int, default=None, help='Stop streaming after x callbacks.')
+	options = parser.parse_args()
+
+	logging.basicConfig(level=logging.INFO)
+	loop = asyncio.get_event_loop()
+	server = FakeDedicated(
+		host=options.host, port=options.port, players=options.players, rate=options.rate, speed=options.speed,
+		replay=options.replay, count=options.count,
+	)
+	loop.run_until_complete(server.start())
+	try:
+		loop.run_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		loop.run_until_complete(server.stop())
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,49 @@
+"""
+Micro benchmark comparing the XML-RPC codecs of the GbxRemote on recorded GBX payloads.
+
+Usage: ``python -m tests.benchmarks.gbx_codec [rounds]``
+"""
+import glob
+import os
+import sys
+import timeit
+
+from pyplanet.core.gbx.codec import StdlibCodec, FastCodec
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), '_files', 'gbx')
+
+REQUESTS = [
+	('SendDisplayManialinkPageToLogin', ('player_1', '<manialink id="test"><label text="$fffTest &amp; more"/></manialink>', 0, False)),
+	('ForceSpectator', ('player_1', 3)),
+	('TriggerModeScriptEventArray', ('Trackmania.GetScores', ['4f3b2a1c'])),
+]
+
+
+def bench(func, rounds):
+	return min(timeit.repeat(func, number=rounds, repeat=3)) / rounds * 1000000
+
+
+def main(rounds=500):
+	codecs = [StdlibCodec(), FastCodec()]
+
+	print('{:<32} {:>10} {:>14} {:>14} {:>8}'.format('payload', 'bytes', 'stdlib (us)', 'fast (us)', 'speedup'))
+	for path in sorted(glob.glob(os.path.join(PAYLOAD_DIR, '*.xml'))):
+		with open(path, 'rb') as handle:
+			body = handle.read()
+		assert codecs[0].loads(body) == codecs[1].loads(body)
+
+		number = max(1, rounds * 1000 // len(body))
+		times = [bench(lambda: codec.loads(body), number) for codec in codecs]
+		print('{:<32} {:>10} {:>14.2f} {:>14.2f} {:>7.2f}x'.format(
+			os.path.basename(path), len(body), times[0], times[1], times[0] / times[1]
+		))
+
+	for method, args in REQUESTS:
+		times = [bench(lambda: codec.dumps(method, args), rounds * 10) for codec in codecs]
+		print('{:<32} {:>10} {:>14.2f} {:>14.2f} {:>7.2f}x'.format(
+			'dumps:{}'.format(method)[:32], len(codecs[1].dumps(method, args)), times[0], times[1], times[0] / times[1]
+		))
+
+
+if __name__ == '__main__':
+	main(*[int(arg) for arg in sys.argv[1:2]])
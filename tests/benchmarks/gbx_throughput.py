@@ -0,0 +1,97 @@
+"""
+End-to-end throughput and latency benchmark of the GbxRemote against the fake dedicated server.
+
+The fake server streams waypoints of N players while the client executes queries. The callback throughput and the
+query latencies (while the stream is running) are reported.
+
+Usage: ``python -m tests.benchmarks.gbx_throughput [--players 200] [--rate 5] [--count 50000] [--replay file]``
+"""
+import argparse
+import asyncio
+import time
+
+from pyplanet.core.gbx.remote import GbxRemote
+from tests.benchmarks.fake_dedicated import FakeDedicated
+
+
+class BenchRemote(GbxRemote):
+	"""
+	GbxRemote that decodes and counts the script callbacks instead of sending signals.
+	"""
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.received = 0
+
+	async def handle_scripted(self, handle_nr, method, data):
+		_, raw = data
+		for part in raw if isinstance(raw, list) else [raw]:
+			self.json_loads(part)
+		self.received += 1
+
+	async def handle_callback(self, handle_nr, method, data):
+		self.received += 1
+
+
+def percentile(values, percent):
+	values = sorted(values)
+	return values[min(len(values) - 1, int(len(values) * percent / 100))] if values else 0
+
+
+async def measure_latency(client, server):
+	latencies = list()
+	while not server.finished.is_set():
+		started_at = time.perf_counter()
+		await client.execute('GetPlayerList', -1, 0)
+		latencies.append((time.perf_counter() - started_at) * 1000)
+		await asyncio.sleep(0.01)
+	return latencies
+
+
+async def run(options):
+	server = FakeDedicated(
+		players=options.players, rate=options.rate, speed=options.speed, replay=options.replay, count=options.count,
+	)
+	await server.start()
+
+	client = BenchRemote(
+		'127.0.0.1', server.port, user='SuperAdmin', password='SuperAdmin', codec=options.codec,
+		callback_workers=options.workers,
+	)
+	await client.connect()
+	latencies = await measure_latency(client, server)
+
+	# Wait for the client to catch up with the stream.
+	expected = server.stats['callbacks']
+	while client.received < expected and time.time() - server.stats['finished_at'] < 30:
+		await asyncio.sleep(0.01)
+	finished_at = time.time()
+
+	await client.disconnect()
+	await server.stop()
+
+	duration = finished_at - server.stats['started_at']
+	print('Callbacks sent:       {}'.format(expected))
+	print('Callbacks handled:    {}'.format(client.received))
+	print('Duration:             {:.2f}s'.format(duration))
+	print('Throughput:           {:.0f} callbacks/s'.format(client.received / duration))
+	print('Query latency p50:    {:.2f}ms'.format(percentile(latencies, 50)))
+	print('Query latency p99:    {:.2f}ms'.format(percentile(latencies, 99)))
+	print('Query latency max:    {:.2f}ms'.format(max(latencies) if latencies else 0))
+
+
+def main():
+	parser = argparse.ArgumentParser(description='GBX end-to-end throughput benchmark.')
+	parser.add_argument('--players', type=int, default=200)
+	parser.add_argument('--rate', type=float, default=5, help='Waypoints per second per player.')
+	parser.add_argument('--speed', type=float, default=1)
+	parser.add_argument('--count', type=int, default=50000, help='Number of callbacks to stream.')
+	parser.add_argument('--replay', default=None, help='Recording to replay instead of the synthetic stream.')
+	parser.add_argument('--codec', default=None, help='XML-RPC codec (fast or stdlib).')
+	parser.add_argument('--workers', type=int, default=32, help='Callback workers (0 for a task per callback).')
+	options = parser.parse_args()
+
+	asyncio.get_event_loop().run_until_complete(run(options))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,53 @@
+"""
+Micro benchmark of paging, searching and sorting a ManualListView with 8000 maps.
+
+The ``rebuild`` column increases the ``data_version`` before every page, so the data frame, search columns and sort
+orders are build again (like before the frame was cached). The ``cached`` column reuses them.
+
+Usage: ``python -m tests.benchmarks.manual_list [maps]``
+"""
+import asyncio
+import sys
+import time
+
+from pyplanet.views.generics import ManualListView
+
+
+class MapList(ManualListView):
+	fields = [
+		{'name': 'Name', 'index': 'name', 'sorting': True, 'searching': True, 'search_strip_styles': True},
+		{'name': 'Author', 'index': 'author_login', 'sorting': True, 'searching': True},
+		{'name': 'Time', 'index': 'author_time', 'sorting': True, 'searching': False},
+	]
+
+
+async def bench(view, rebuild, pages=50):
+	started_at = time.perf_counter()
+	for page in range(1, pages + 1):
+		if rebuild:
+			view.data_version += 1
+		view.page = page
+		await view.get_object_data()
+	return (time.perf_counter() - started_at) / pages * 1000
+
+
+async def main(count=8000):
+	data = [
+		dict(name='$o$f00Map $fff{}'.format(nr), author_login='author_{}'.format(nr % 100), author_time=(nr * 7919) % 60000)
+		for nr in range(count)
+	]
+
+	print('{:>24} {:>14} {:>14}'.format('operation', 'rebuild (ms)', 'cached (ms)'))
+	for name, search_text, sort in (('page', None, False), ('page sorted', None, True), ('page search', 'map 1', True)):
+		results = list()
+		for rebuild in (True, False):
+			view = MapList(data=data)
+			view.search_text = search_text
+			view.sort_field = view.fields[2] if sort else None
+			await view.get_object_data()
+			results.append(await bench(view, rebuild))
+		print('{:>24} {:>14.2f} {:>14.2f}'.format(name, *results))
+
+
+if __name__ == '__main__':
+	asyncio.get_event_loop().run_until_complete(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,55 @@
+"""
+Micro benchmark of the fan-out cost of a signal with 100 receivers that are only interested in a single player.
+
+The ``handler`` column registers the receivers without conditions, filtering the login inside of the receiver (every
+receiver is called for every send). The ``conditions`` column registers the receivers with ``conditions=dict(login=...)``,
+only the receiver of the login is called.
+
+Usage: ``python -m tests.benchmarks.signal_conditions [sends]``
+"""
+import asyncio
+import sys
+import time
+
+from pyplanet.core.events import Signal
+
+
+class Listener:
+	def __init__(self, login):
+		self.login = login
+		self.calls = 0
+
+	async def on_event(self, login, **kwargs):
+		if login != self.login:
+			return
+		self.calls += 1
+
+
+async def bench(signal, sends, receivers):
+	started_at = time.perf_counter()
+	for nr in range(sends):
+		await signal.send(dict(login='player_{}'.format(nr % receivers), race_time=12345), raw=True)
+	return sends / (time.perf_counter() - started_at)
+
+
+async def main(sends=20000):
+	print('{:>10} {:>18} {:>20} {:>8}'.format('receivers', 'handler (send/s)', 'conditions (send/s)', 'speedup'))
+	for count in (10, 100):
+		results = list()
+		for use_conditions in (False, True):
+			signal = Signal(code='bench', namespace='benchmarks')
+			listeners = [Listener('player_{}'.format(nr)) for nr in range(count)]
+			for listener in listeners:
+				signal.register(
+					listener.on_event, conditions=dict(login=listener.login) if use_conditions else None
+				)
+
+			results.append(await bench(signal, sends, count))
+			assert sum(listener.calls for listener in listeners) == sends
+
+		handler, conditions = results
+		print('{:>10} {:>18.0f} {:>20.0f} {:>7.2f}x'.format(count, handler, conditions, conditions / handler))
+
+
+if __name__ == '__main__':
+	asyncio.get_event_loop().run_until_complete(main(*[int(arg) for arg in sys.argv[1:2]]))
@@ -0,0 +1,48 @@
+"""
+Micro benchmark of the signal dispatching with 1, 10 and 50 receivers.
+
+The ``rebuild`` column invalidates the receiver snapshot before every send, which is the cost of resolving the receivers
+on every dispatch. The ``snapshot`` column is the normal path.
+
+Usage: ``python -m tests.benchmarks.signals [sends]``
+"""
+import asyncio
+import sys
+import time
+
+from pyplanet.core.events import Signal
+
+
+class Listener:
+	def __init__(self):
+		self.calls = 0
+
+	async def on_event(self, **kwargs):
+		self.calls += 1
+
+
+async def bench(signal, sends, invalidate):
+	started_at = time.perf_counter()
+	for _ in range(sends):
+		if invalidate:
+			signal._invalidate()
+		await signal.send(dict(login='player_1', race_time=12345), raw=True)
+	return sends / (time.perf_counter() - started_at)
+
+
+async def main(sends=20000):
+	print('{:>10} {:>18} {:>18} {:>8}'.format('receivers', 'rebuild (send/s)', 'snapshot (send/s)', 'speedup'))
+	for count in (1, 10, 50):
+		signal = Signal(code='bench', namespace='benchmarks')
+		listeners = [Listener() for _ in range(count)]
+		for listener in listeners:
+			signal.register(listener.on_event)
+
+		rebuild = await bench(signal, sends, True)
+		snapshot = await bench(signal, sends, False)
+		assert all(listener.calls == sends * 2 for listener in listeners)
+		print('{:>10} {:>18.0f} {:>18.0f} {:>7.2f}x'.format(count, rebuild, snapshot, snapshot / rebuild))
+
+
+if __name__ == '__main__':
+	asyncio.get_event_loop().run_until_complete(main(*[int(arg) for arg in sys.argv[1:2]]))
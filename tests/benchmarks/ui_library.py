@@ -0,0 +1,42 @@
+"""
+Measurement of the bytes send per refresh of the core widgets, and the size of the script library manialink that is
+send once per player.
+
+Usage: ``python -m tests.benchmarks.ui_library``
+"""
+import os
+
+from jinja2 import Environment, FileSystemLoader, PrefixLoader, select_autoescape
+
+from pyplanet.core.ui.minify import MinifyExtension
+
+TEMPLATES = os.path.join(os.path.dirname(__file__), '..', '..', 'pyplanet', 'views', 'templates')
+
+
+def render(environment, name, **data):
+	return environment.get_template(name).render(**data).encode()
+
+
+def main():
+	times = [dict(index=nr, nickname='Player {}'.format(nr), color='$fff', score='0:42.123') for nr in range(1, 16)]
+	widget = dict(id='pyplanet__widgets_bench', widget_x=125, widget_y=56.5, title='Local Records', open_action=True)
+
+	print('{:>8} {:>8} {:>18} {:>18} {:>14}'.format('game', 'minify', 'widget (bytes)', 'times (bytes)', 'library (bytes)'))
+	for game in ('tm', 'tmnext'):
+		for minify in (False, True):
+			environment = Environment(
+				loader=PrefixLoader({'core.views': FileSystemLoader(TEMPLATES)}),
+				autoescape=select_autoescape(['xml', 'Txt']),
+				extensions=[MinifyExtension] if minify else [],
+			)
+			data = dict(_game=dict(game=game), **widget)
+			print('{:>8} {:>8} {:>18} {:>18} {:>14}'.format(
+				game, str(minify),
+				len(render(environment, 'core.views/generics/widget.xml', **data)),
+				len(render(environment, 'core.views/generics/timeswidget.xml', times=times, **data)),
+				len(render(environment, 'core.views/libs/library.xml', **data)),
+			))
+
+
+if __name__ == '__main__':
+	main()
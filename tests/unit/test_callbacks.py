@@ -43,6 +43,20 @@ class TestCallbacks(asynctest.TestCase):
 		assert self.got_glue == 0
 		assert self.got_handle == 2
 
+	async def test_has_listeners(self):
+		test1 = Callback(
+			call='SampleCallListeners',
+			code='sample_call_listeners',
+			namespace='tests',
+			target=self.handle_sample
+		)
+
+		# The glue itself doesn't count as a listener.
+		assert not test1.raw_signal.has_listeners()
+
+		test1.register(self.async_listener)
+		assert test1.raw_signal.has_listeners()
+
 	####################################################################################################################
 
 	def sync_listener(self, *args, **kwargs):
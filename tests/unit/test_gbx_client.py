@@ -0,0 +1,154 @@
+import asyncio
+import asynctest
+
+from xmlrpc.client import Fault
+
+from pyplanet.core.exceptions import TransportException
+from pyplanet.core.game import Game
+from pyplanet.core.gbx.client import GbxClient
+from pyplanet.core.gbx.codec import StdlibCodec
+from pyplanet.core.gbx.remote import GbxRemote
+
+
+class FakeInstance:
+	game = Game
+
+
+class TestGbxClient(asynctest.TestCase):
+	def setUp(self):
+		self.client = GbxClient('127.0.0.1', 5000, instance=FakeInstance())
+		self.client.MAX_REQUEST_SIZE = 2000
+		self.client.gbx_methods = ['ChatSendServerMessage']
+		self.requests = list()
+
+		async def execute_raw(request_bytes, timeout=45.0, priority=None):
+			self.requests.append(request_bytes)
+			await asyncio.sleep(0.01 * (3 - len(self.requests)))
+			params, _ = StdlibCodec().loads(request_bytes)
+			return [[call['params'][0]] for call in params[0]]
+		self.client.execute_raw = execute_raw
+
+	async def test_split(self):
+		queries = [self.client.prepare('ChatSendServerMessage', 'x' * 100 + str(nr)) for nr in range(40)]
+		stacks = self.client.split_multicalls(queries)
+
+		assert len(stacks) > 1
+		assert sum(stacks, list()) == queries
+		for stack in stacks:
+			size = self.client.multicall_overhead + sum(query.length for query in stack)
+			assert size <= self.client.MAX_REQUEST_SIZE
+			assert size == 8 + len(self.client.codec.dumps_multicall([query.packet for query in stack]))
+
+	async def test_multicall(self):
+		queries = [self.client.prepare('ChatSendServerMessage', 'x' * 100 + str(nr)) for nr in range(40)]
+		expected = ['x' * 100 + str(nr) for nr in range(40)]
+
+		chunks = list()
+		async for results in self.client.multicall_iter(*queries):
+			chunks.append(results)
+		assert len(chunks) == len(self.requests) > 1
+		assert sum(chunks, list()) == expected
+
+		assert await self.client.multicall(*queries) == expected
+
+	async def test_split_boundary(self):
+		# The second query doesn't fit in the first multicall anymore and starts the next multicall.
+		size = (self.client.MAX_REQUEST_SIZE - self.client.multicall_overhead) // 2
+		queries = [self.client.prepare('ChatSendServerMessage', 'x' * (size - 100) + str(nr)) for nr in range(3)]
+		stacks = self.client.split_multicalls(queries)
+
+		assert stacks == [queries[:1], queries[1:2], queries[2:]]
+		assert await self.client.multicall(*queries) == ['x' * (size - 100) + str(nr) for nr in range(3)]
+		assert len(self.requests) == 3
+		assert str(queries[1].args[0]).encode() in self.requests[1]
+
+	async def test_coalesce(self):
+		self.client.coalesce = True
+		self.client.gbx_methods = ['ChatSendServerMessage', 'GetPlayerInfo']
+		methods = list()
+
+		async def execute_raw(request_bytes, timeout=45.0, priority=None):
+			params, method = StdlibCodec().loads(request_bytes)
+			methods.append(method)
+			if method != 'system.multicall':
+				return params[0]
+
+			results = list()
+			for call in params[0]:
+				if call['params'][0] == 'disconnect':
+					raise TransportException('Connection with the dedicated server has been lost.')
+				if call['params'][0] == 'truncate':
+					break
+				if call['params'][0] == 'unknown':
+					results.append(dict(faultCode=-1000, faultString='Login unknown.'))
+				else:
+					results.append([call['params'][0]])
+			return results
+		self.client.execute_raw = execute_raw
+
+		# Queries awaited in the same loop iteration share a multicall, every caller gets its own result or fault.
+		results = await asyncio.wait_for(asyncio.gather(
+			self.client('GetPlayerInfo', 'player_1'),
+			self.client('GetPlayerInfo', 'unknown'),
+			self.client('GetPlayerInfo', 'player_2'),
+			return_exceptions=True,
+		), 1)
+		assert results[0] == 'player_1' and results[2] == 'player_2'
+		assert isinstance(results[1], Fault) and results[1].faultCode == -1000
+		assert methods == ['system.multicall']
+		assert self.client.coalesce_stats == dict(queries=3, batches=1, round_trips=1)
+		assert self.client.coalesce_ratio == 3.0
+
+		# A single query is send without the multicall.
+		assert await asyncio.wait_for(self.client('GetPlayerInfo', 'player_3'), 1) == 'player_3'
+		assert methods[-1] == 'GetPlayerInfo'
+		assert self.client.coalesce_stats == dict(queries=4, batches=2, round_trips=2)
+
+		# Batches larger than the maximum request size are split, the order of the results is kept.
+		values = ['x' * 100 + str(nr) for nr in range(40)]
+		queries = [self.client('ChatSendServerMessage', value) for value in values]
+		assert await asyncio.wait_for(asyncio.gather(*queries), 1) == values
+		assert self.client.coalesce_stats['queries'] == 44
+		assert self.client.coalesce_stats['batches'] == 3
+		assert len(methods[2:]) > 1
+		assert self.client.coalesce_stats['round_trips'] == 2 + len(methods[2:])
+
+		# A failed multicall fails all the queries of the multicall.
+		results = await asyncio.wait_for(asyncio.gather(
+			self.client('GetPlayerInfo', 'player_1'), self.client('GetPlayerInfo', 'disconnect'), return_exceptions=True,
+		), 1)
+		assert all(isinstance(result, TransportException) for result in results)
+
+		# The queries without a result in the multicall response are failed instead of waiting forever.
+		results = await asyncio.wait_for(asyncio.gather(
+			self.client('GetPlayerInfo', 'player_1'), self.client('GetPlayerInfo', 'truncate'),
+			self.client('GetPlayerInfo', 'player_2'), return_exceptions=True,
+		), 1)
+		assert results[0] == 'player_1'
+		assert all(isinstance(result, TransportException) for result in results[1:])
+
+		# The queries are only marshalled once.
+		dumped = list()
+		dumps_call = self.client.codec.dumps_call
+
+		def record_dumps_call(method, args):
+			dumped.append(args)
+			return dumps_call(method, args)
+		self.client.codec.dumps_call = record_dumps_call
+
+		await asyncio.wait_for(asyncio.gather(
+			self.client('GetPlayerInfo', 'player_1'), self.client('GetPlayerInfo', 'player_2'),
+		), 1)
+		assert dumped == [('player_1',), ('player_2',)]
+
+	async def test_reconnect_resync(self):
+		self.client.instance = instance = FakeInstance()
+		instance.resync = asynctest.CoroutineMock(side_effect=Exception('Resync failed'))
+
+		# The state is resynced after reconnecting, a failing resync doesn't stop the client.
+		with asynctest.patch.object(GbxRemote, 'reconnect') as reconnect, \
+			asynctest.patch('pyplanet.core.gbx.client.handle_exception') as handle_exception:
+			await self.client.reconnect()
+		reconnect.assert_awaited_once_with()
+		instance.resync.assert_awaited_once_with()
+		assert handle_exception.call_count == 1
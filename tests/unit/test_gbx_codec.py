@@ -0,0 +1,47 @@
+import datetime
+import glob
+import os
+import asynctest
+
+from xmlrpc.client import Fault, dumps
+from xml.parsers.expat import ExpatError
+
+from pyplanet.core.gbx.codec import StdlibCodec, FastCodec, get_codec
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), '_files', 'gbx')
+
+
+class TestGbxCodec(asynctest.TestCase):
+	def test_recorded_payloads(self):
+		stdlib, fast = StdlibCodec(), FastCodec()
+		for path in glob.glob(os.path.join(PAYLOAD_DIR, '*.xml')):
+			with open(path, 'rb') as handle:
+				body = handle.read()
+			assert stdlib.loads(body) == fast.loads(body)
+
+	def test_round_trip(self):
+		stdlib, fast = StdlibCodec(), FastCodec()
+		args = (
+			'login', '<manialink id="a">&amp; $fff</manialink>', 0, False, None, 1.5, b'raw',
+			datetime.datetime(2020, 1, 2, 3, 4, 5), [1, [True, 'x']], dict(a=dict(b=None), c=''),
+		)
+		body = fast.dumps('SampleMethod', args)
+		assert fast.loads(body) == stdlib.loads(body) == (stdlib.loads(stdlib.dumps('SampleMethod', args)))
+
+	def test_fault(self):
+		body = dumps(Fault(-1000, 'Login unknown.')).encode()
+		with self.assertRaises(Fault) as context:
+			FastCodec().loads(body)
+		assert context.exception.faultCode == -1000
+		assert context.exception.faultString == 'Login unknown.'
+
+	def test_invalid(self):
+		with self.assertRaises(ExpatError):
+			FastCodec().loads(b'<methodResponse><params>')
+		with self.assertRaises(OverflowError):
+			FastCodec().dumps('SampleMethod', (2 ** 40,))
+
+	def test_get_codec(self):
+		assert isinstance(get_codec(), FastCodec)
+		assert isinstance(get_codec('stdlib'), StdlibCodec)
+		assert isinstance(get_codec('pyplanet.core.gbx.codec.StdlibCodec'), StdlibCodec)
@@ -0,0 +1,48 @@
+import asyncio
+import asynctest
+
+from pyplanet.core.gbx.pipeline import CallbackPipeline
+
+
+class TestCallbackPipeline(asynctest.TestCase):
+	async def test_ordering(self):
+		received = dict()
+
+		async def handler(key, number):
+			await asyncio.sleep(0.001 * (number % 3))
+			received.setdefault(key, list()).append(number)
+
+		pipeline = CallbackPipeline(handler, workers=4, high_water_mark=None)
+		pipeline.start()
+		for number in range(20):
+			for key in ('player-1', 'player-2', None):
+				pipeline.put(key, 'Sample', (key, number))
+
+		await asyncio.sleep(0.2)
+		pipeline.stop()
+
+		assert received['player-1'] == list(range(20))
+		assert received['player-2'] == list(range(20))
+		assert received[None] == list(range(20))
+		assert pipeline.get_metrics()['processed'] == 60
+
+	async def test_policies(self):
+		received = list()
+
+		async def handler(name, number):
+			received.append((name, number))
+
+		pipeline = CallbackPipeline(handler, workers=1, high_water_mark=2, policies=dict(Drop='drop', Merge='merge'))
+		pipeline.start()
+		pipeline.put('player-1', 'Merge', ('Merge', 1))
+		pipeline.put('player-1', 'Other', ('Other', 2))
+		assert pipeline.put('player-1', 'Drop', ('Drop', 3)) is False
+		pipeline.put('player-1', 'Merge', ('Merge', 4))
+		pipeline.put('player-1', 'Other', ('Other', 5))
+
+		await asyncio.sleep(0.05)
+		pipeline.stop()
+
+		assert received == [('Merge', 4), ('Other', 2), ('Other', 5)]
+		assert pipeline.stats['dropped'] == 1
+		assert pipeline.stats['merged'] == 1
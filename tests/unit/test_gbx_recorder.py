@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+
+from pyplanet.core.gbx.recorder import GbxRecorder
+
+
+class TestGbxRecorder(unittest.TestCase):
+	def test_roundtrip(self):
+		path = os.path.join(tempfile.mkdtemp(), 'recording.gbx')
+
+		recorder = GbxRecorder(path)
+		recorder.write(GbxRecorder.SENT, 0x80000000, b'<methodCall/>')
+		recorder.write(GbxRecorder.RECEIVED, 0x80000000, b'<methodResponse/>')
+		recorder.close()
+
+		# Appending to an existing recording.
+		recorder = GbxRecorder(path)
+		recorder.write(GbxRecorder.RECEIVED, 12, b'<methodCall>callback</methodCall>')
+		recorder.close()
+
+		frames = list(GbxRecorder.read(path))
+		assert [(f.direction, f.handle, f.body) for f in frames] == [
+			(GbxRecorder.SENT, 0x80000000, b'<methodCall/>'),
+			(GbxRecorder.RECEIVED, 0x80000000, b'<methodResponse/>'),
+			(GbxRecorder.RECEIVED, 12, b'<methodCall>callback</methodCall>'),
+		]
+		assert frames[0].timestamp <= frames[2].timestamp
@@ -0,0 +1,234 @@
+import asyncio
+import struct
+import time
+
+import asynctest
+
+from xmlrpc.client import Fault, dumps
+
+from pyplanet.core.exceptions import TransportException
+from pyplanet.core.gbx.codec import FastCodec, StdlibCodec
+from pyplanet.core.gbx.remote import GbxRemote, decode_body
+from tests.benchmarks.fake_dedicated import FakeDedicated
+
+
+class SlowCodec(FastCodec):
+	"""
+	Codec that takes a while to decode the large bodies, like big responses and callbacks do.
+	"""
+
+	def loads(self, body):
+		if len(body) >= 1000:
+			time.sleep(0.05)
+		return super().loads(body)
+
+
+def frame(handle, body):
+	return struct.pack('<LL', len(body), handle) + body
+
+
+def callback_frame(number, size=0):
+	return frame(number, FastCodec().dumps('PyPlanet.Test', (number, 'x' * size)))
+
+
+def response_frame(handle, value):
+	return frame(handle, dumps((value,), methodresponse=True, allow_none=True).encode())
+
+
+class TestGbxRemote(asynctest.TestCase):
+	def get_remote(self, **kwargs):
+		remote = GbxRemote('127.0.0.1', 5000, codec=SlowCodec(), callback_workers=0, **kwargs)
+		remote.reader = asyncio.StreamReader()
+		return remote
+
+	async def test_ordered_dispatch(self):
+		remote = self.get_remote(decode_threshold=1000)
+		dispatched = list()
+		dispatch_payload = remote.dispatch_payload
+
+		def record(handle_nr, method, data, fault):
+			dispatched.append(handle_nr if method is None else data[0])
+			dispatch_payload(handle_nr, method, data, fault)
+		remote.dispatch_payload = record
+
+		large, small = 0x80000001, 0x80000002
+		remote.handlers[large] = large_future = asyncio.Future()
+		remote.handlers[small] = small_future = asyncio.Future()
+
+		# A large callback, decoded in the pool, followed by small callbacks that are decoded inline. And a large and
+		# small response, for different handles.
+		remote.reader.feed_data(b''.join([
+			callback_frame(1, size=2000),
+			callback_frame(2),
+			response_frame(large, 'x' * 2000),
+			callback_frame(3),
+			response_frame(small, 'small'),
+			callback_frame(4),
+		]))
+		listen_task = asyncio.ensure_future(remote.listen())
+
+		# The small response doesn't wait on the decoding of the large frames.
+		assert await asyncio.wait_for(small_future, 1) == 'small'
+		assert 1 not in dispatched and large not in dispatched
+		assert await asyncio.wait_for(large_future, 1) == 'x' * 2000
+
+		await asyncio.sleep(0.01)
+		listen_task.cancel()
+		if remote.decode_pool:
+			remote.decode_pool.shutdown()
+
+		# The callbacks kept the order of arrival, the responses are delivered to their own handles.
+		assert [number for number in dispatched if number < 0x80000000] == [1, 2, 3, 4]
+		assert dispatched.index(small) < dispatched.index(large)
+		assert not remote.decode_lanes
+
+	async def test_ordered_dispatch_inline(self):
+		remote = self.get_remote(decode_threshold=None)
+		dispatched = list()
+
+		def record(handle_nr, method, data, fault):
+			dispatched.append(data[0])
+		remote.dispatch_payload = record
+
+		remote.reader.feed_data(b''.join([callback_frame(1, size=2000), callback_frame(2), callback_frame(3)]))
+		listen_task = asyncio.ensure_future(remote.listen())
+		await asyncio.sleep(0.1)
+		listen_task.cancel()
+
+		assert dispatched == [1, 2, 3]
+		assert remote.decode_pool is None
+
+	async def test_callback_route(self):
+		remote = self.get_remote()
+		waypoint = '{"login": "player_1", "racetime": 1000}'
+		scores = '{"players": [{"login": "player_1"}, {"login": "player_2"}]}'
+		callbacks = [
+			('ManiaPlanet.PlayerConnect', ('player_1', False), ('player_1', 'ManiaPlanet.PlayerConnect')),
+			('ManiaPlanet.PlayerDisconnect', ('player_1', ''), ('player_1', 'ManiaPlanet.PlayerDisconnect')),
+			('ManiaPlanet.PlayerChat', (1, 'player_1', 'Hi', False), ('player_1', 'ManiaPlanet.PlayerChat')),
+			('ManiaPlanet.PlayerInfoChanged', (dict(Login='player_1'),), ('player_1', 'ManiaPlanet.PlayerInfoChanged')),
+			('ManiaPlanet.ModeScriptCallbackArray', ('Trackmania.Event.WayPoint', [waypoint]), (
+				'player_1', 'Trackmania.Event.WayPoint'
+			)),
+			('ManiaPlanet.ModeScriptCallbackArray', ('Trackmania.Scores', [scores]), (None, 'Trackmania.Scores')),
+			('ManiaPlanet.BeginMap', (dict(UId='map'),), (None, 'ManiaPlanet.BeginMap')),
+		]
+
+		# Route the callbacks as decoded by the codecs.
+		for codec in (FastCodec(), StdlibCodec()):
+			for method, params, route in callbacks:
+				method, data, _ = decode_body(codec, FastCodec().dumps(method, params))
+				assert remote.get_callback_route(method, data) == route
+
+	async def test_close_connection(self):
+		remote = self.get_remote()
+		remote.transport = transport = asynctest.Mock()
+		remote.handlers[0x80000001] = response = asyncio.Future()
+		remote.script_handlers['0' * 32] = script_response = asyncio.Future()
+
+		remote.close_connection()
+		transport.stop.assert_called_once_with()
+		assert remote.transport is None and remote.reader is None
+		assert not remote.handlers and not remote.script_handlers
+		with self.assertRaises(TransportException):
+			response.result()
+		with self.assertRaises(TransportException):
+			script_response.result()
+
+	async def test_lost_connection(self):
+		remote = self.get_remote(reconnect=True)
+		remote.reconnect = asynctest.CoroutineMock()
+
+		remote.reader.feed_eof()
+		await remote.listen()
+		await remote.reconnect_task
+		remote.reconnect.assert_awaited_once_with()
+
+	async def test_reconnect_backoff(self):
+		remote = self.get_remote(reconnect=True, reconnect_max_delay=4, reconnect_timeout=None)
+		remote.connect = asynctest.CoroutineMock(side_effect=[OSError('Connection refused')] * 5 + [None])
+
+		with asynctest.patch('asyncio.sleep') as sleep:
+			await remote.reconnect()
+
+		assert [call[0][0] for call in sleep.call_args_list] == [1, 2, 4, 4, 4]
+		assert remote.connect.await_count == 6
+		remote.connect.assert_awaited_with(max_retries=0)
+		assert remote.reconnect_task is None
+
+	async def test_reconnect_timeout(self):
+		remote = self.get_remote(reconnect=True, reconnect_timeout=0.05)
+
+		async def connect(max_retries=10):
+			time.sleep(0.02)
+			raise OSError('Connection refused')
+		remote.connect = connect
+
+		with asynctest.patch('asyncio.sleep'), \
+			asynctest.patch('pyplanet.core.gbx.remote.exit', create=True, side_effect=SystemExit) as exit_process:
+			with self.assertRaises(SystemExit):
+				await remote.reconnect()
+		exit_process.assert_called_once_with(10)
+
+	async def test_reconnect_fake_dedicated(self):
+		server = FakeDedicated()
+		await server.start()
+		remote = GbxRemote('127.0.0.1', server.port, user='SuperAdmin', password='SuperAdmin', reconnect=True)
+		try:
+			await remote.connect()
+			assert await remote.execute('GetServerName') == 'Fake Dedicated'
+
+			# Restarting dedicated, the waiting requests are failed and the connection is restored.
+			remote.handlers[0x80000000] = response = asyncio.Future()
+			server.drop_connections()
+			with self.assertRaises(TransportException):
+				await asyncio.wait_for(response, 1)
+
+			for _ in range(100):
+				if remote.reconnect_task is None and remote.transport:
+					break
+				await asyncio.sleep(0.01)
+			assert await remote.execute('GetServerName') == 'Fake Dedicated'
+		finally:
+			await remote.disconnect()
+			await server.stop()
+
+	async def test_reconnect_authenticate_fails(self):
+		server = FakeDedicated()
+		await server.start()
+		remote = GbxRemote(
+			'127.0.0.1', server.port, user='SuperAdmin', password='SuperAdmin', reconnect=True, reconnect_max_delay=0.01
+		)
+		reconnects = list()
+		reconnect = remote.reconnect
+
+		async def record_reconnect():
+			reconnects.append(True)
+			await reconnect()
+		remote.reconnect = record_reconnect
+
+		authentications = list()
+
+		def authenticate(*args):
+			authentications.append(args)
+			if 1 < len(authentications) < 4:
+				raise Fault(-1000, 'Authentication failed.')
+			return True
+		server.methods['Authenticate'] = authenticate
+
+		try:
+			await remote.connect()
+			server.drop_connections()
+
+			for _ in range(300):
+				if len(authentications) >= 4 and remote.reconnect_task is None and remote.transport:
+					break
+				await asyncio.sleep(0.01)
+
+			# The failed connections of the reconnect loop don't start other reconnect loops.
+			assert len(authentications) == 4
+			assert len(reconnects) == 1
+			assert await remote.execute('GetServerName') == 'Fake Dedicated'
+		finally:
+			await remote.disconnect()
+			await server.stop()
@@ -0,0 +1,68 @@
+import asyncio
+import asynctest
+
+from pyplanet.core.gbx.transport import GbxTransport
+
+
+class FakeTransport:
+	def get_write_buffer_size(self):
+		return 0
+
+	def set_write_buffer_limits(self, high=None):
+		pass
+
+
+class FakeWriter:
+	def __init__(self):
+		self.transport = FakeTransport()
+		self.written = list()
+
+	def get_extra_info(self, name):
+		return None
+
+	def write(self, data):
+		self.written.append(data)
+
+	async def drain(self):
+		pass
+
+
+class TestGbxTransport(asynctest.TestCase):
+	async def test_priority(self):
+		assert GbxTransport.get_priority('ChooseNextMap', ()) == GbxTransport.PRIORITY_HIGH
+		assert GbxTransport.get_priority('GetPlayerList', (-1, 0)) == GbxTransport.PRIORITY_NORMAL
+		assert GbxTransport.get_priority('SendDisplayManialinkPage', ('', 0, False)) == GbxTransport.PRIORITY_BULK
+		assert GbxTransport.get_priority('system.multicall', ([
+			dict(methodName='SendDisplayManialinkPageToLogin', params=[]),
+			dict(methodName='SendHideManialinkPage', params=[]),
+		],)) == GbxTransport.PRIORITY_BULK
+		assert GbxTransport.get_priority('system.multicall', ([
+			dict(methodName='SendDisplayManialinkPageToLogin', params=[]),
+			dict(methodName='GetPlayerInfo', params=[]),
+		],)) == GbxTransport.PRIORITY_NORMAL
+
+	async def test_window(self):
+		writer = FakeWriter()
+		transport = GbxTransport(writer, max_in_flight=1)
+		futures = [asyncio.Future() for _ in range(4)]
+
+		transport.send(1, b'normal', futures[0], GbxTransport.PRIORITY_NORMAL)
+		transport.send(2, b'bulk', futures[1], GbxTransport.PRIORITY_BULK)
+		transport.send(3, b'high', futures[2], GbxTransport.PRIORITY_HIGH)
+		transport.send(4, b'expired', futures[3], GbxTransport.PRIORITY_HIGH)
+		futures[3].cancel()
+		transport.start()
+
+		await asyncio.sleep(0.01)
+		assert writer.written == [b'high']
+
+		transport.complete(3)
+		await asyncio.sleep(0.01)
+		transport.complete(1)
+		await asyncio.sleep(0.01)
+		transport.stop()
+
+		assert writer.written == [b'high', b'normal', b'bulk']
+		metrics = transport.get_metrics()
+		assert metrics['expired'] == 1
+		assert metrics['in_flight'] == 0
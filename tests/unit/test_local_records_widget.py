@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import asynctest
+
+from pyplanet.apps.contrib.local_records.views import LocalRecordsWidget
+
+
+class Player(SimpleNamespace):
+	def get_id(self):
+		return self.id
+
+
+def get_players(count):
+	return [
+		Player(id=number, login='player{}'.format(number), nickname='Player {}'.format(number))
+		for number in range(1, count + 1)
+	]
+
+
+class TestLocalRecordsWidget(asynctest.TestCase):
+	def get_widget(self, records, online, record_limit=0):
+		app = SimpleNamespace(
+			context=SimpleNamespace(ui=None),
+			current_records=records,
+			records_version=1,
+			setting_record_limit=SimpleNamespace(get_value=asynctest.CoroutineMock(return_value=record_limit)),
+			instance=SimpleNamespace(performance_mode=False, player_manager=SimpleNamespace(online=online)),
+		)
+		return LocalRecordsWidget(app)
+
+	async def test_windows(self):
+		players = get_players(40)
+		records = [
+			SimpleNamespace(player=player, player_id=player.id, score=1000 * player.id) for player in players[:30]
+		]
+		widget = self.get_widget(records, [players[0], players[2], players[19], players[28], players[35]])
+
+		data = await widget.get_player_data()
+		indexes = {login: [time['index'] for time in data[login]['times']] for login in data}
+
+		# Top record, rank in top and rank around the middle.
+		assert indexes['player1'] == list(range(1, 16))
+		assert indexes['player3'] == list(range(1, 16))
+		assert indexes['player20'] == [1, 2, 3, 4, 5] + list(range(15, 25))
+
+		# Close to the end and without record, the last records are shown.
+		assert indexes['player29'] == [1, 2, 3, 4, 5] + list(range(22, 31))
+		assert indexes['player36'] == [1, 2, 3, 4, 5] + list(range(21, 31))
+
+		own = [time for time in data['player20']['times'] if time['color'] == '$0f3']
+		assert len(own) == 1 and own[0]['nickname'] == 'Player 20' and own[0]['score'] == '0:20.000'
+
+		# The index is only rebuild when the records changed.
+		records[0].player = Player(id=1, login='player1', nickname='Renamed')
+		data = await widget.get_player_data()
+		assert data['player1']['times'][0]['nickname'] == 'Player 1'
+
+		widget.app.records_version += 1
+		data = await widget.get_player_data()
+		assert data['player1']['times'][0]['nickname'] == 'Renamed'
+
+	async def test_record_limit(self):
+		players = get_players(10)
+		records = [SimpleNamespace(player=player, player_id=player.id, score=1000 * player.id) for player in players]
+		widget = self.get_widget(records, [players[8]], record_limit=8)
+
+		data = await widget.get_player_data()
+		times = data['player9']['times']
+		assert [time['index'] for time in times] == list(range(1, 9))
+		assert all(time['color'] != '$0f3' for time in times)
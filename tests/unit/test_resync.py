@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import asynctest
+
+from pyplanet.contrib.map.manager import MapManager
+from pyplanet.contrib.player.manager import PlayerManager
+from pyplanet.core.instance import Instance
+from pyplanet.core.signals import pyplanet_gbx_reconnected
+
+
+class FakeMap:
+	def __init__(self, uid):
+		self.uid = uid
+
+
+def get_instance(responses):
+	async def gbx(method, *args):
+		return responses[method]
+
+	callbacks = dict()
+
+	def get_callback(name):
+		return callbacks.setdefault(name, SimpleNamespace(send_robust=asynctest.CoroutineMock()))
+
+	return SimpleNamespace(
+		gbx=gbx, callbacks=callbacks, signals=SimpleNamespace(get_callback=get_callback, listen=asynctest.Mock())
+	)
+
+
+class TestResync(asynctest.TestCase):
+	async def test_players(self):
+		instance = get_instance(dict(GetPlayerList=[
+			dict(Login='player_2', SpectatorStatus=0), dict(Login='player_3', SpectatorStatus=2551101),
+		]))
+		manager = PlayerManager(instance)
+		manager._online_logins = {'player_1', 'player_2'}
+		manager.map_loaded = asynctest.CoroutineMock()
+
+		await manager.resync()
+
+		# The players that left and joined meanwhile are handled like the dedicated callbacks.
+		instance.callbacks['ManiaPlanet.PlayerDisconnect'].send_robust.assert_awaited_once_with(
+			['player_1', 'Connection lost']
+		)
+		instance.callbacks['ManiaPlanet.PlayerConnect'].send_robust.assert_awaited_once_with(['player_3', True])
+		manager.map_loaded.assert_awaited_once_with()
+
+	async def test_maps(self):
+		maps = [FakeMap('map_{}'.format(nr)) for nr in range(4)]
+		instance = get_instance(dict(
+			GetMapList=[dict(UId='map_0'), dict(UId='map_2'), dict(UId='map_3')],
+			GetCurrentMapInfo=dict(UId='map_2'), GetNextMapInfo=dict(UId='map_3'),
+		))
+		manager = MapManager(instance)
+		manager._maps = set(maps)
+		manager._current_map, manager._next_map = maps[1], maps[2]
+		manager.handle_map_change = asynctest.CoroutineMock()
+		manager.get_map = asynctest.CoroutineMock(return_value=maps[3])
+
+		# Updating without removing keeps the maps that aren't in the list anymore.
+		assert await manager.update_list() == []
+		assert manager.maps == set(maps)
+
+		await manager.resync()
+		assert manager.maps == {maps[0], maps[2], maps[3]}
+		manager.handle_map_change.assert_awaited_once_with(dict(UId='map_2'))
+		manager.get_map.assert_awaited_once_with('map_3')
+		assert manager._next_map is maps[3]
+
+	async def test_instance(self):
+		calls = list()
+
+		def record(name):
+			async def call(*args):
+				calls.append(name)
+			return call
+
+		instance = SimpleNamespace(
+			map_manager=SimpleNamespace(resync=record('maps')),
+			player_manager=SimpleNamespace(resync=record('players')),
+			ui_manager=SimpleNamespace(replay=record('ui')),
+			_Instance__fire_signal=asynctest.CoroutineMock(),
+		)
+		await Instance.resync(instance)
+
+		assert calls == ['maps', 'players', 'ui']
+		instance._Instance__fire_signal.assert_awaited_once_with(pyplanet_gbx_reconnected)
@@ -0,0 +1,50 @@
+import asyncio
+
+import asynctest
+
+from pyplanet.core.events import Signal
+from pyplanet.core.events.stats import SignalStats
+
+
+class TestSignalStats(asynctest.TestCase):
+	async def setUp(self):
+		SignalStats.configure(enabled=True, slow_threshold=0.01)
+		SignalStats.reset()
+
+	async def tearDown(self):
+		SignalStats.configure(enabled=False)
+		SignalStats.reset()
+
+	async def test_recording(self):
+		signal = Signal(code='test_stats', namespace='tests')
+		signal.register(self.fast_listener)
+		signal.register(self.slow_listener)
+		signal.register(self.failing_listener)
+
+		for _ in range(3):
+			await signal.send_robust(dict(value=1), raw=True)
+
+		top = SignalStats.get_top(10)
+		assert len(top) == 3
+		assert top[0].receiver.endswith('slow_listener')
+		assert top[0].signal == 'tests:test_stats'
+		assert top[0].count == 3
+		assert top[0].slow == 3
+		assert sum(top[0].histogram) == 3
+
+		failing = [stats for stats in top if stats.receiver.endswith('failing_listener')][0]
+		assert failing.exceptions == 3
+
+		# Nothing is recorded when disabled.
+		SignalStats.disable()
+		await signal.send_robust(dict(value=1), raw=True)
+		assert SignalStats.get_top(1)[0].count == 3
+
+	async def fast_listener(self, **kwargs):
+		pass
+
+	async def slow_listener(self, **kwargs):
+		await asyncio.sleep(0.02)
+
+	async def failing_listener(self, **kwargs):
+		raise Exception('Failing listener')
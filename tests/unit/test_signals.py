@@ -1,8 +1,12 @@
+import asyncio
+import gc
+
 import asynctest
 
 from pyplanet.apps import AppConfig
 from pyplanet.core import Controller
 from pyplanet.core.events import Signal
+from pyplanet.core.exceptions import SignalException
 
 
 class TestSignals(asynctest.TestCase):
@@ -92,6 +96,110 @@ class TestSignals(asynctest.TestCase):
 		assert self.got_sync == 1
 		assert self.got_async == 1
 
+	async def test_snapshot(self):
+		test1 = Signal(code='test1', namespace='tests')
+		listener = Listener()
+		other = Listener()
+		test1.register(listener.on_event)
+		test1.register(other.on_event)
+
+		await test1.send(dict(), raw=True)
+		version = test1.version
+		snapshot = test1._snapshot
+		await test1.send(dict(), raw=True)
+
+		# The snapshot is reused between sends.
+		assert test1._snapshot is snapshot
+		assert test1.version == version
+		assert listener.calls == 2
+
+		# And rebuild when the weak referenced receiver is gone.
+		await asyncio.sleep(0)
+		del listener
+		gc.collect()
+		assert test1.version > version
+		assert len(test1._live_receivers()) == 1
+
+		test1.unregister(other.on_event)
+		assert not test1.has_listeners()
+
+	async def test_conditions(self):
+		test1 = Signal(code='test_conditions', namespace='tests')
+		everyone = Listener()
+		single = Listener()
+		multiple = Listener()
+		prefix = Listener()
+		custom = Listener()
+
+		test1.register(everyone.on_event)
+		test1.register(single.on_event, conditions=dict(login='login_1'))
+		test1.register(multiple.on_event, conditions=dict(login=['login_1', 'login_2'], map_uid='uid_1'))
+		test1.register(prefix.on_event, conditions=dict(action_prefix='app__'))
+		test1.register(custom.on_event, conditions=dict(key=lambda kw: kw.get('time', 0) > 100, values={True}))
+
+		await test1.send(dict(login='login_1', map_uid='uid_1'), raw=True)
+		await test1.send(dict(login='login_2', map_uid='uid_2'), raw=True)
+		await test1.send(dict(login='login_3', action='app__test', time=200), raw=True)
+		responses = await test1.send(dict(login='login_2', map_uid='uid_1'), raw=True)
+
+		assert everyone.calls == 4
+		assert single.calls == 1
+		assert multiple.calls == 2
+		assert prefix.calls == 1
+		assert custom.calls == 1
+
+		# Order of registration is kept when filtered receivers match.
+		assert [receiver.__self__ for receiver, _ in responses] == [everyone, multiple]
+
+		# Unregistering removes the receiver from the index.
+		test1.unregister(single.on_event)
+		await test1.send(dict(login='login_1'), raw=True)
+		assert single.calls == 1
+
+		with self.assertRaises(SignalException):
+			test1.register(single.on_event, conditions=dict(unknown=True))
+
+	async def test_coalesce(self):
+		test1 = Signal(code='test_coalesce', namespace='tests')
+		latest = Listener()
+		reduced = Listener()
+
+		test1.register(latest.on_event, coalesce=0.05, key=lambda kw: kw['login'])
+		test1.register(
+			reduced.on_event, coalesce=0.05,
+			reducer=lambda previous, kw: dict(kw, count=(previous['count'] if previous else 0) + 1),
+		)
+
+		for nr in range(10):
+			await test1.send(dict(login='login_{}'.format(nr % 2), nr=nr), raw=True)
+		assert latest.calls == 0
+		assert reduced.calls == 0
+
+		await asyncio.sleep(0.1)
+		assert latest.calls == 2
+		assert [kwargs['nr'] for kwargs in latest.received] == [8, 9]
+		assert reduced.calls == 1
+		assert reduced.received[0]['count'] == 10
+		assert reduced.received[0]['nr'] == 9
+
+		# Pending events are dropped when unregistering.
+		await test1.send(dict(login='login_1', nr=10), raw=True)
+		test1.unregister(latest.on_event)
+		await asyncio.sleep(0.1)
+		assert latest.calls == 2
+		assert reduced.calls == 2
+
+		with self.assertRaises(SignalException):
+			test1.register(latest.on_event, key=lambda kw: kw['login'])
+
+		# Registering again replaces the coalescer, the pending events of the previous coalescer are dropped.
+		await test1.send(dict(login='login_1', nr=11), raw=True)
+		coalescer = test1.coalescers[next(iter(test1.coalescers))]
+		test1.register(reduced.on_event, coalesce=0.05)
+		assert coalescer.handle is None and not coalescer.pending
+		await asyncio.sleep(0.1)
+		assert reduced.calls == 2
+
 	####################################################################################################################
 
 	def sync_listener(self, glue=None, source=None, **kwargs):
@@ -111,3 +219,13 @@ class TestSignals(asynctest.TestCase):
 	async def glue(self, source, signal):
 		self.got_glue += 1
 		return dict(glue=True)
+
+
+class Listener:
+	def __init__(self):
+		self.calls = 0
+		self.received = list()
+
+	async def on_event(self, **kwargs):
+		self.calls += 1
+		self.received.append(kwargs)
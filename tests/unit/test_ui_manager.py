@@ -0,0 +1,331 @@
+import asyncio
+
+import asynctest
+
+from pyplanet.core.ui import GlobalUIManager, _BaseUIManager
+from pyplanet.core.ui.components.manialink import DynamicManiaLink, StaticManiaLink
+
+
+class FakeGbx:
+	def __init__(self):
+		self.calls = list()
+
+	def __call__(self, method, *args, **kwargs):
+		return method, args
+
+	async def multicall(self, *queries):
+		self.calls.extend(queries)
+
+
+class FakeGame:
+	game = 'tm'
+
+
+class FakeUIManager:
+	def add_route(self, manialink):
+		pass
+
+	def remove_route(self, manialink):
+		pass
+
+
+class FakeInstance:
+	def __init__(self):
+		self.gbx = FakeGbx()
+		self.game = FakeGame()
+		self.ui_manager = FakeUIManager()
+
+
+class FakePlayer:
+	def __init__(self, login):
+		self.login = login
+
+
+class TestUIManager(asynctest.TestCase):
+	async def test_skip_unchanged(self):
+		instance = FakeInstance()
+		manager = _BaseUIManager(instance)
+		manialink = StaticManiaLink(manager=manager, id='test_skip', body='<label text="1"/>')
+
+		await manager.send(manialink)
+		await manager.send(manialink)
+		assert len(instance.gbx.calls) == 1
+		assert manialink.bytes_saved > 0
+
+		# Changed body is send.
+		manialink.body = '<label text="2"/>'
+		await manager.send(manialink)
+		assert len(instance.gbx.calls) == 2
+
+		# Per player display replaces the global display for the player.
+		await manager.send(manialink, ['player_1'])
+		assert len(instance.gbx.calls) == 3
+		await manager.send(manialink, ['player_1', 'player_2'])
+		assert len(instance.gbx.calls) == 4
+		assert instance.gbx.calls[-1][1][0] == 'player_2'
+		await manager.send(manialink)
+		assert len(instance.gbx.calls) == 5
+
+		# Forced and after hiding.
+		await manager.send(manialink, force=True)
+		assert len(instance.gbx.calls) == 6
+		await manager.hide(manialink, ['player_1'])
+		await manager.send(manialink, ['player_1', 'player_2'])
+		assert instance.gbx.calls[-1][1][0] == 'player_1,player_2'
+
+		# Invalidated when the player disconnects.
+		calls = len(instance.gbx.calls)
+		manager.invalidate(logins=['player_2'])
+		await manager.send(manialink, ['player_1', 'player_2'])
+		assert len(instance.gbx.calls) == calls + 1
+		assert instance.gbx.calls[-1][1][0] == 'player_2'
+
+	async def test_send_disappearing(self):
+		instance = FakeInstance()
+		manager = _BaseUIManager(instance)
+		timeout = StaticManiaLink(manager=manager, id='test_timeout', body='<label/>', timeout=5)
+		hide_click = StaticManiaLink(manager=manager, id='test_hide_click', body='<label/>', hide_click=True)
+
+		# The client hides these by itself, the same body is send again.
+		for manialink in (timeout, hide_click):
+			await manager.send(manialink, ['player_1'])
+			await manager.send(manialink, ['player_1'])
+		assert len(instance.gbx.calls) == 4
+		assert not manager.body_hashes
+
+	async def test_render_per_group(self):
+		instance = FakeInstance()
+		manager = _BaseUIManager(instance)
+		manialink = StaticManiaLink(manager=manager, id='test_group', player_data={
+			'player_1': dict(record=None), 'player_2': dict(record=None), 'player_3': dict(record=[1, 2]),
+			'player_4': dict(record=[1, 2]), 'player_5': dict(record=[1, 3]),
+		})
+		rendered = list()
+
+		async def get_template():
+			return True
+
+		async def render(player_login=None, **kwargs):
+			rendered.append(player_login)
+			return '<label text="{}"/>'.format(manialink.player_data[player_login]['record'])
+
+		manialink.get_template = get_template
+		manialink.render = render
+
+		await manager.send(manialink)
+		assert rendered == ['player_1', 'player_3', 'player_5']
+		assert [call[1][0] for call in instance.gbx.calls] == ['player_1,player_2', 'player_3,player_4', 'player_5']
+
+	async def test_data_binding(self):
+		instance = FakeInstance()
+		manager = _BaseUIManager(instance)
+		manialink = DynamicManiaLink(manager=manager, id='test_binding', body='<label id="a"/><label id="b"/>')
+		values = dict(a='1', b='1')
+
+		async def get_bindings(player_login=None, player_data=None):
+			return dict(values)
+
+		manialink.get_bindings = get_bindings
+
+		await manager.send(manialink)
+		assert len(instance.gbx.calls) == 1
+		assert 'id="test_binding"' in instance.gbx.calls[-1][1][0]
+
+		# Only the changed values are send, to the displayed layout.
+		values['b'] = '2'
+		await manager.send(manialink)
+		assert len(instance.gbx.calls) == 2
+		assert 'id="test_binding__binding"' in instance.gbx.calls[-1][1][0]
+		assert '"""{"_v": "1", "b": "2"}"""' in instance.gbx.calls[-1][1][0]
+		await manager.send(manialink)
+		assert len(instance.gbx.calls) == 2
+
+		# The layout is send again when the bound elements change or when invalidated.
+		values['c'] = '1'
+		await manager.send(manialink)
+		assert len(instance.gbx.calls) == 3
+		assert 'id="test_binding"' in instance.gbx.calls[-1][1][0]
+		assert manialink.binding_version == 2
+
+		# Per player states.
+		values['a'] = '2'
+		await manager.send(manialink, ['player_1', 'player_2'])
+		assert instance.gbx.calls[-1][1][0] == 'player_1,player_2'
+		assert '"""{"_v": "2", "a": "2"}"""' in instance.gbx.calls[-1][1][1]
+
+		manager.invalidate(logins=['player_1'])
+		values['b'] = '3'
+		await manager.send(manialink, ['player_1', 'player_2'])
+		assert [call[1][0] for call in instance.gbx.calls[4:]] == ['player_2', 'player_1']
+		assert '"""{"_v": "2", "a": "2", "b": "3"}"""' in instance.gbx.calls[4][1][1]
+
+		# The layout and the binding page are removed when hiding and destroying.
+		calls = len(instance.gbx.calls)
+		await manager.hide(manialink, ['player_1'])
+		assert instance.gbx.calls[calls:] == [
+			('SendDisplayManialinkPageToLogin', ('player_1', '<manialink id="test_binding"></manialink>', 0, False)),
+			('SendDisplayManialinkPageToLogin', ('player_1', '<manialink id="test_binding__binding"></manialink>', 0, False)),
+		]
+
+		calls = len(instance.gbx.calls)
+		await manager.destroy(manialink)
+		assert instance.gbx.calls[calls:] == [
+			('SendDisplayManialinkPage', ('<manialink id="test_binding"></manialink>', 0, False)),
+			('SendDisplayManialinkPage', ('<manialink id="test_binding__binding"></manialink>', 0, False)),
+		]
+
+	async def test_data_binding_values(self):
+		instance = FakeInstance()
+		manager = _BaseUIManager(instance)
+		manialink = DynamicManiaLink(manager=manager, id='test_binding_values', body='<label id="a"/>')
+		values = dict()
+
+		async def get_bindings(player_login=None, player_data=None):
+			return dict(values)
+
+		manialink.get_bindings = get_bindings
+
+		# Without bound values the unchanged layout isn't send again.
+		await manager.send(manialink)
+		await manager.send(manialink)
+		assert len(instance.gbx.calls) == 1
+		assert manialink.binding_version == 1
+
+		# Braces in the values can't be interpolated by the ManiaScript string.
+		values['a'] = '1'
+		await manager.send(manialink)
+		values['a'] = '$f00{{{ Nick }}} -->'
+		await manager.send(manialink)
+		assert len(instance.gbx.calls) == 3
+		body = instance.gbx.calls[-1][1][0]
+		assert '"""{"_v": "2", "a": "$f00\\u007b\\u007b\\u007b Nick \\u007d\\u007d\\u007d --\\u003e"}"""' in body
+		assert body.count('{{{') == 0 and body.count('-->') == 1
+
+	async def test_scheduler(self):
+		instance = FakeInstance()
+		manager = _BaseUIManager(instance)
+		manialink = StaticManiaLink(manager=manager, id='test_scheduler', max_refresh_rate=10)
+		rendered = list()
+
+		async def get_template():
+			return True
+
+		async def render(player_login=None, **kwargs):
+			rendered.append(manialink.data['value'])
+			return '<label text="{}"/>'.format(manialink.data['value'])
+
+		manialink.get_template = get_template
+		manialink.render = render
+
+		manialink.data['value'] = 0
+		await manager.send(manialink)
+		await asyncio.sleep(0.01)
+		assert rendered == [0]
+
+		for value in range(1, 5):
+			manialink.data['value'] = value
+			await manager.send(manialink)
+			await asyncio.sleep(0)
+		assert rendered == [0]
+
+		# The latest state is rendered once the manialink is due.
+		await asyncio.sleep(0.1)
+		assert rendered == [0, 4]
+		assert len(instance.gbx.calls) == 2
+
+		# Pending updates are dropped when hiding.
+		manialink.data['value'] = 5
+		await manager.send(manialink)
+		await manager.hide(manialink)
+		await asyncio.sleep(0.15)
+		assert rendered == [0, 4]
+
+	async def test_scheduler_player_data(self):
+		instance = FakeInstance()
+		manager = _BaseUIManager(instance)
+		manialink = StaticManiaLink(manager=manager, id='test_scheduler_data', max_refresh_rate=10)
+
+		async def get_template():
+			return True
+
+		async def render(player_login=None, player_data=None, **kwargs):
+			return '<label text="{}"/>'.format((player_data or manialink.player_data)[player_login]['value'])
+
+		manialink.get_template = get_template
+		manialink.render = render
+
+		# Display to all players, followed by a display for a connecting player within the same interval.
+		manialink.player_data = {'player_1': dict(value=1), 'player_2': dict(value=2)}
+		await manager.send(manialink)
+		await asyncio.sleep(0.01)
+		assert [call[1][0] for call in instance.gbx.calls] == ['player_1', 'player_2']
+
+		manialink.player_data = {'player_1': dict(value=3), 'player_2': dict(value=4)}
+		await manager.send(manialink)
+		manialink.player_data = {'player_3': dict(value=5)}
+		await manager.send(manialink, ['player_3'])
+		await asyncio.sleep(0.15)
+		assert sorted(call[1][0] for call in instance.gbx.calls[2:]) == ['player_1', 'player_2', 'player_3']
+		assert {call[1][0]: call[1][1] for call in instance.gbx.calls[2:]}['player_2'].endswith(
+			'<label text="4"/></manialink>'
+		)
+		# The snapshot is only used to render, the player data of the manialink is left as it is.
+		assert manialink.player_data == {'player_3': dict(value=5)}
+
+		# Data of the players that are hidden meanwhile is dropped.
+		manialink.player_data = {'player_1': dict(value=6), 'player_2': dict(value=7)}
+		await manager.send(manialink)
+		manialink.player_data = {'player_1': dict(value=6)}
+		manager.scheduler.discard(manialink, ['player_2'])
+		await manager.scheduler.flush([manialink.id])
+		assert [call[1][0] for call in instance.gbx.calls[5:]] == ['player_1']
+		assert manialink.player_data == {'player_1': dict(value=6)}
+
+		# The send times are forgotten once they don't delay an update anymore.
+		assert manialink.id in manager.scheduler.last_sent
+		await asyncio.sleep(0.15)
+		await manager.scheduler.flush([])
+		assert manialink.id not in manager.scheduler.last_sent
+
+	async def test_replay(self):
+		instance = FakeInstance()
+		instance.player_manager = asynctest.Mock(online_logins={'player_1', 'player_3'})
+		manager = _BaseUIManager(instance)
+		widget = StaticManiaLink(manager=manager, id='test_replay_global', body='<label text="1"/>')
+		widget._is_global_shown = True
+		view = StaticManiaLink(manager=manager, id='test_replay_view', body='<label text="2"/>')
+		view._is_player_shown.update(player_1=True, player_2=True, player_3=False)
+
+		await manager.send(widget)
+		await manager.send(view, ['player_1', 'player_2'])
+		assert len(instance.gbx.calls) == 2
+
+		# The unchanged manialinks are send again, only to the players that are still online and have them displayed.
+		await manager.replay()
+		assert instance.gbx.calls[2:] == [instance.gbx.calls[0], (
+			'SendDisplayManialinkPageToLogin',
+			('player_1', '<manialink version="3" id="test_replay_view"><label text="2"/></manialink>', 0, False)
+		)]
+
+	async def test_library(self):
+		instance = FakeInstance()
+		manager = GlobalUIManager(instance)
+
+		async def get_template():
+			return True
+
+		async def render(player_login=None, **kwargs):
+			return '<script><!-- main() {} --></script>'
+
+		manager.library.get_template = get_template
+		manager.library.render = render
+
+		# Send once to the connecting player, again after reconnecting.
+		await manager.handle_connect(FakePlayer('player_1'))
+		await manager.send(manager.library, ['player_1'])
+		assert [call[1][0] for call in instance.gbx.calls] == ['player_1']
+		assert 'id="pyplanet__library"' in instance.gbx.calls[0][1][1]
+
+		await manager.handle_connection(FakePlayer('player_1'))
+		await manager.handle_connect(FakePlayer('player_1'))
+		assert len(instance.gbx.calls) == 2
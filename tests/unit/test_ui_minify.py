@@ -0,0 +1,65 @@
+import asynctest
+from jinja2 import DictLoader, Environment
+
+from pyplanet.core.ui.minify import MinifyExtension, minify_script, minify_xml
+
+
+class TestMinify(asynctest.TestCase):
+	async def test_script(self):
+		source = '''
+			#Include "TextLib" as TextLib
+
+			main() {
+				// Comment with "quotes".
+				declare Text Url = "http://pyplanet.io/ // not a comment";  /* block
+				comment */ declare Text Ml = """<label   text="   kept" />""";
+				declare Text Value = "{{ value }}";    {% if test %}Value = "test";{% endif %}
+			}
+		'''
+		assert minify_script(source) == (
+			'#Include "TextLib" as TextLib\n'
+			'main() {\n'
+			'declare Text Url = "http://pyplanet.io/ // not a comment"; declare Text Ml = """<label   text="   kept" />""";\n'
+			'declare Text Value = "{{ value }}"; {% if test %}Value = "test";{% endif %}\n'
+			'}'
+		)
+
+	async def test_xml(self):
+		source = '''
+			<frame pos="0 0">
+				<!-- Comment -->
+				<label
+					pos="1 1" text="{{ text }}"/>
+				{% if quad %}<quad size="1 1"/>{% endif %}
+			</frame>
+			<script><!--
+				main() {
+					// Comment
+					yield;
+				}
+			--></script>
+		'''
+		assert minify_xml(source) == (
+			'<frame pos="0 0"><label pos="1 1" text="{{ text }}"/>{% if quad %}<quad size="1 1"/>{% endif %}</frame>'
+			'<script><!--\nmain() {\nyield;\n}\n--></script>'
+		)
+
+	async def test_render(self):
+		loader = DictLoader({
+			'tests/list.xml': '''
+				{% for item in items %}
+					<label text="{{ item }}"/>
+				{% endfor %}
+				<script><!-- {% include 'tests/list.Script.Txt' %} --></script>
+			''',
+			'tests/list.Script.Txt': '''
+				main() {
+					// {{ items|length }} items.
+					declare Count = {{ items|length }};
+				}
+			''',
+		})
+		environment = Environment(enable_async=True, loader=loader, extensions=[MinifyExtension])
+
+		body = await environment.get_template('tests/list.xml').render_async(items=['a', 'b'])
+		assert body == '<label text="a"/><label text="b"/><script><!-- main() {\ndeclare Count = 2;\n} --></script>'
@@ -0,0 +1,54 @@
+import asynctest
+
+from pyplanet.core import Controller
+from pyplanet.core.ui import GlobalUIManager
+from pyplanet.core.ui.components.manialink import StaticManiaLink
+
+
+class FakePlayer:
+	def __init__(self, login):
+		self.login = login
+
+
+class TestUIRouting(asynctest.TestCase):
+	async def test_routing(self):
+		instance = Controller.prepare(name='default').instance
+		manager = GlobalUIManager(instance)
+		received = list()
+
+		def get_target(name):
+			async def target(player, action, values):
+				received.append((name, player.login, action))
+			return target
+
+		widget = StaticManiaLink(manager=manager, id='pyplanet__widgets_test')
+		widget.subscribe('open', get_target('widget'))
+		widget._is_global_shown = True
+		view_1 = StaticManiaLink(manager=manager, id='pyplanet__views_test')
+		view_1.subscribe('button', get_target('view_1'))
+		view_1._is_player_shown['player_1'] = True
+		view_2 = StaticManiaLink(manager=manager, id='pyplanet__views_test')
+		view_2.subscribe('button', get_target('view_2'))
+		view_2._is_player_shown['player_2'] = True
+
+		for manialink in (widget, view_1, view_2):
+			manager.add_route(manialink)
+
+		assert manager.get_routes('pyplanet__widgets_test__open') == [widget]
+		assert manager.get_routes('pyplanet__widgets__open') == []
+		assert len(manager.get_routes('pyplanet__views_test__button')) == 2
+
+		# Only the view that is shown to the player gets the answer.
+		await manager.handle_answer(FakePlayer('player_2'), 'pyplanet__views_test__button', dict())
+		assert received == [('view_2', 'player_2', 'pyplanet__views_test__button')]
+
+		await manager.handle_answer(FakePlayer('player_1'), 'pyplanet__views_test__button', dict())
+		assert received[1:] == [('view_1', 'player_1', 'pyplanet__views_test__button')]
+
+		await manager.handle_answer(FakePlayer('player_1'), 'pyplanet__widgets_test__open', dict())
+		assert received[2:] == [('widget', 'player_1', 'pyplanet__widgets_test__open')]
+
+		manager.remove_route(view_2)
+		manager.remove_route(view_1)
+		assert manager.get_routes('pyplanet__views_test__button') == []
+		assert 'pyplanet__views_test' not in manager.routes
@@ -0,0 +1,56 @@
+import asynctest
+
+from pyplanet.core.ui import _BaseUIManager
+from pyplanet.core.ui.components.manialink import StaticManiaLink
+from pyplanet.core.ui.stats import UIStats
+
+from .test_ui_manager import FakeInstance
+
+
+class TestUIStats(asynctest.TestCase):
+	async def setUp(self):
+		UIStats.configure(enabled=True)
+		UIStats.reset()
+
+	async def tearDown(self):
+		UIStats.configure(enabled=False)
+		UIStats.reset()
+
+	async def test_recording(self):
+		instance = FakeInstance()
+		manager = _BaseUIManager(instance)
+		small = StaticManiaLink(manager=manager, id='test_small', body='<label/>')
+		large = StaticManiaLink(manager=manager, id='test_large', player_data={
+			'player_1': dict(text='a' * 100), 'player_2': dict(text='a' * 100),
+		})
+
+		async def get_template():
+			return True
+
+		async def render(player_login=None, **kwargs):
+			return '<label text="{}"/>'.format(large.player_data[player_login]['text'])
+
+		large.get_template = get_template
+		large.render = render
+
+		await manager.send(small)
+		await manager.send(large)
+		await manager.hide(large)
+
+		top = UIStats.get_top()
+		assert [stats.id for stats in top] == ['test_large', 'test_small']
+		assert top[0].app_label == 'core'
+		assert top[0].renders == 1
+		assert top[0].sends == 1
+		assert top[0].logins == 2
+		assert top[0].bytes == top[0].body_bytes * 2
+		assert top[0].hides == 1
+		assert top[1].renders == 0
+
+		dump = UIStats.dump()
+		assert dump['manialinks'][0]['id'] == 'test_large'
+
+		# Nothing is recorded when disabled.
+		UIStats.disable()
+		await manager.send(small, force=True)
+		assert top[1].sends == 1
@@ -0,0 +1,55 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+import asynctest
+from jinja2 import DictLoader, Environment
+
+from pyplanet.core.ui.minify import MINIFY_VERSION
+from pyplanet.core.ui.template import EnvironmentManager, load_template
+
+
+class TestTemplateCache(asynctest.TestCase):
+	async def setUp(self):
+		self.loader = DictLoader({'tests/label.xml': '<label text="{{ text }}"/>'})
+		self.original_environment = EnvironmentManager._environment
+		EnvironmentManager.clear()
+
+	async def tearDown(self):
+		EnvironmentManager._environment = self.original_environment
+		EnvironmentManager.clear()
+
+	async def test_cache(self):
+		EnvironmentManager._environment = Environment(enable_async=True, loader=self.loader, auto_reload=False)
+
+		template = await load_template('tests/label.xml')
+		assert template is await load_template('tests/label.xml')
+		assert await template.render(text='test') == '<label text="test"/>'
+
+		# Without auto reloading, changes are ignored.
+		self.loader.mapping['tests/label.xml'] = '<quad/>'
+		assert template is await load_template('tests/label.xml')
+
+	async def test_auto_reload(self):
+		EnvironmentManager._environment = Environment(enable_async=True, loader=self.loader, auto_reload=True)
+
+		template = await load_template('tests/label.xml')
+		assert template is await load_template('tests/label.xml')
+
+		self.loader.mapping['tests/label.xml'] = '<quad/>'
+		changed = await load_template('tests/label.xml')
+		assert changed is not template
+		assert await changed.render() == '<quad/>'
+
+	async def test_bytecode_cache_folder(self):
+		with tempfile.TemporaryDirectory() as tmp_path, \
+			asynctest.patch('pyplanet.core.ui.template.settings', new=SimpleNamespace(
+				TEMPLATE_BYTECODE_CACHE=True, TMP_PATH=tmp_path
+			)):
+			original = EnvironmentManager.get_bytecode_cache(minify=False)
+			minified = EnvironmentManager.get_bytecode_cache(minify=True)
+
+			# The minified templates are cached per version of the minification.
+			assert original.directory == os.path.join(tmp_path, 'templates', 'original')
+			assert minified.directory == os.path.join(tmp_path, 'templates', 'minified-{}'.format(MINIFY_VERSION))
+			assert os.path.isdir(minified.directory)
@@ -0,0 +1,74 @@
+import asynctest
+
+from pyplanet.views.generics import ManualListView
+
+
+class TestManualListView(asynctest.TestCase):
+	def get_view(self, data):
+		view = ManualListView(data=data)
+		view.fields = [
+			{'name': 'Name', 'index': 'name', 'sorting': True, 'searching': True, 'search_strip_styles': True},
+			{'name': 'Author', 'index': 'author', 'sorting': True, 'searching': True},
+			{'name': 'Time', 'index': 'time', 'sorting': True, 'searching': False},
+		]
+		view.num_per_page = 2
+		return view
+
+	async def test_search_sort_page(self):
+		data = [
+			dict(name='$f00Red Map', author='Alpha', time=3),
+			dict(name='Blue $oMap', author='Bravo', time=1),
+			dict(name='Green', author='Charlie', time=2),
+			dict(name=None, author='maps', time=4),
+		]
+		view = self.get_view(data)
+
+		view.sort_field = view.fields[2]
+		view.sort_order = 0
+		result = await view.get_object_data()
+		assert [o['time'] for o in result['objects']] == [4, 3]
+		assert result['count'] == 4
+
+		view.page = 2
+		result = await view.get_object_data()
+		assert [o['time'] for o in result['objects']] == [2, 1]
+
+		# Search in the style stripped and lowercase text.
+		view.page = 1
+		view.search_text = 'RED MAP'
+		result = await view.get_object_data()
+		assert [o['time'] for o in result['objects']] == [3]
+
+		view.search_text = 'map'
+		view.sort_order = 1
+		result = await view.get_object_data()
+		assert [o['time'] for o in result['objects']] == [1, 3]
+		assert result['count'] == 3
+
+	async def test_cache(self):
+		data = [dict(name='Map {}'.format(nr), author='Author', time=nr) for nr in range(5)]
+		view = self.get_view(data)
+
+		await view.get_object_data()
+		frame = view._frame
+
+		# Same or equal data reuses the frame.
+		await view.get_object_data()
+		assert view._frame is frame
+		view.objects_raw = [dict(item) for item in data]
+		await view.get_object_data()
+		assert view._frame is frame
+
+		# Changed data and a new version rebuild the frame.
+		view.objects_raw.append(dict(name='Map 5', author='Author', time=5))
+		result = await view.get_object_data()
+		assert view._frame is not frame
+		assert result['count'] == 6
+
+		frame = view._frame
+		view.objects_raw[0]['name'] = 'Changed'
+		view.data_version += 1
+		view.search_text = 'changed'
+		result = await view.get_object_data()
+		assert view._frame is not frame
+		assert result['count'] == 1
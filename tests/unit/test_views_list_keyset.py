@@ -0,0 +1,99 @@
+import asynctest
+import peewee
+
+from pyplanet.views.generics.list import ListView
+
+database = peewee.SqliteDatabase(':memory:')
+
+
+class Objects:
+	def __init__(self):
+		self.counts = 0
+
+	async def count(self, query):
+		self.counts += 1
+		return query.count()
+
+
+class Item(peewee.Model):
+	name = peewee.CharField()
+	score = peewee.IntegerField()
+
+	objects = Objects()
+	offsets = list()
+
+	class Meta:
+		database = database
+
+	@classmethod
+	async def execute(cls, query):
+		cls.offsets.append(query._offset)
+		return list(query)
+
+
+class ItemListView(ListView):
+	model = Item
+	keyset_pagination = True
+	fields = [
+		{'name': 'Name', 'index': 'name', 'sorting': True, 'searching': True},
+		{'name': 'Score', 'index': 'score', 'sorting': True, 'searching': False},
+	]
+
+	async def get_query(self):
+		return Item.select()
+
+
+class TestListViewKeyset(asynctest.TestCase):
+	async def setUp(self):
+		Item.objects.counts = 0
+		database.connect()
+		database.create_tables([Item])
+		with database.atomic():
+			for nr in range(95):
+				Item.create(name='Item {}'.format(nr), score=nr % 7)
+
+	async def tearDown(self):
+		database.drop_tables([Item])
+		database.close()
+
+	async def get_pages(self, view, pages):
+		result = list()
+		for page in pages:
+			view.page = page
+			await view.get_object_data()
+			result.append([item.id for item in view.objects])
+		return result
+
+	async def test_pages(self):
+		keyset_view = ItemListView()
+		keyset_view.sort_field = keyset_view.fields[1]
+		keyset_view.sort_order = 0
+		keyset_view.num_per_page = 10
+
+		# Ties on the score are ordered by primary key.
+		expected = [
+			[item.id for item in Item.select().order_by(Item.score.desc(), Item.id.desc()).paginate(page, 10)]
+			for page in range(1, 11)
+		]
+
+		pages = [1, 2, 3, 3, 2, 10, 9, 1, 7, 5]
+		assert await self.get_pages(keyset_view, pages) == [expected[page - 1] for page in pages]
+		assert keyset_view.count == 95
+
+		# Count is cached.
+		assert Item.objects.counts == 1
+
+		# Following pages are found without offset.
+		Item.offsets.clear()
+		await self.get_pages(keyset_view, [1, 2, 3, 4, 10, 9, 8])
+		assert not any(Item.offsets)
+
+	async def test_fallback(self):
+		view = ItemListView()
+		view.num_per_page = 10
+		expected = [item.id for item in Item.select().order_by(Item.id).paginate(4, 10)]
+
+		# Without sort field the pages are ordered by primary key.
+		assert await self.get_pages(view, [1, 4, 5, 4]) == [
+			list(range(1, 11)), expected, list(range(41, 51)), expected
+		]